@@ -0,0 +1,11 @@
+"""Benchmarks for the storage, capture and CLI hot paths.
+
+Stdlib only. Run from the repository root:
+
+    python -m benchmarks run -o before.json
+    python -m benchmarks run -o after.json
+    python -m benchmarks compare before.json after.json
+
+The checkout's ``src/`` is benchmarked, not an installed copy, so two
+revisions can be compared by running the suite in each.
+"""
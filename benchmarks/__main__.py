@@ -0,0 +1,148 @@
+"""Command line entry point: ``python -m benchmarks {run,load,compare}``."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from benchmarks.harness import SRC, compare, format_seconds, report, result, write_results
+
+# Benchmark this checkout, not whatever copy happens to be installed
+sys.path.insert(0, str(SRC))
+
+SUITES = ("storage", "capture", "cli")
+
+
+def _floats(value: str) -> list[float]:
+    return [float(v) for v in value.split(",")]
+
+
+def _ints(value: str) -> list[int]:
+    return [int(float(v)) for v in value.split(",")]
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    from benchmarks import bench_capture, bench_cli, bench_storage
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="crc-bench-") as tmp:
+        workdir = Path(tmp)
+        suites = {
+            "storage": lambda: bench_storage.run(workdir, args.sizes, args.repeat),
+            "capture": lambda: bench_capture.run(args.capture_mb, args.repeat),
+            "cli": lambda: bench_cli.run(workdir, args.cli_entries, args.repeat),
+        }
+        for name in args.only:
+            print(f"{name}:", flush=True)
+            for r in suites[name]():
+                report(r)
+                results.append(r)
+    write_results(args.output, results)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+
+def cmd_load(args: argparse.Namespace) -> None:
+    from benchmarks.load import run_load
+
+    with tempfile.TemporaryDirectory(prefix="crc-load-") as tmp:
+        try:
+            r = run_load(
+                Path(tmp), args.writers, args.appends, args.mode,
+                args.cleaners, args.readers, args.keep,
+            )
+        except (RuntimeError, threading.BrokenBarrierError) as e:
+            print(f"FAIL {e or 'workers did not start'}", file=sys.stderr)
+            sys.exit(1)
+    total = r["writers"] * r["appends"]
+    print(
+        f"{r['mode']}: {r['writers']} writers x {r['appends']} = {total} entries "
+        f"in {r['seconds']:.2f}s ({r['throughput']:.0f}/s)"
+    )
+    if r["lock_wait"]:
+        print("lock wait: " + ", ".join(f"{k} {format_seconds(v)}" for k, v in r["lock_wait"].items()))
+    if r["cleaners"] or r["readers"]:
+        print(f"{r['cleans']} cleans removed {r['removed']}; {r['reads']} consistent reads")
+    for problem in r["problems"]:
+        print(f"FAIL {problem}", file=sys.stderr)
+    print("OK" if not r["problems"] else f"{len(r['problems'])} problems")
+
+    if args.output:
+        params = {k: r[k] for k in ("writers", "appends", "cleaners", "readers")}
+        results = [result(f"load.{r['mode']}", [r["seconds"] / total], number=total, **params)]
+        if r["lock_wait"]:
+            results.append(result("load.lock_wait_p99", [r["lock_wait"]["p99"]], **params))
+        write_results(args.output, results)
+    if r["problems"]:
+        sys.exit(1)
+
+
+def cmd_compare(args: argparse.Namespace) -> None:
+    if not compare(args.old, args.new, args.threshold):
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Run the suite and write a JSON result file")
+    p_run.add_argument(
+        "--sizes", type=_ints, default=[10**3, 10**4, 10**5, 10**6],
+        help="Store sizes in entries, comma separated (default: 1e3,1e4,1e5,1e6)",
+    )
+    p_run.add_argument(
+        "--capture-mb", type=_floats, default=[0.1, 1.0, 10.0],
+        help="Terminal capture sizes in MiB (default: 0.1,1,10)",
+    )
+    p_run.add_argument(
+        "--cli-entries", type=int, default=1000, help="Store size for the CLI runs"
+    )
+    p_run.add_argument("--repeat", type=int, default=5, help="Rounds per benchmark")
+    p_run.add_argument(
+        "--only", type=lambda v: v.split(","), default=list(SUITES),
+        help=f"Suites to run, comma separated ({','.join(SUITES)})",
+    )
+    p_run.add_argument(
+        "-o", "--output", type=Path, default=Path("benchmark-results.json"),
+        help="Result file (default: benchmark-results.json)",
+    )
+
+    p_load = sub.add_parser(
+        "load", help="Concurrent writers/cleaners/readers: throughput and correctness"
+    )
+    p_load.add_argument("--writers", type=int, default=8, help="Writer processes")
+    p_load.add_argument("--appends", type=int, default=200, help="Entries per writer")
+    p_load.add_argument(
+        "--mode", choices=("append", "record"), default="append",
+        help="Storage.append in-process, or one `record` subprocess per entry",
+    )
+    p_load.add_argument("--cleaners", type=int, default=1, help="Processes running clean")
+    p_load.add_argument("--readers", type=int, default=2, help="Processes checking reads")
+    p_load.add_argument("--keep", type=int, default=100, help="clean --keep for the cleaners")
+    p_load.add_argument("-o", "--output", type=Path, help="Also write a JSON result file")
+
+    p_compare = sub.add_parser("compare", help="Compare two result files")
+    p_compare.add_argument("old", type=Path)
+    p_compare.add_argument("new", type=Path)
+    p_compare.add_argument(
+        "--threshold", type=float, default=1.10,
+        help="Median ratio counted as a regression (default: 1.10)",
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        unknown = set(args.only) - set(SUITES)
+        if unknown:
+            parser.error(f"unknown suite: {', '.join(sorted(unknown))}")
+        cmd_run(args)
+    elif args.command == "load":
+        cmd_load(args)
+    else:
+        cmd_compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""URL extraction from terminal captures."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+from benchmarks.data import terminal_capture
+from benchmarks.harness import measure
+from collector.capture import extract_urls
+
+
+def run(sizes_mb: list[float], repeat: int) -> Iterator[dict]:
+    for mb in sizes_mb:
+        text = terminal_capture(int(mb * 1024 * 1024))
+        assert len(extract_urls(text)) == 3
+        yield measure("capture.extract_urls", lambda: extract_urls(text), repeat=repeat, mb=mb)
@@ -0,0 +1,49 @@
+"""Cold start of the main CLI subcommands, as separate processes."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from itertools import count
+from pathlib import Path
+
+from benchmarks.data import build_store
+from benchmarks.harness import SRC, result
+
+_ids = count()
+
+COMMANDS = {
+    "record": lambda: ["record", "--url", f"https://claude.ai/code/session_01Cold{next(_ids):018d}"],
+    "latest": lambda: ["latest"],
+    "list": lambda: ["list", "-n", "20"],
+    "list json": lambda: ["list", "--json"],
+    "path": lambda: ["path"],
+    "status": lambda: ["status"],
+    "config get": lambda: ["config", "get", "notify.backend"],
+    "stats notify": lambda: ["stats", "notify"],
+}
+
+
+def run(workdir: Path, entries: int, repeat: int) -> Iterator[dict]:
+    home = workdir / "home"
+    build_store(home / ".claude-remote-sessions", entries)
+    env = dict(
+        os.environ,
+        HOME=str(home),
+        PYTHONPATH=os.pathsep.join(filter(None, [str(SRC), os.environ.get("PYTHONPATH")])),
+    )
+
+    def spawn(args: list[str]) -> float:
+        start = time.perf_counter()
+        subprocess.run(args, env=env, stdout=subprocess.DEVNULL, check=True)
+        return time.perf_counter() - start
+
+    # Interpreter startup alone, to subtract mentally from the rest
+    yield result("cli.interpreter", [spawn([sys.executable, "-c", "pass"]) for _ in range(repeat)])
+    for name, argv in COMMANDS.items():
+        spawn([sys.executable, "-m", "collector.cli", *argv()])  # warm the page cache
+        samples = [spawn([sys.executable, "-m", "collector.cli", *argv()]) for _ in range(repeat)]
+        yield result(f"cli.{name.replace(' ', '_')}", samples, entries=entries)
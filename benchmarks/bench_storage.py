@@ -0,0 +1,41 @@
+"""Storage operations against stores of increasing size."""
+
+from __future__ import annotations
+
+import shutil
+from collections.abc import Iterator
+from pathlib import Path
+
+from benchmarks.data import build_store, entry
+from benchmarks.harness import measure
+from collector.storage import Storage
+
+
+def run(workdir: Path, sizes: list[int], repeat: int) -> Iterator[dict]:
+    for n in sizes:
+        template = build_store(workdir / f"store-{n}", n)
+        work = workdir / f"work-{n}"
+
+        def restore() -> None:
+            work.mkdir(exist_ok=True)
+            for name in ("sessions.jsonl", "sessions.txt"):
+                shutil.copyfile(template / name, work / name)
+
+        store = Storage(template)
+        yield measure("storage.read_all", store.read_all, repeat=repeat, entries=n)
+        yield measure("storage.read_latest", store.read_latest, repeat=repeat, entries=n)
+        yield measure("storage.count", store.count, repeat=repeat, entries=n)
+
+        restore()
+        target = Storage(work)
+        new = iter(range(n, n + 200 * repeat))
+        yield measure(
+            "storage.append", lambda: target.append(entry(next(new))),
+            number=200, repeat=repeat, entries=n,
+        )
+        yield measure(
+            "storage.clean", lambda: target.clean(keep_last=10),
+            setup=restore, repeat=repeat, entries=n,
+        )
+        shutil.rmtree(template)
+        shutil.rmtree(work)
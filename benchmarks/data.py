@@ -0,0 +1,54 @@
+"""Synthetic session stores and terminal captures."""
+
+from __future__ import annotations
+
+import json
+import random
+import string
+import time
+from pathlib import Path
+
+from collector.storage import SessionEntry
+
+_ALPHABET = string.ascii_letters + string.digits
+_EPOCH = 1_767_225_600  # 2026-01-01T00:00:00Z
+
+
+def entry(i: int) -> SessionEntry:
+    session_id = f"01Bench{i:017d}"
+    return SessionEntry(
+        timestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(_EPOCH + i * 60)),
+        session_id=session_id,
+        url=f"https://claude.ai/code/session_{session_id}",
+        cwd=f"/home/user/projects/project-{i % 50}",
+        source="wrapper",
+    )
+
+
+def build_store(base_dir: Path, n: int) -> Path:
+    """Write a store of ``n`` entries in the layout ``Storage`` produces."""
+    base_dir.mkdir(parents=True, exist_ok=True)
+    with open(base_dir / "sessions.jsonl", "w") as jsonl, open(base_dir / "sessions.txt", "w") as txt:
+        for start in range(0, n, 10_000):
+            batch = [entry(i) for i in range(start, min(n, start + 10_000))]
+            jsonl.write("".join(json.dumps(e.to_dict()) + "\n" for e in batch))
+            txt.write("".join(e.to_text_line() + "\n" for e in batch))
+    return base_dir
+
+
+def terminal_capture(size: int, urls: int = 3, seed: int = 0) -> str:
+    """About ``size`` characters of colored terminal output with a few URLs."""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        words = " ".join(
+            "".join(rng.choices(_ALPHABET, k=rng.randint(2, 10))) for _ in range(rng.randint(4, 14))
+        )
+        line = f"\x1b[{rng.choice((32, 33, 36, 90))}m{words}\x1b[0m\r\n"
+        lines.append(line)
+        total += len(line)
+    for n in range(urls):
+        index = rng.randrange(len(lines))
+        lines[index] = f"Remote session: https://claude.ai/code/session_01Capture{n:015d}\r\n"
+    return "".join(lines)
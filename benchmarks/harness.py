@@ -0,0 +1,122 @@
+"""Timing, result files and comparison."""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+
+# Bump when the result layout changes
+FORMAT_VERSION = 1
+
+
+def measure(
+    name: str,
+    fn: Callable[[], object],
+    *,
+    setup: Callable[[], object] | None = None,
+    number: int = 1,
+    repeat: int = 5,
+    **params: object,
+) -> dict:
+    """Time ``fn`` ``number`` times per round over ``repeat`` rounds.
+
+    ``setup`` runs before each round, outside the timed region (e.g. to
+    restore a store that ``fn`` modifies). Times are seconds per call.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return result(name, samples, number=number, **params)
+
+
+def result(name: str, samples: list[float], *, number: int = 1, **params: object) -> dict:
+    return {
+        "name": name,
+        "params": params,
+        "number": number,
+        "repeat": len(samples),
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+    }
+
+
+def key(r: dict) -> str:
+    """Identify a result across runs: name plus sorted parameters."""
+    params = ",".join(f"{k}={v}" for k, v in sorted(r["params"].items()))
+    return f"{r['name']}[{params}]" if params else r["name"]
+
+
+def metadata() -> dict:
+    import tomllib
+
+    with open(ROOT / "pyproject.toml", "rb") as f:
+        version = tomllib.load(f)["project"]["version"]
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = ""
+    return {
+        "format": FORMAT_VERSION,
+        "version": version,
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_results(path: Path, results: list[dict]) -> None:
+    path.write_text(json.dumps({"meta": metadata(), "results": results}, indent=2) + "\n")
+
+
+def compare(old_path: Path, new_path: Path, threshold: float = 1.10) -> bool:
+    """Print median ratios new/old; False if any exceeds ``threshold``."""
+    old = {key(r): r for r in json.loads(old_path.read_text())["results"]}
+    new = {key(r): r for r in json.loads(new_path.read_text())["results"]}
+    ok = True
+    width = max((len(k) for k in new), default=0)
+    for k, r in new.items():
+        if k not in old:
+            print(f"{k:<{width}}  {format_seconds(r['median']):>9}  (new)")
+            continue
+        ratio = r["median"] / old[k]["median"] if old[k]["median"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag, ok = "  REGRESSION", False
+        print(
+            f"{k:<{width}}  {format_seconds(old[k]['median']):>9} -> "
+            f"{format_seconds(r['median']):>9}  x{ratio:.2f}{flag}"
+        )
+    for k in old.keys() - new.keys():
+        print(f"{k:<{width}}  (missing)")
+    return ok
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+    return f"{seconds * 1e9:.3g}ns"
+
+
+def report(r: dict) -> None:
+    print(f"  {key(r)}: {format_seconds(r['median'])} (min {format_seconds(r['min'])})")
+    sys.stdout.flush()
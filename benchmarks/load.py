@@ -0,0 +1,244 @@
+"""Concurrent writers, cleaners and readers against one store.
+
+N writer processes each add M entries (``Storage.append`` in-process, or
+one ``record`` subprocess per entry) while cleaner processes run ``clean``
+and reader processes take the shared lock and check that both files are
+well-formed and agree. Afterwards the store is verified: no malformed or
+interleaved lines, no duplicates, ``sessions.txt`` matches
+``sessions.jsonl`` line for line, and each writer's surviving entries are
+a contiguous, in-order run ending with its last one (``clean`` may only
+drop the oldest entries), and every entry is either still there or was
+counted as removed by a ``clean``.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import multiprocessing
+import os
+import queue
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.harness import SRC
+
+STORE_NAME = ".claude-remote-sessions"
+
+
+def session_id(writer: int, seq: int) -> str:
+    return f"01Load{writer:04d}{seq:014d}"
+
+
+def _store(home: Path):
+    from collector.storage import Storage
+
+    return Storage(home / STORE_NAME)
+
+
+def _writer(home: Path, writer: int, appends: int, mode: str, start, results) -> None:
+    from collector.storage import SessionEntry
+
+    store = _store(home)
+    env = dict(
+        os.environ,
+        HOME=str(home),
+        PYTHONPATH=os.pathsep.join(filter(None, [str(SRC), os.environ.get("PYTHONPATH")])),
+    )
+    waits = []
+    start.wait()
+    for seq in range(appends):
+        sid = session_id(writer, seq)
+        url = f"https://claude.ai/code/session_{sid}"
+        if mode == "record":
+            subprocess.run(
+                [sys.executable, "-m", "collector.cli", "record", "--url", url, "--source", "load"],
+                env=env, stdout=subprocess.DEVNULL, check=True,
+            )
+        else:
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            store.append(SessionEntry(timestamp, sid, url, source="load"))
+            waits.append(store.last_lock_wait)
+    results.put(("writer", time.perf_counter(), waits))
+
+
+def _cleaner(home: Path, keep: int, start, stop, results) -> None:
+    store = _store(home)
+    cleans = removed = 0
+    start.wait()
+    while not stop.is_set():
+        removed += store.clean(keep_last=keep)
+        cleans += 1
+        time.sleep(0.002)
+    results.put(("cleaner", cleans, removed))
+
+
+def _reader(home: Path, start, stop, results) -> None:
+    store = _store(home)
+    reads = 0
+    problems: list[str] = []
+    start.wait()
+    while not stop.is_set():
+        with store._locked(fcntl.LOCK_SH):
+            txt = store.read_txt()
+            jsonl = store.jsonl_file.read_text() if store.jsonl_file.exists() else ""
+        problems += _check_files(txt, jsonl)[1]
+        reads += 1
+        time.sleep(0.001)
+    results.put(("reader", reads, problems[:10]))
+
+
+def run_load(
+    home: Path,
+    writers: int = 8,
+    appends: int = 100,
+    mode: str = "append",
+    cleaners: int = 0,
+    readers: int = 0,
+    keep: int = 100,
+) -> dict:
+    """Run one load round in ``home`` and return its measurements and problems."""
+    ctx = multiprocessing.get_context()
+    start = ctx.Barrier(writers + cleaners + readers + 1)
+    stop = ctx.Event()
+    results = ctx.Queue()
+    _store(home)  # create the directory before anyone races for it
+
+    procs = [
+        ctx.Process(target=_writer, args=(home, w, appends, mode, start, results))
+        for w in range(writers)
+    ]
+    procs += [
+        ctx.Process(target=_cleaner, args=(home, keep, start, stop, results))
+        for _ in range(cleaners)
+    ]
+    procs += [
+        ctx.Process(target=_reader, args=(home, start, stop, results)) for _ in range(readers)
+    ]
+    for p in procs:
+        p.start()
+    try:
+        start.wait(timeout=60)
+        began = time.perf_counter()
+        finished, waits, cleans, removed, reads, problems = [], [], 0, 0, 0, []
+        for _ in range(writers):
+            _, done, w = _get(results, procs)
+            finished.append(done)
+            waits += w
+        stop.set()
+        reports = [_get(results, procs) for _ in range(cleaners + readers)]
+    except BaseException:
+        for p in procs:
+            p.terminate()
+        raise
+    for kind, a, b in reports:
+        if kind == "cleaner":
+            cleans, removed = cleans + a, removed + b
+        else:
+            reads += a
+            problems += [f"reader: {p}" for p in b]
+    for p in procs:
+        p.join()
+        if p.exitcode:
+            problems.append(f"worker process exited with {p.exitcode}")
+
+    seconds = max(finished) - began
+    store = _store(home)
+    entries, found = _check_files(store.read_txt(), store.jsonl_file.read_text())
+    problems += found
+    problems += _check_writers(entries, writers, appends, cleaned=cleaners > 0)
+    if len(entries) + removed != writers * appends:
+        # A clean that rewrote the files without entries appended meanwhile
+        problems.append(
+            f"{writers * appends} appended but {len(entries)} kept + {removed} cleaned"
+        )
+    return {
+        "mode": mode,
+        "writers": writers,
+        "appends": appends,
+        "cleaners": cleaners,
+        "readers": readers,
+        "seconds": seconds,
+        "throughput": writers * appends / seconds,
+        "lock_wait": _summarize(waits),
+        "cleans": cleans,
+        "removed": removed,
+        "reads": reads,
+        "entries": len(entries),
+        "problems": problems,
+    }
+
+
+def _get(results, procs: list) -> tuple:
+    """The next worker report; raise instead of hanging if a worker died."""
+    while True:
+        try:
+            return results.get(timeout=0.5)
+        except queue.Empty:
+            for p in procs:
+                if p.exitcode:
+                    raise RuntimeError(f"worker process exited with {p.exitcode}") from None
+
+
+def _check_files(txt: str, jsonl: str) -> tuple[list[dict], list[str]]:
+    """Parse both files; report malformed lines and any mismatch between them."""
+    problems = []
+    entries = []
+    for n, line in enumerate(jsonl.splitlines(), 1):
+        try:
+            d = json.loads(line)
+            if not d["url"].endswith(d["session_id"]):
+                raise ValueError
+            entries.append(d)
+        except (ValueError, KeyError, TypeError, AttributeError):
+            problems.append(f"sessions.jsonl:{n}: malformed line {line[:80]!r}")
+    txt_lines = txt.splitlines()
+    for n, line in enumerate(txt_lines, 1):
+        if len(line.split(" ")) != 2:
+            problems.append(f"sessions.txt:{n}: malformed line {line[:80]!r}")
+    if not problems:
+        if len(txt_lines) != len(entries):
+            problems.append(
+                f"sessions.txt has {len(txt_lines)} lines, sessions.jsonl {len(entries)}"
+            )
+        for n, (line, d) in enumerate(zip(txt_lines, entries), 1):
+            if line != f"{d['timestamp']} {d['url']}":
+                problems.append(f"line {n}: sessions.txt and sessions.jsonl disagree")
+                break
+    return entries, problems
+
+
+def _check_writers(entries: list[dict], writers: int, appends: int, cleaned: bool) -> list[str]:
+    problems = []
+    ids = [d["session_id"] for d in entries]
+    if len(set(ids)) != len(ids):
+        problems.append(f"{len(ids) - len(set(ids))} duplicated entries")
+    seen: dict[int, list[int]] = {}
+    for sid in ids:
+        if sid.startswith("01Load"):
+            seen.setdefault(int(sid[6:10]), []).append(int(sid[10:]))
+    for w in range(writers):
+        seqs = seen.get(w, [])
+        first = appends - len(seqs) if cleaned else 0
+        if seqs != list(range(first, appends)):
+            missing = sorted(set(range(first, appends)) - set(seqs))
+            problems.append(
+                f"writer {w}: {len(seqs)} of {appends} entries survived, "
+                f"not a contiguous run ending at the last (missing {missing[:5]}...)"
+            )
+    return problems
+
+
+def _summarize(waits: list[float]) -> dict | None:
+    if not waits:
+        return None
+    waits = sorted(waits)
+    return {
+        "mean": statistics.fmean(waits),
+        "p50": waits[len(waits) // 2],
+        "p99": waits[min(len(waits) - 1, int(len(waits) * 0.99))],
+        "max": waits[-1],
+    }
@@ -17,12 +17,19 @@ claude() {
     # I/O redirected to avoid terminal interference with script(1)
     sh -c '
         tmpfile="$1"
+        # Epoch seconds for the latency trace; sub-second where date supports %N
+        now() { t=$(date +%s.%N 2>/dev/null); case "$t" in *N*|"") date +%s ;; *) echo "$t" ;; esac; }
+        first_byte=""
         i=0
         while [ $i -lt 60 ]; do
             if [ -f "$tmpfile" ] && [ -s "$tmpfile" ]; then
+                [ -n "$first_byte" ] || first_byte=$(now)
                 url=$(grep -Eo "https://claude\.ai/code/session_[^[:space:]]+" "$tmpfile" 2>/dev/null | head -1)
                 if [ -n "$url" ]; then
-                    claude-remote-collector record --url "$url" --source startup --notify 2>/dev/null
+                    # Latency trace stages, only when asked for
+                    set --
+                    [ -z "$CRC_LATENCY_TRACE" ] || set -- --trace "first_byte=$first_byte" --trace "url_detected=$(now)"
+                    claude-remote-collector record --url "$url" --source startup --notify --detach "$@" 2>/dev/null
                     touch "$tmpfile.recorded"
                     break
                 fi
@@ -54,7 +61,7 @@ claude() {
         local url
         url=$(grep -Eo 'https://claude\.ai/code/session_[^[:space:]]+' "$tmpfile" | head -1)
         if [[ -n "$url" ]]; then
-            command claude-remote-collector record --url "$url" --source exit --notify 2>/dev/null
+            command claude-remote-collector record --url "$url" --source exit --notify --detach 2>/dev/null
         fi
     fi
 
@@ -13,12 +13,19 @@ function claude --wraps=claude --description "Claude Code with remote link captu
     # Uses sh -c with I/O redirected to avoid terminal interference with script(1)
     command sh -c '
         tmpfile="$1"
+        # Epoch seconds for the latency trace; sub-second where date supports %N
+        now() { t=$(date +%s.%N 2>/dev/null); case "$t" in *N*|"") date +%s ;; *) echo "$t" ;; esac; }
+        first_byte=""
         i=0
         while [ $i -lt 60 ]; do
             if [ -f "$tmpfile" ] && [ -s "$tmpfile" ]; then
+                [ -n "$first_byte" ] || first_byte=$(now)
                 url=$(grep -Eo "https://claude\.ai/code/session_[^[:space:]]+" "$tmpfile" 2>/dev/null | head -1)
                 if [ -n "$url" ]; then
-                    claude-remote-collector record --url "$url" --source startup --notify 2>/dev/null
+                    # Latency trace stages, only when asked for
+                    set --
+                    [ -z "$CRC_LATENCY_TRACE" ] || set -- --trace "first_byte=$first_byte" --trace "url_detected=$(now)"
+                    claude-remote-collector record --url "$url" --source startup --notify --detach "$@" 2>/dev/null
                     touch "$tmpfile.recorded"
                     break
                 fi
@@ -42,7 +49,7 @@ function claude --wraps=claude --description "Claude Code with remote link captu
     if not test -f "$tmpfile.recorded"
         set -l url (grep -Eo 'https://claude\.ai/code/session_[^[:space:]]+' $tmpfile | head -1)
         if test -n "$url"
-            command claude-remote-collector record --url "$url" --source exit --notify 2>/dev/null
+            command claude-remote-collector record --url "$url" --source exit --notify --detach 2>/dev/null
         end
     end
 
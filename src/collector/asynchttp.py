@@ -0,0 +1,235 @@
+"""Minimal asyncio HTTP/1.1 client built on ``asyncio.open_connection``.
+
+Mirrors ``httppool.urlopen``: it takes a URL or ``urllib.request.Request``,
+returns a fully read ``PooledResponse`` and raises
+``urllib.error.HTTPError`` for 4xx/5xx statuses, so notifiers can share
+their request building and response handling between the blocking and the
+async path. Keep-alive connections are pooled per (scheme, host, port) and
+per event loop. Only what the notifier backends need is implemented:
+Content-Length and chunked bodies, no redirects, no proxies.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import http.client
+import io
+import socket
+import ssl
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+
+from collector.httppool import MAX_IDLE_SECONDS, USER_AGENT, PooledResponse
+
+_Key = tuple[str, str, int]
+_Conn = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+# Errors that mean a reused keep-alive connection went stale under us.
+_STALE_ERRORS = (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError)
+
+
+class AsyncHTTPPool:
+    """Per-host pool of idle keep-alive stream connections (one event loop)."""
+
+    def __init__(self, max_idle_per_host: int = 16, context: ssl.SSLContext | None = None):
+        self.max_idle_per_host = max_idle_per_host
+        self.context = context
+        self._idle: dict[_Key, list[tuple[_Conn, float]]] = {}
+
+    async def urlopen(
+        self, req: urllib.request.Request | str, timeout: float = 10
+    ) -> PooledResponse:
+        if isinstance(req, str):
+            req = urllib.request.Request(req)
+        url = req.full_url
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise urllib.error.URLError(f"unsupported URL scheme: {scheme!r}")
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        default_port = 443 if scheme == "https" else 80
+        headers = {
+            "Host": host if port == default_port else f"{host}:{port}",
+            "User-Agent": USER_AGENT,
+            "Accept-Encoding": "identity",
+        }
+        headers.update(req.header_items())
+        body = req.data or b""
+        if body or req.get_method() in ("POST", "PUT", "PATCH"):
+            headers["Content-Length"] = str(len(body))
+        head = f"{req.get_method()} {path} HTTP/1.1\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        message = head.encode("latin-1") + b"\r\n" + body
+
+        key = (scheme, host, port)
+        try:
+            (status, reason, resp_headers, resp_body), timings = await asyncio.wait_for(
+                self._send(key, message), timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise urllib.error.URLError(TimeoutError("timed out")) from e
+        except http.client.HTTPException as e:
+            raise urllib.error.URLError(e) from e
+
+        if status >= 400:
+            raise urllib.error.HTTPError(url, status, reason, resp_headers, io.BytesIO(resp_body))
+        return PooledResponse(url, status, reason, resp_headers, resp_body, timings)
+
+    async def close(self) -> None:
+        """Close every idle connection."""
+        idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for (_, writer), _ in conns:
+                writer.close()
+
+    async def _send(
+        self, key: _Key, message: bytes
+    ) -> tuple[tuple[int, str, http.client.HTTPMessage, bytes], dict[str, float]]:
+        conn, timings = await self._acquire(key)
+        reused = not timings
+        start = time.perf_counter()
+        try:
+            result, keep = await _roundtrip(conn, message)
+        except _STALE_ERRORS:
+            conn[1].close()
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection; retry once fresh
+            conn, timings = await self._connect(key)
+            start = time.perf_counter()
+            try:
+                result, keep = await _roundtrip(conn, message)
+            except BaseException:
+                conn[1].close()
+                raise
+        except BaseException:
+            conn[1].close()
+            raise
+        timings["response"] = time.perf_counter() - start
+
+        if keep:
+            self._release(key, conn)
+        else:
+            conn[1].close()
+        return result, timings
+
+    async def _acquire(self, key: _Key) -> tuple[_Conn, dict[str, float]]:
+        """An idle connection (with no timings) or a freshly timed new one."""
+        now = time.monotonic()
+        conns = self._idle.get(key, [])
+        while conns:
+            conn, since = conns.pop()
+            if now - since < MAX_IDLE_SECONDS and not conn[0].at_eof():
+                return conn, {}
+            conn[1].close()
+        return await self._connect(key)
+
+    async def _connect(self, key: _Key) -> tuple[_Conn, dict[str, float]]:
+        """Open a connection, timing DNS, TCP connect and TLS separately."""
+        scheme, host, port = key
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        error: OSError | None = None
+        for family, _, _, _, addr in infos:
+            try:
+                reader, writer = await asyncio.open_connection(addr[0], addr[1], family=family)
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise error or OSError("getaddrinfo returned no addresses")
+        connected = time.perf_counter()
+        timings = {"dns": resolved - start, "connect": connected - resolved}
+        if scheme == "https":
+            if self.context is None:
+                self.context = ssl.create_default_context()
+            try:
+                await writer.start_tls(self.context, server_hostname=host)
+            except BaseException:
+                writer.close()
+                raise
+            timings["tls"] = time.perf_counter() - connected
+        return (reader, writer), timings
+
+    def _release(self, key: _Key, conn: _Conn) -> None:
+        conns = self._idle.setdefault(key, [])
+        if len(conns) < self.max_idle_per_host:
+            conns.append((conn, time.monotonic()))
+        else:
+            conn[1].close()
+
+
+async def _roundtrip(
+    conn: _Conn, message: bytes
+) -> tuple[tuple[int, str, http.client.HTTPMessage, bytes], bool]:
+    """Send one request; return ((status, reason, headers, body), keep_alive)."""
+    reader, writer = conn
+    writer.write(message)
+    await writer.drain()
+
+    status_line = await reader.readuntil(b"\r\n")
+    try:
+        version, status, *rest = status_line.decode("latin-1").split(None, 2)
+        status_code = int(status)
+    except ValueError:
+        raise http.client.BadStatusLine(status_line.decode("latin-1", "replace")) from None
+    reason = rest[0].strip() if rest else ""
+
+    header_lines = []
+    while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+        header_lines.append(line)
+    headers = http.client.parse_headers(io.BytesIO(b"".join(header_lines) + b"\r\n"))
+
+    keep = version == "HTTP/1.1" and headers.get("Connection", "").lower() != "close"
+    if headers.get("Transfer-Encoding", "").lower() == "chunked":
+        body = await _read_chunked(reader)
+    elif headers.get("Content-Length") is not None:
+        body = await reader.readexactly(int(headers["Content-Length"]))
+    elif status_code in (204, 304) or 100 <= status_code < 200:
+        body = b""
+    else:
+        body = await reader.read()
+        keep = False
+    return (status_code, reason, headers, body), keep
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks = []
+    while True:
+        size_line = await reader.readuntil(b"\r\n")
+        size = int(size_line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            # Skip trailers up to the terminating blank line
+            while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                pass
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+_pools: dict[asyncio.AbstractEventLoop, AsyncHTTPPool] = {}
+
+
+def get_pool() -> AsyncHTTPPool:
+    """The pool for the running event loop (streams are loop-bound)."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        for stale in [lp for lp in _pools if lp.is_closed()]:
+            del _pools[stale]
+        pool = _pools[loop] = AsyncHTTPPool()
+    return pool
+
+
+async def urlopen(req: urllib.request.Request | str, timeout: float = 10) -> PooledResponse:
+    """Send a request through the running loop's pool (see module docstring)."""
+    return await get_pool().urlopen(req, timeout=timeout)
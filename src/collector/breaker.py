@@ -0,0 +1,143 @@
+"""Per-backend circuit breakers shared by every process via a state file.
+
+After ``threshold`` consecutive failed sends a backend's circuit opens:
+sends to it fail immediately, without touching the network, until
+``cooldown`` seconds have passed. The first send after that is the
+half-open probe; it claims the slot by pushing the reopen time forward
+another cooldown, so concurrent processes keep short-circuiting while it
+runs. A successful probe closes the circuit, a failed one keeps it open.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from collector.statefile import locked_json
+
+if TYPE_CHECKING:
+    from collector.notifier import NotifyResult
+
+STATE_NAME = "breakers.json"
+
+DEFAULT_THRESHOLD = 5
+DEFAULT_COOLDOWN = 60.0
+
+
+def default_state_file(base_dir: Path | None = None) -> Path:
+    """The state file in ``base_dir``, by default the per-user storage directory."""
+    from collector import storage
+
+    return (base_dir or storage.DEFAULT_DIR) / STATE_NAME
+
+
+def circuit_breaker(config: dict, base_dir: Path | None = None) -> CircuitBreaker | None:
+    """The breaker configured under ``notify``, or None if disabled.
+
+    Its state is kept with the store at ``base_dir``.
+    """
+    notify = config.get("notify", {})
+    threshold = int(notify.get("breaker_threshold", DEFAULT_THRESHOLD))
+    if threshold <= 0:
+        return None
+    return CircuitBreaker(
+        default_state_file(base_dir),
+        threshold=threshold,
+        cooldown=float(notify.get("breaker_cooldown", DEFAULT_COOLDOWN)),
+    )
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        state_file: Path,
+        threshold: int = DEFAULT_THRESHOLD,
+        cooldown: float = DEFAULT_COOLDOWN,
+    ):
+        self.state_file = state_file
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+    def before(self, key: str) -> float:
+        """Seconds until ``key`` may be tried again; 0 means go ahead.
+
+        Returning 0 for an open circuit whose cooldown has passed makes
+        the caller the half-open probe.
+        """
+        return self._admit(key)[0]
+
+    def _admit(self, key: str) -> tuple[float, dict]:
+        """``before`` plus a snapshot of the circuit, under one lock."""
+        with locked_json(self.state_file) as state:
+            circuit = state.get(key)
+            if not circuit or circuit["failures"] < self.threshold:
+                return 0.0, {}
+            now = time.time()
+            if circuit["open_until"] > now:
+                return circuit["open_until"] - now, dict(circuit)
+            circuit["open_until"] = now + self.cooldown
+            return 0.0, {}
+
+    def record(self, key: str, result: NotifyResult) -> None:
+        """Count a send's outcome towards ``key``'s circuit.
+
+        Rate-limited results (``retry_after`` set) mean the backend is up
+        and are not counted either way.
+        """
+        if result.retry_after is not None:
+            return
+        with locked_json(self.state_file) as state:
+            if result.success:
+                state.pop(key, None)
+                return
+            circuit = state.setdefault(key, {"failures": 0, "open_until": 0.0})
+            circuit["failures"] += 1
+            circuit["last_error"] = result.message
+            if circuit["failures"] >= self.threshold:
+                circuit["open_until"] = time.time() + self.cooldown
+
+    def status(self, key: str) -> dict:
+        """Snapshot of ``key``'s circuit: failures, open_until, last_error."""
+        with locked_json(self.state_file) as state:
+            return dict(state.get(key, {"failures": 0, "open_until": 0.0}))
+
+    def call(
+        self, key: str, send: Callable[[], NotifyResult], force: bool = False
+    ) -> NotifyResult:
+        """Run ``send`` through the breaker, short-circuiting while open.
+
+        With ``force`` the send goes ahead regardless; its outcome still
+        counts, so a forced success closes the circuit.
+        """
+        wait, circuit = (0.0, {}) if force else self._admit(key)
+        if wait > 0:
+            return self._open_result(key, wait, circuit)
+        result = send()
+        self.record(key, result)
+        return result
+
+    async def call_async(
+        self, key: str, send: Callable[[], Awaitable[NotifyResult]], force: bool = False
+    ) -> NotifyResult:
+        """Async flavour of ``call``; the state file is locked off the event loop."""
+        import asyncio
+
+        wait, circuit = (0.0, {}) if force else await asyncio.to_thread(self._admit, key)
+        if wait > 0:
+            return self._open_result(key, wait, circuit)
+        result = await send()
+        await asyncio.to_thread(self.record, key, result)
+        return result
+
+    def _open_result(self, key: str, wait: float, circuit: dict) -> NotifyResult:
+        from collector.notifier import NotifyResult
+
+        last = f" (last error: {circuit['last_error']})" if circuit.get("last_error") else ""
+        return NotifyResult(
+            success=False,
+            method=key,
+            message=f"Circuit open after {circuit['failures']} consecutive failures{last}; next try in {wait:.0f}s",
+            retry_after=wait,
+        )
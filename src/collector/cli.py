@@ -6,38 +6,83 @@ import argparse
 import os
 import sys
 import time
-from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-from collector import config, storage, wrapper
+# Only what the hot `record`/`latest`/`path` commands need is imported at
+# module level; everything else is imported inside the command that uses it.
+from collector import storage, timing
 from collector.capture import URL_PATTERN
-from collector.notifier import notify as send_notify
+
+if TYPE_CHECKING:
+    from collector.outbox import FlushReport
+
+# When this process got going, for the `record_start` trace stage
+_STARTED = time.monotonic()
+_LOADED = time.perf_counter()
+# CPU time from interpreter start through the imports above (CRC_TRACE)
+_IMPORT_CPU = time.process_time()
+timing.add("import", _IMPORT_CPU)
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time in the storage timestamp format."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
 def cmd_install(args: argparse.Namespace) -> None:
+    from collector import wrapper
+
     print(wrapper.install(args.shell))
 
 
 def cmd_uninstall(args: argparse.Namespace) -> None:
+    from collector import wrapper
+
     print(wrapper.uninstall(args.shell))
 
 
 def cmd_status(args: argparse.Namespace) -> None:
+    from collector import wrapper
+
     store = storage.Storage()
     print("Shell wrappers:")
     print(wrapper.status())
     print(f"\nSessions: {store.count()}")
     print(f"Storage:  {store.base_dir}")
 
+    from collector.plugins import registry
+
+    print(f"Backends: {', '.join(sorted(registry()))}")
+
 
 def cmd_list(args: argparse.Namespace) -> None:
     store = storage.Storage()
+    n = args.n if args.n and args.n > 0 else 0
+    # What is on disk already is the output: copy it without decoding
+    try:
+        out = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        out = None  # not a real file (captured output)
+    if out is not None:
+        sys.stdout.flush()
+        try:
+            copied = store.copy_jsonl(out, last=n) if args.json else store.copy_txt(out, last=n)
+        except BrokenPipeError:
+            # The reader went away (`| head`); don't let the exit flush complain
+            os.dup2(os.open(os.devnull, os.O_WRONLY), out)
+            return
+        if copied == 0:
+            print("No sessions collected yet.")
+        if copied is not None:
+            return
+
     entries = store.read_all()
     if not entries:
         print("No sessions collected yet.")
         return
 
-    n = args.n
-    if n and n > 0:
+    if n:
         entries = entries[-n:]
 
     if args.json:
@@ -50,6 +95,26 @@ def cmd_list(args: argparse.Namespace) -> None:
             print(e.to_text_line())
 
 
+def cmd_find(args: argparse.Namespace) -> None:
+    from collector import index
+
+    entries = index.find(storage.Storage(), args.query, args.field, args.n)
+    if not entries:
+        print(f"No sessions match {args.query!r}.", file=sys.stderr)
+        sys.exit(1)
+    if args.json:
+        import json
+
+        for e in entries:
+            print(json.dumps(e.to_dict()))
+    elif args.url_only:
+        for e in entries:
+            print(e.url)
+    else:
+        for e in entries:
+            print(f"{e.to_text_line()}  {e.cwd}" if e.cwd else e.to_text_line())
+
+
 def cmd_latest(args: argparse.Namespace) -> None:
     store = storage.Storage()
     entries = store.read_latest(1)
@@ -72,6 +137,7 @@ def cmd_tail(args: argparse.Namespace) -> None:
 
     print(f"Watching {txt_file} for new sessions... (Ctrl+C to stop)")
 
+    store.merge_spool()
     last_size = txt_file.stat().st_size
     content = txt_file.read_text()
     if content:
@@ -79,6 +145,7 @@ def cmd_tail(args: argparse.Namespace) -> None:
 
     try:
         while True:
+            store.merge_spool()
             current_size = txt_file.stat().st_size
             if current_size > last_size:
                 with open(txt_file) as f:
@@ -93,13 +160,31 @@ def cmd_tail(args: argparse.Namespace) -> None:
 
 
 def cmd_clean(args: argparse.Namespace) -> None:
+    from collector import config, metrics, retention
+
     store = storage.Storage()
     keep = args.keep
-    removed = store.clean(keep_last=keep)
+    if keep is None and args.older_than is None and args.max_bytes is None:
+        keep = 10
+    try:
+        rules = retention.Policy(
+            keep=keep,
+            older_than=retention.cutoff(args.older_than) if args.older_than else None,
+            max_bytes=retention.parse_size(args.max_bytes) if args.max_bytes else None,
+        )
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    removed = retention.apply(store, rules)
+    metrics.refresh(store, config.load_config())
+    limits = [f"last {keep}" if keep is not None else ""]
+    limits.append(f"since {rules.older_than}" if rules.older_than else "")
+    limits.append(f"at most {args.max_bytes} bytes" if rules.max_bytes else "")
+    limit_text = ", ".join(filter(None, limits))
     if removed:
-        print(f"Removed {removed} old entries (kept last {keep}).")
+        print(f"Removed {removed} old entries (kept {limit_text}).")
     else:
-        print(f"Nothing to clean ({store.count()} entries, keeping {keep}).")
+        print(f"Nothing to clean ({store.count()} entries, keeping {limit_text}).")
 
 
 def cmd_record(args: argparse.Namespace) -> None:
@@ -108,26 +193,163 @@ def cmd_record(args: argparse.Namespace) -> None:
         print(f"Invalid session URL: {url}", file=sys.stderr)
         sys.exit(1)
     session_id = url.split("session_", 1)[-1]
+    # Traced only on request: the wrapper passes --trace when CRC_LATENCY_TRACE is set
+    trace = None
+    stages = getattr(args, "trace", None)
+    if stages:
+        from collector.trace import parse_stages
+
+        trace = {"record_start": round(_STARTED, 6), **parse_stages(stages)}
     entry = storage.SessionEntry(
-        timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        timestamp=_utc_timestamp(),
         session_id=session_id,
         url=url,
         cwd=os.getcwd(),
         source=args.source,
+        trace=trace,
     )
-    store = storage.Storage()
+    with timing.phase("config"):
+        from collector import config
+
+        cfg = config.load_config()
+    storage_cfg = cfg.get("storage", {})
+    store = storage.Storage(spool=storage_cfg.get("spool", False))
+    start = time.perf_counter()
     store.append(entry)
+    timing.add("lock_wait", store.last_lock_wait)
+    timing.add("write", time.perf_counter() - start - store.last_lock_wait)
+
+    if store.spool:
+        # Counted, and retention applied, when the spool is merged
+        interval = float(storage_cfg.get("spool_interval", 30))
+        if store.spool_due(interval):
+            from collector.dispatch import spawn_worker
+
+            spawn_worker("merge-spool")
+        elif not store.merge_scheduled():
+            from collector.dispatch import spawn_worker
 
+            # Nothing else may come along to merge this entry
+            spawn_worker("merge-spool", "--delay", str(interval))
+    else:
+        with timing.phase("metrics"):
+            from collector import metrics
+
+            metrics.observe_record(store, entry, cfg)
+        if cfg.get("retention", {}).get("auto", False):
+            with timing.phase("retention"):
+                from collector import retention
+
+                if retention.maybe_apply(store, cfg):
+                    metrics.refresh(store, cfg)
     # Auto-notify if --notify flag or auto_notify config
-    cfg = config.load_config()
     should_notify = args.notify or cfg.get("notify", {}).get("auto_notify", False)
     if should_notify and cfg.get("notify", {}).get("enabled", False):
-        result = send_notify(entry, cfg)
-        if not result.success:
-            print(f"Notify failed: {result.message}", file=sys.stderr)
+        with timing.phase("notify"):
+            report = _notify_recorded(entry, store, cfg, args.detach)
+        if report is None:
+            return
+        for _, result in report.failures:
+            print(
+                f"Notify failed (queued for retry): [{result.method}] {result.message}",
+                file=sys.stderr,
+            )
+
+
+def _notify_recorded(
+    entry: storage.SessionEntry, store: storage.Storage, cfg: dict, detach: bool
+) -> FlushReport | None:
+    """Spool a new entry and deliver it, or hand it to a detached worker."""
+    from collector.notifier import backend_names, coalesce_window
+    from collector.outbox import Outbox
+
+    # Spool first so a failed or interrupted delivery is retried later
+    outbox = Outbox(store.base_dir)
+    item = outbox.enqueue(entry)
+    # A coalescing window is waited out in the worker, so that the rest of
+    # the burst goes out in the same digest
+    coalesced = any(coalesce_window(name, cfg) > 0 for name in backend_names(cfg))
+    if detach or coalesced or cfg.get("notify", {}).get("detach", False):
+        from collector.dispatch import spawn_worker
+
+        spawn_worker()
+        return None
+    # Only this entry: an older backlog is the worker's, not worth a wait here
+    report = outbox.flush(cfg, only=[item.path])
+    if len(outbox) > report.pending:
+        from collector.dispatch import spawn_worker
+
+        spawn_worker()
+    return report
+
+
+def cmd_notify_worker(args: argparse.Namespace) -> None:
+    from collector import config
+    from collector.dispatch import run_worker
+
+    cfg = config.load_config()
+    linger = args.linger
+    if linger is None:
+        linger = float(cfg.get("notify", {}).get("outbox_linger", 0))
+    report = run_worker(cfg, storage.Storage().base_dir, linger=linger)
+    if report.failures:
+        sys.exit(1)
+
+
+def cmd_merge_spool(args: argparse.Namespace) -> None:
+    from collector import config, metrics
+
+    store = storage.Storage()
+    if args.delay > 0:
+        with store.merge_schedule() as elected:
+            if not elected:
+                return  # another one is already waiting
+            time.sleep(args.delay)
+    cfg = config.load_config()
+    merged = store.merge_spool()
+    if merged and cfg.get("retention", {}).get("auto", False):
+        from collector import retention
+
+        retention.maybe_apply(store, cfg, appends=len(merged))
+    metrics.refresh(store, cfg)
+    print(f"Merged {len(merged)} spooled entries.")
+
+
+def cmd_outbox(args: argparse.Namespace) -> None:
+    from collector.outbox import Outbox
+
+    outbox = Outbox(storage.Storage().base_dir)
+    if args.outbox_action == "flush":
+        from collector import config
+
+        report = outbox.flush(config.load_config(), force=args.force)
+        print(f"Sent {report.sent}, pending {report.pending}.")
+        for item, result in report.failures:
+            print(f"  {item.entry.session_id}: [{result.method}] {result.message}", file=sys.stderr)
+        if report.failures:
+            sys.exit(1)
+    elif args.outbox_action == "clear":
+        print(f"Removed {outbox.clear()} pending notifications.")
+    else:
+        items = outbox.items()
+        if not items:
+            print("Outbox is empty.")
+            return
+        now = time.time()
+        for item in items:
+            created = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(item.created))
+            wait = max(0, int(item.next_attempt - now))
+            line = f"{created} {item.entry.session_id} attempts={item.attempts}"
+            line += f" retry in {wait}s" if wait else " due now"
+            if item.last_error:
+                line += f"  {item.last_error}"
+            print(line)
 
 
 def cmd_notify(args: argparse.Namespace) -> None:
+    from collector import config
+    from collector.notifier import notify as send_notify
+
     cfg = config.load_config()
     if not cfg.get("notify", {}).get("enabled", False):
         print("Notifications are disabled. Enable with:", file=sys.stderr)
@@ -141,7 +363,7 @@ def cmd_notify(args: argparse.Namespace) -> None:
             sys.exit(1)
         session_id = url.split("session_", 1)[-1]
         entry = storage.SessionEntry(
-            timestamp=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            timestamp=_utc_timestamp(),
             session_id=session_id,
             url=url,
         )
@@ -153,15 +375,189 @@ def cmd_notify(args: argparse.Namespace) -> None:
             sys.exit(1)
         entry = entries[0]
 
-    result = send_notify(entry, cfg)
-    if result.success:
-        print(f"[{result.method}] {result.message}")
+    failed = False
+    for result in send_notify(entry, cfg):
+        if result.success:
+            print(f"[{result.method}] {result.message}")
+        else:
+            print(f"[{result.method}] Failed: {result.message}", file=sys.stderr)
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+def cmd_stats(args: argparse.Namespace) -> None:
+    if args.stats_action == "trace":
+        _stats_trace(args)
+    elif args.stats_action == "notify":
+        _stats_notify(args)
+    else:
+        _stats_sessions(args)
+
+
+def _stats_sessions(args: argparse.Namespace) -> None:
+    from collector import rollup
+
+    try:
+        since = rollup.parse_since(args.since) if args.since else None
+        until = rollup.parse_since(args.until) if args.until else None
+    except ValueError:
+        print("Expected YYYY-MM-DD, today, week, month or Nd", file=sys.stderr)
+        sys.exit(1)
+    cwd = os.path.abspath(os.path.expanduser(args.dir)) if args.dir else None
+    counts = rollup.query(storage.Storage(), since, until, cwd, args.source)
+    if args.json:
+        import json
+
+        print(json.dumps(counts.to_dict(), indent=2))
+        return
+
+    scope = [f"since {since}" if since else "", f"until {until}" if until else ""]
+    scope += [f"in {cwd}" if cwd else "", f"from {args.source}" if args.source else ""]
+    scope_text = ", ".join(filter(None, scope))
+    print(f"Sessions: {counts.total}" + (f" ({scope_text})" if scope_text else ""))
+    if not counts.total:
+        return
+    print("\nBy day:")
+    for day, n in list(counts.by_day.items())[-args.days:]:
+        print(f"  {day}  {n:>6}")
+    print("\nBy source:")
+    for src, n in sorted(counts.by_source.items(), key=lambda kv: -kv[1]):
+        print(f"  {src or '-':<12} {n:>6}")
+    print("\nBy directory:")
+    for directory, n in sorted(counts.by_cwd.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {n:>6}  {directory or '-'}")
+
+
+def _stats_trace(args: argparse.Namespace) -> None:
+    from collector.trace import report
+
+    store = storage.Storage()
+    entries = [e for e in store.read_all() if e.trace is not None][-args.n:]
+    segments = report(entries, store.base_dir)
+    if args.json:
+        import json
+
+        print(json.dumps(segments, indent=2))
+        return
+    if not segments:
+        print("No traced sessions yet.")
+        return
+    print(f"Capture-to-delivery breakdown over the last {len(entries)} traced sessions:")
+    print(f"  {'segment':<34}{'count':>7}{'p50':>10}{'p95':>10}{'max':>10}")
+    for name, seg in segments.items():
+        # Network time is part of the delivery segment above it
+        label = f"  {name}" if name.startswith("network") else name
+        cells = "".join(f"{_format_seconds(seg[k]):>10}" for k in ("p50", "p95", "max"))
+        print(f"  {label:<34}{seg['count']:>7}{cells}")
+
+
+def _stats_notify(args: argparse.Namespace) -> None:
+    from collector.latency import PERCENTILES, LatencyStats, default_state_file
+
+    stats = LatencyStats(default_state_file(storage.Storage().base_dir))
+    if args.reset:
+        stats.reset()
+        print("Notification latency statistics cleared.")
+        return
+    summary = stats.summary()
+    if args.json:
+        import json
+
+        print(json.dumps(summary, indent=2))
+        return
+    if not summary:
+        print("No notifications sent yet.")
+        return
+    for backend, data in summary.items():
+        print(f"{backend}: {data['sent']} delivered, {data['failed']} failed")
+        if not data["phases"]:
+            continue
+        header = "".join(f"{f'p{q}':>10}" for q in PERCENTILES)
+        print(f"  {'phase':<10}{'count':>7}{header}{'mean':>10}")
+        for phase, p in data["phases"].items():
+            cells = "".join(f"{_format_seconds(p[f'p{q}']):>10}" for q in PERCENTILES)
+            print(f"  {phase:<10}{p['count']:>7}{cells}{_format_seconds(p['mean']):>10}")
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    ms = seconds * 1000
+    if ms < 1:
+        return f"{ms:.2f}ms"
+    return f"{ms:.1f}ms" if ms < 10 else f"{ms:.0f}ms"
+
+
+def cmd_metrics(args: argparse.Namespace) -> None:
+    from collector import config, metrics
+
+    current = metrics.refresh(storage.Storage(), config.load_config())
+    if args.json:
+        import json
+
+        print(json.dumps(current, indent=2))
     else:
-        print(f"[{result.method}] Failed: {result.message}", file=sys.stderr)
+        print(metrics.render(current), end="")
+
+
+def cmd_serve(args: argparse.Namespace) -> None:
+    from collector import config
+    from collector.server import PATH, IngestServer
+
+    cfg = config.load_config().get("serve", {})
+    host = args.host or cfg.get("host", "127.0.0.1")
+    port = args.port if args.port is not None else int(cfg.get("port", 8765))
+    token = cfg.get("token", "")
+    try:
+        server = IngestServer(storage.Storage(), host, port, token, verbose=args.verbose)
+    except OSError as e:
+        print(f"Cannot listen on {host}:{port}: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Accepting sessions at {server.url}{PATH} (Ctrl+C to stop)", flush=True)
+    if not token and host not in ("127.0.0.1", "localhost", "::1"):
+        print("Warning: serve.token is not set; anyone who can connect can add sessions.",
+              file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.server_close()
+
+
+def cmd_sync(args: argparse.Namespace) -> None:
+    from collector import sync
+
+    store = storage.Storage()
+    source = Path(os.path.expanduser(args.source))
+
+    def report(result: sync.SyncResult) -> None:
+        if result.rescanned:
+            print(f"{source} was truncated or rewritten; rescanned it.")
+        if result.copied or not args.follow:
+            print(f"Copied {result.copied} new entries from {source}.", flush=True)
+        if result.skipped:
+            print(f"Skipped {result.skipped} malformed lines.", file=sys.stderr)
+
+    if args.follow:
+        print(f"Following {source} every {args.interval:g}s (Ctrl+C to stop)", flush=True)
+        try:
+            sync.follow(store, source, args.interval, args.host, on_step=report)
+        except KeyboardInterrupt:
+            print("\nStopped.")
+        return
+    try:
+        result = sync.sync_once(store, source, args.host)
+    except OSError as e:
+        print(f"Cannot read {source}: {e}", file=sys.stderr)
         sys.exit(1)
+    report(result)
 
 
 def cmd_config(args: argparse.Namespace) -> None:
+    from collector import config
+
     if args.config_action == "show":
         cfg = config.load_config()
         for section_key in sorted(cfg.keys()):
@@ -177,8 +573,27 @@ def cmd_config(args: argparse.Namespace) -> None:
                 print(f"  {k} = {display}")
             print()
     elif args.config_action == "set":
-        config.set_value(args.key, args.value)
+        try:
+            config.set_value(args.key, args.value)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
         print(f"Set {args.key} = {args.value}")
+    elif args.config_action == "set-many":
+        values = {}
+        for pair in args.pairs:
+            key, sep, value = pair.partition("=")
+            if not sep:
+                print(f"Expected KEY=VALUE, got: {pair}", file=sys.stderr)
+                sys.exit(1)
+            values[key] = value
+        try:
+            config.update(values)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            sys.exit(1)
+        for key, value in values.items():
+            print(f"Set {key} = {value}")
     elif args.config_action == "get":
         cfg = config.load_config()
         val = config.get_value(cfg, args.key)
@@ -194,7 +609,7 @@ def cmd_config(args: argparse.Namespace) -> None:
 def _mask_sensitive(key: str, value: object) -> str:
     """Mask sensitive config values like tokens."""
     s = str(value)
-    if key in ("bot_token",) and len(s) > 8:
+    if key in ("bot_token", "token") and len(s) > 8:
         return s[:4] + "***" + s[-4:]
     return s
 
@@ -221,6 +636,14 @@ def main() -> None:
         prog="claude-remote-collector",
         description="Collect and manage Claude Code remote session links.",
     )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Run the command under cProfile and write a .pstats file",
+    )
+    parser.add_argument(
+        "--profile-output", metavar="FILE", type=Path,
+        help="Where --profile writes (default: profiles/ in the storage directory)",
+    )
     sub = parser.add_subparsers(dest="command")
 
     # install
@@ -243,6 +666,21 @@ def main() -> None:
     p_list.add_argument("-n", type=int, default=0, help="Show last N entries")
     p_list.add_argument("--json", action="store_true", help="Output as JSONL")
 
+    # find
+    p_find = sub.add_parser(
+        "find", help="Find sessions by session ID prefix or directory substring"
+    )
+    p_find.add_argument("query", help="Start of a session ID (or its URL), or part of a path")
+    p_find.add_argument(
+        "--field", choices=["all", "id", "cwd"], default="all",
+        help="Match only the session ID or only the directory (default: either)",
+    )
+    p_find.add_argument(
+        "-n", type=int, default=20, help="Show the last N matches (default: 20, 0 for all)"
+    )
+    p_find.add_argument("--json", action="store_true", help="Output as JSONL")
+    p_find.add_argument("--url-only", action="store_true", help="Print only the URLs")
+
     # latest
     p_latest = sub.add_parser("latest", help="Show the most recent session link")
     p_latest.add_argument(
@@ -255,7 +693,14 @@ def main() -> None:
     # clean
     p_clean = sub.add_parser("clean", help="Remove old entries")
     p_clean.add_argument(
-        "--keep", type=int, default=10, help="Number of recent entries to keep"
+        "--keep", type=int, default=None,
+        help="Number of recent entries to keep (default: 10 without other limits)",
+    )
+    p_clean.add_argument(
+        "--older-than", metavar="AGE", help="Remove entries older than e.g. 30d, 12h, 2w"
+    )
+    p_clean.add_argument(
+        "--max-bytes", metavar="SIZE", help="Keep sessions.jsonl under e.g. 500K, 50M"
     )
 
     # record (called by shell wrappers)
@@ -263,6 +708,42 @@ def main() -> None:
     p_record.add_argument("--url", required=True, help="Session URL to record")
     p_record.add_argument("--source", default="wrapper", help="Source label (startup/exit/wrapper)")
     p_record.add_argument("--notify", action="store_true", help="Send notification after recording")
+    p_record.add_argument(
+        "--detach", action="store_true",
+        help="Deliver the notification from a background worker and return immediately",
+    )
+    p_record.add_argument(
+        "--trace", action="append", default=[], metavar="STAGE=EPOCH",
+        help="Wall-clock time of an earlier capture stage (first_byte, url_detected)",
+    )
+
+    # notify-worker (spawned by record --detach)
+    p_worker = sub.add_parser(
+        "notify-worker", help="Flush the outbox in the background (used by record --detach)"
+    )
+    p_worker.add_argument(
+        "--linger", type=float, default=None,
+        help="Keep retrying pending deliveries for up to N seconds (default: notify.outbox_linger)",
+    )
+
+    # merge-spool (spawned by record with storage.spool)
+    p_merge = sub.add_parser(
+        "merge-spool", help="Move spooled entries into the store (used by record in spool mode)"
+    )
+    p_merge.add_argument(
+        "--delay", type=float, default=0.0, metavar="SECONDS",
+        help="Wait first, unless another delayed merge is already waiting",
+    )
+
+    # outbox
+    p_outbox = sub.add_parser("outbox", help="Inspect or flush pending notifications")
+    outbox_sub = p_outbox.add_subparsers(dest="outbox_action")
+    outbox_sub.add_parser("list", help="List pending notifications (default)")
+    p_outbox_flush = outbox_sub.add_parser("flush", help="Deliver pending notifications now")
+    p_outbox_flush.add_argument(
+        "--force", action="store_true", help="Ignore the retry backoff schedule"
+    )
+    outbox_sub.add_parser("clear", help="Drop all pending notifications")
 
     # setup (interactive wizard)
     p_setup = sub.add_parser("setup", help="Interactive notification setup wizard")
@@ -275,6 +756,68 @@ def main() -> None:
     p_notify = sub.add_parser("notify", help="Send latest session link via configured backend")
     p_notify.add_argument("--url", default=None, help="Specific URL to notify (default: latest)")
 
+    # stats
+    sessions_opts = argparse.ArgumentParser(add_help=False)
+    sessions_opts.add_argument(
+        "--since", help="First day: YYYY-MM-DD, today, week, month or Nd (N days ago)"
+    )
+    sessions_opts.add_argument("--until", help="Last day, same formats as --since")
+    sessions_opts.add_argument("--dir", help="Only sessions in this directory or below it")
+    sessions_opts.add_argument("--source", help="Only sessions from this source")
+    sessions_opts.add_argument(
+        "--days", type=int, default=14, help="Days listed in the breakdown (default: 14)"
+    )
+    sessions_opts.add_argument(
+        "--top", type=int, default=10, help="Directories listed (default: 10)"
+    )
+    sessions_opts.add_argument("--json", action="store_true", help="Output as JSON")
+    p_stats = sub.add_parser(
+        "stats", help="Show statistics", parents=[sessions_opts],
+        description="Session counts per day, directory and source (default), "
+        "notification latency or capture-to-delivery traces.",
+    )
+    stats_sub = p_stats.add_subparsers(dest="stats_action")
+    stats_sub.add_parser(
+        "sessions", parents=[sessions_opts],
+        help="Session counts per day, directory and source (default)",
+    )
+    p_stats_notify = stats_sub.add_parser(
+        "notify", help="Delivery latency percentiles per notification backend"
+    )
+    p_stats_notify.add_argument("--json", action="store_true", help="Output as JSON")
+    p_stats_notify.add_argument("--reset", action="store_true", help="Clear the collected statistics")
+    p_stats_trace = stats_sub.add_parser(
+        "trace", help="Where the time goes between URL capture and delivery"
+    )
+    p_stats_trace.add_argument("-n", type=int, default=50, help="Last N traced sessions (default: 50)")
+    p_stats_trace.add_argument("--json", action="store_true", help="Output as JSON")
+    p_stats.set_defaults(json=False, reset=False)
+
+    # metrics
+    p_metrics = sub.add_parser(
+        "metrics", help="Print counters and gauges (Prometheus text, or --json)"
+    )
+    p_metrics.add_argument("--json", action="store_true", help="Output as JSON")
+
+    # serve
+    p_serve = sub.add_parser(
+        "serve", help="Accept sessions from collectors on other machines over HTTP"
+    )
+    p_serve.add_argument("--host", help="Address to listen on (default: serve.host, 127.0.0.1)")
+    p_serve.add_argument("--port", type=int, help="Port to listen on (default: serve.port, 8765)")
+    p_serve.add_argument("--verbose", action="store_true", help="Log every request to stderr")
+
+    # sync
+    p_sync = sub.add_parser(
+        "sync", help="Copy new entries from another store (e.g. mounted over NFS or sshfs)"
+    )
+    p_sync.add_argument("source", help="The other sessions.jsonl, or the directory holding it")
+    p_sync.add_argument("--follow", action="store_true", help="Keep copying as entries arrive")
+    p_sync.add_argument(
+        "--interval", type=float, default=5.0, help="Seconds between checks with --follow"
+    )
+    p_sync.add_argument("--host", default="", help="Tag copied entries with this machine name")
+
     # config
     p_config = sub.add_parser("config", help="Manage notification settings")
     config_sub = p_config.add_subparsers(dest="config_action")
@@ -289,6 +832,13 @@ def main() -> None:
     p_config_set.add_argument("key", help="Config key (e.g. notify.telegram.bot_token)")
     p_config_set.add_argument("value", help="Value to set")
 
+    p_config_set_many = config_sub.add_parser(
+        "set-many", help="Set several values in one atomic write"
+    )
+    p_config_set_many.add_argument(
+        "pairs", nargs="+", metavar="KEY=VALUE", help="e.g. notify.enabled=true"
+    )
+
     # path
     p_path = sub.add_parser("path", help="Print the storage file path")
     p_path.add_argument("--jsonl", action="store_true", help="Print JSONL file path")
@@ -300,21 +850,51 @@ def main() -> None:
         "uninstall": cmd_uninstall,
         "status": cmd_status,
         "list": cmd_list,
+        "find": cmd_find,
         "latest": cmd_latest,
         "tail": cmd_tail,
         "clean": cmd_clean,
         "record": cmd_record,
+        "notify-worker": cmd_notify_worker,
+        "merge-spool": cmd_merge_spool,
+        "outbox": cmd_outbox,
         "setup": cmd_setup,
         "notify": cmd_notify,
+        "stats": cmd_stats,
+        "metrics": cmd_metrics,
+        "serve": cmd_serve,
+        "sync": cmd_sync,
         "config": cmd_config,
         "path": cmd_path,
     }
 
-    if args.command in commands:
-        commands[args.command](args)
-    else:
+    if args.command not in commands:
         parser.print_help()
         sys.exit(1)
+    try:
+        if args.profile or args.profile_output:
+            _run_profiled(commands[args.command], args)
+        else:
+            commands[args.command](args)
+    finally:
+        # Since interpreter start: CPU time up to the imports, then wall time
+        timing.report(args.command, _IMPORT_CPU + time.perf_counter() - _LOADED)
+
+
+def _run_profiled(command, args: argparse.Namespace) -> None:
+    import cProfile
+
+    path = args.profile_output
+    if path is None:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = storage.DEFAULT_DIR / "profiles" / f"{args.command}-{stamp}-{os.getpid()}.pstats"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler = cProfile.Profile()
+    try:
+        profiler.runcall(command, args)
+    finally:
+        profiler.dump_stats(path)
+        print(f"Profile written to {path} (view with: python -m pstats {path})", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
-import tomllib
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 from collector.storage import DEFAULT_DIR
@@ -14,34 +16,162 @@ DEFAULT_CONFIG: dict = {
         "enabled": False,
         "backend": "telegram",
         "auto_notify": False,
+        "detach": False,
+        "outbox_linger": 900,
+        "max_workers": 4,
+        "coalesce_ms": 0,
+        "breaker_threshold": 5,
+        "breaker_cooldown": 60,
     },
     "notify.telegram": {
         "bot_token": "",
         "chat_id": "",
         "message_template": "🔗 New Claude session:\n{url}",
+        "timeout": 10,
+        "rate_per_second": 1.0,
+        "burst": 1,
+        "max_wait": 30,
     },
     "notify.webhook": {
         "url": "",
         "method": "POST",
+        "timeout": 10,
     },
     "notify.ntfy": {
         "topic": "",
         "server": "https://ntfy.sh",
         "priority": "default",
+        "timeout": 10,
+    },
+    "notify.collector": {
+        "url": "",
+        "token": "",
+        "timeout": 10,
+    },
+    "serve": {
+        "host": "127.0.0.1",
+        "port": 8765,
+        "token": "",
+    },
+    "metrics": {
+        "textfile": "",
+    },
+    "retention": {
+        "auto": False,
+        "keep": 0,
+        "older_than": "",
+        "max_bytes": 0,
+        "every": 100,
+        "interval": 60,
+    },
+    "storage": {
+        # Append to a local spool, merged into the store in the background
+        # (for a store on NFS). The notification outbox stays in the store
+        # directory, so notifying still writes there.
+        "spool": False,
+        "spool_interval": 30,
     },
 }
 
 
+CACHE_NAME = ".config.cache"
+LOCK_NAME = ".config.lock"
+
+# Bump when the snapshot layout changes
+_SNAPSHOT_VERSION = 1
+
+# (stat key, merged config) of the last load in this process
+_memo: tuple[tuple, dict] | None = None
+_defaults_repr: str | None = None
+
+
 def load_config() -> dict:
-    """Load config from TOML file, merged with defaults."""
+    """Load config from TOML file, merged with defaults.
+
+    The merged result is cached twice: in-process, and as a ``marshal``
+    snapshot next to the config file for the next process. Both are keyed
+    on the file's mtime, size and inode (and the defaults), so the usual
+    call costs one ``stat`` and never imports ``tomllib``; a long-running
+    process can call this on every event and still pick up edits.
+    """
+    global _memo
+    key = _stat_key(CONFIG_FILE)
+    if _memo is not None and _memo[0] == key:
+        return _copy(_memo[1])
+
+    config = _load_snapshot(key) if key[1] is not None else None
+    if config is None:
+        config = _parse()
+        if key[1] is not None:
+            _save_snapshot(key, config)
+    _memo = (key, config)
+    return _copy(config)
+
+
+def _parse() -> dict:
     config = _deep_copy_defaults()
     if CONFIG_FILE.exists():
+        # Deferred: tomllib is only needed once a config file exists.
+        import tomllib
+
         with open(CONFIG_FILE, "rb") as f:
             user = tomllib.load(f)
         _merge(config, _flatten(user))
     return config
 
 
+def _stat_key(path: Path) -> tuple:
+    try:
+        st = path.stat()
+    except OSError:
+        return (str(path), None)
+    return (str(path), st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _snapshot_file() -> Path:
+    return CONFIG_FILE.with_name(CACHE_NAME)
+
+
+def _snapshot_tag(key: tuple) -> tuple:
+    global _defaults_repr
+    if _defaults_repr is None:
+        _defaults_repr = repr(DEFAULT_CONFIG)
+    return (_SNAPSHOT_VERSION, key, _defaults_repr)
+
+
+def _load_snapshot(key: tuple) -> dict | None:
+    import marshal
+
+    try:
+        tag, config = marshal.loads(_snapshot_file().read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return config if tag == _snapshot_tag(key) else None
+
+
+def _save_snapshot(key: tuple, config: dict) -> None:
+    import marshal
+
+    path = _snapshot_file()
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(marshal.dumps((_snapshot_tag(key), config)))
+        os.replace(tmp, path)
+    except ValueError:
+        # Values marshal can't represent (TOML dates): just don't cache
+        return
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def _copy(config: dict) -> dict:
+    """Copy deep enough that callers can modify sections and lists freely."""
+    return {
+        section: {k: list(v) if isinstance(v, list) else v for k, v in values.items()}
+        for section, values in config.items()
+    }
+
+
 def _deep_copy_defaults() -> dict:
     return {k: dict(v) for k, v in DEFAULT_CONFIG.items()}
 
@@ -84,29 +214,63 @@ def get_value(config: dict, dotted_key: str) -> str | None:
     return None
 
 
+def parse_value(value: str) -> str | bool | int:
+    """Parse a command-line value: booleans and integers, else the string."""
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    if value.isdigit():
+        return int(value)
+    return value
+
+
 def set_value(dotted_key: str, value: str) -> None:
     """Set a config value and write back to TOML file."""
-    config = load_config()
+    update({dotted_key: value})
 
-    # Parse boolean/numeric values
-    parsed: str | bool | int = value
-    if value.lower() in ("true", "false"):
-        parsed = value.lower() == "true"
-    elif value.isdigit():
-        parsed = int(value)
 
-    parts = dotted_key.rsplit(".", 1)
-    if len(parts) == 2:
-        section, key = parts
-        if section not in config:
-            config[section] = {}
-        config[section][key] = parsed
+def update(values: dict[str, object]) -> None:
+    """Apply several dotted-key changes as one transaction.
+
+    String values are parsed like ``config set`` arguments. The file is
+    re-read under an exclusive lock, so concurrent updates never lose each
+    other's keys, and replaced in a single rename: readers see either the
+    old file or the new one, never a partial write.
+    """
+    changes = []
+    for dotted_key, value in values.items():
+        section, _, key = dotted_key.rpartition(".")
+        if not section or not key:
+            raise ValueError(f"Invalid config key: {dotted_key} (expected section.key)")
+        changes.append((section, key, parse_value(value) if isinstance(value, str) else value))
 
-    _write_config(config)
+    with _locked():
+        config = _parse()
+        for section, key, value in changes:
+            config.setdefault(section, {})[key] = value
+        _write_config(config)
+
+
+@contextmanager
+def _locked() -> Iterator[None]:
+    """Hold the config write lock (a sidecar, since the file itself is replaced)."""
+    import fcntl
+
+    CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(CONFIG_FILE.with_name(LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
 
 
 def _write_config(config: dict) -> None:
-    """Write config dict as TOML to config file."""
+    """Write config dict as TOML to config file (temp file + atomic rename)."""
+    import tempfile
+
+    global _memo
+    # mtimes only move with the clock tick; don't trust them across our own write
+    _memo = None
     CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
     lines: list[str] = []
 
@@ -121,15 +285,27 @@ def _write_config(config: dict) -> None:
             lines.append(f"{k} = {_toml_value(v)}")
         lines.append("")
 
-    CONFIG_FILE.write_text("\n".join(lines))
+    # mkstemp creates the file 0600, which suits the tokens it holds
+    fd, tmp = tempfile.mkstemp(prefix=f".{CONFIG_FILE.name}.", dir=CONFIG_FILE.parent)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write("\n".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, CONFIG_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
 
 
 def _toml_value(v: object) -> str:
     """Format a Python value as a TOML literal."""
     if isinstance(v, bool):
         return "true" if v else "false"
-    if isinstance(v, int):
+    if isinstance(v, (int, float)):
         return str(v)
+    if isinstance(v, list):
+        return "[" + ", ".join(_toml_value(x) for x in v) + "]"
     if isinstance(v, str):
         if "\n" in v:
             # Use TOML multiline basic string for values with newlines
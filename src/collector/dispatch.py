@@ -0,0 +1,104 @@
+"""Detached notification delivery so `record` never waits on the network."""
+
+from __future__ import annotations
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from collector.outbox import FlushReport, Outbox
+from collector.storage import SessionEntry
+
+LOG_NAME = "notify.log"
+
+# Longest a lingering flusher sleeps before re-reading the outbox.
+LINGER_POLL = 30.0
+
+
+def spawn_worker(*command: str) -> None:
+    """Start a detached `notify-worker` process that flushes the outbox.
+
+    Or another ``command`` that shouldn't hold up ``record``, e.g.
+    ``spawn_worker("merge-spool", "--delay", "30")``.
+
+    The worker runs in its own session with stdio detached, so it survives
+    the calling shell and never writes to the user's terminal.
+    """
+    subprocess.Popen(
+        [sys.executable, "-m", "collector.cli", *(command or ("notify-worker",))],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True,
+    )
+
+
+def run_worker(config: dict, base_dir: Path, linger: float = 0.0) -> FlushReport:
+    """Flush the outbox in the foreground, logging failures.
+
+    Backends with a coalescing window are only flushed once the window has
+    passed, so every entry recorded in the meantime (by other `record`
+    processes) goes out in the same digest; backends without one are
+    flushed first. If deliveries are still pending afterwards, one worker
+    (elected via the outbox linger lock) keeps retrying them on their
+    backoff schedule for up to ``linger`` seconds. Failures are appended to
+    ``notify.log`` in ``base_dir`` since a detached worker has no stderr to
+    report to.
+    """
+    from collector.notifier import backend_names, coalesce_window
+
+    outbox = Outbox(base_dir)
+    windows = {name: coalesce_window(name, config) for name in backend_names(config)}
+    window = max(windows.values(), default=0.0)
+    if window > 0:
+        immediate = [name for name, w in windows.items() if w == 0]
+        if immediate:
+            _flush_and_log(outbox, config, base_dir, backends=immediate)
+        time.sleep(window)
+    report = _flush_and_log(outbox, config, base_dir)
+    if linger <= 0 or not len(outbox):
+        return report
+
+    with outbox.linger_lock() as elected:
+        if not elected:
+            return report
+        deadline = time.time() + linger
+        while len(outbox):
+            now = time.time()
+            due = outbox.next_due() or now
+            if now >= deadline or due >= deadline:
+                break
+            time.sleep(min(max(due - now, 0.0), LINGER_POLL))
+            report = _flush_and_log(outbox, config, base_dir)
+    return report
+
+
+def _flush_and_log(
+    outbox: Outbox, config: dict, base_dir: Path, backends: list[str] | None = None
+) -> FlushReport:
+    try:
+        report = outbox.flush(config, backends=backends)
+    except Exception as e:
+        # A detached worker has nobody to report to; make sure it leaves a trace
+        log_failure(base_dir, "worker", f"{type(e).__name__}: {e}")
+        return FlushReport(pending=len(outbox))
+    for item, result in report.failures:
+        log_failure(
+            base_dir, result.method,
+            f"{result.message} (attempt {item.attempts}, queued for retry)",
+            item.entry,
+        )
+    return report
+
+
+def log_failure(
+    log_dir: Path, method: str, message: str, entry: SessionEntry | None = None
+) -> None:
+    """Append a single failure line to the notification log."""
+    log_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    subject = f" {entry.session_id}" if entry else ""
+    with open(log_dir / LOG_NAME, "a") as f:
+        f.write(f"{stamp} [{method}]{subject}: {message}\n")
@@ -0,0 +1,351 @@
+"""Keep-alive HTTP(S) connection pool shared by notifier backends.
+
+``urlopen`` is a drop-in for the subset of ``urllib.request.urlopen`` the
+notifiers and setup wizards use: it accepts a URL or a
+``urllib.request.Request``, returns a response usable as a context manager
+and raises ``urllib.error.HTTPError`` for 4xx/5xx statuses. Unlike urllib,
+connections are kept open per (scheme, host, port) and reused, so
+back-to-back sends skip the TCP and TLS handshakes. Responses carry the
+time spent in each phase of the request (``PooledResponse.timings``).
+
+Like urllib, ``HTTP_PROXY``/``HTTPS_PROXY``/``NO_PROXY`` are honoured
+(plain HTTP through the proxy, HTTPS through a ``CONNECT`` tunnel) and
+redirects are followed, up to ``MAX_REDIRECTS``.
+"""
+
+from __future__ import annotations
+
+import base64
+import http.client
+import io
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import unquote, urljoin, urlsplit
+
+USER_AGENT = "claude-remote-collector"
+
+# Idle connections older than this are assumed to have been closed by the
+# server and are dropped instead of reused.
+MAX_IDLE_SECONDS = 60.0
+
+# Errors that mean a reused keep-alive socket went stale under us.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+# As in urllib's HTTPRedirectHandler
+MAX_REDIRECTS = 10
+REDIRECTS = (301, 302, 303, 307, 308)
+
+# (scheme, host, port, proxy URL or "")
+_Key = tuple[str, str, int, str]
+
+
+class PooledResponse:
+    """A fully read response, shaped like the object urllib returns.
+
+    ``timings`` maps request phases to seconds: ``dns``, ``connect`` and
+    ``tls`` when a new connection had to be opened, and ``response`` (from
+    sending the request to having read the whole body).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        reason: str,
+        headers: http.client.HTTPMessage,
+        body: bytes,
+        timings: dict[str, float] | None = None,
+    ):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._body = body
+        self.timings = timings or {}
+
+    def read(self) -> bytes:
+        return self._body
+
+    def getcode(self) -> int:
+        return self.status
+
+    def __enter__(self) -> PooledResponse:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+
+class TimedHTTPConnection(http.client.HTTPConnection):
+    """``HTTPConnection`` whose ``connect`` times DNS and TCP separately."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        super().__init__(host, port, timeout=timeout)
+        self.timings: dict[str, float] = {}
+
+    def connect(self) -> None:
+        start = time.perf_counter()
+        infos = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        self.sock = _connect_any(infos, self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self._tunnel_host:
+            # Through a proxy: CONNECT counts as part of connecting
+            self._tunnel()
+        self.timings = {"dns": resolved - start, "connect": time.perf_counter() - resolved}
+
+
+class TimedHTTPSConnection(TimedHTTPConnection):
+    """TLS flavour of ``TimedHTTPConnection``; the handshake is timed too."""
+
+    default_port = http.client.HTTPS_PORT
+
+    def __init__(self, host: str, port: int, timeout: float, context: object):
+        super().__init__(host, port, timeout=timeout)
+        self._context = context
+
+    def connect(self) -> None:
+        super().connect()
+        start = time.perf_counter()
+        server_hostname = self._tunnel_host or self.host
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname)  # type: ignore[attr-defined]
+        self.timings["tls"] = time.perf_counter() - start
+
+
+def _connect_any(infos: list, timeout: float) -> socket.socket:
+    """Connect to the first reachable address from ``getaddrinfo``."""
+    error: OSError | None = None
+    for family, type_, proto, _, addr in infos:
+        sock = socket.socket(family, type_, proto)
+        try:
+            sock.settimeout(timeout)
+            sock.connect(addr)
+            return sock
+        except OSError as e:
+            sock.close()
+            error = e
+    raise error or OSError("getaddrinfo returned no addresses")
+
+
+class HTTPPool:
+    """Per-host pool of idle keep-alive ``http.client`` connections."""
+
+    def __init__(self, max_idle_per_host: int = 4, context: object | None = None):
+        self.max_idle_per_host = max_idle_per_host
+        self.context = context
+        self._idle: dict[_Key, list[tuple[http.client.HTTPConnection, float]]] = {}
+        self._lock = threading.Lock()
+
+    def urlopen(self, req: urllib.request.Request | str, timeout: float = 10) -> PooledResponse:
+        if isinstance(req, str):
+            req = urllib.request.Request(req)
+        url = req.full_url
+        method = req.get_method()
+        data = req.data
+        headers = {"User-Agent": USER_AGENT}
+        headers.update(req.header_items())
+        timings: dict[str, float] = {}
+        for _ in range(MAX_REDIRECTS + 1):
+            resp, body = self._open(url, method, data, headers, timeout, timings)
+            location = resp.headers.get("Location")
+            if resp.status not in REDIRECTS or not location:
+                break
+            url = urljoin(url, location)
+            if resp.status in (301, 302, 303) and method not in ("GET", "HEAD"):
+                # What browsers (and urllib) do: the body doesn't follow
+                method, data = "GET", None
+                headers = {
+                    k: v for k, v in headers.items()
+                    if k.lower() not in ("content-length", "content-type")
+                }
+        else:
+            raise urllib.error.HTTPError(
+                url, resp.status, "Too many redirects", resp.headers, io.BytesIO(body)
+            )
+
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(
+                url, resp.status, resp.reason, resp.headers, io.BytesIO(body)
+            )
+        return PooledResponse(url, resp.status, resp.reason, resp.headers, body, timings)
+
+    def _open(
+        self,
+        url: str,
+        method: str,
+        data: bytes | None,
+        headers: dict[str, str],
+        timeout: float,
+        timings: dict[str, float],
+    ) -> tuple[http.client.HTTPResponse, bytes]:
+        """One request, without following redirects; ``timings`` are added to."""
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise urllib.error.URLError(f"unsupported URL scheme: {scheme!r}")
+        host = parts.hostname or ""
+        port = parts.port or (443 if scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        proxy = _proxy_for(scheme, host)
+        if proxy and scheme == "http":
+            # A plain HTTP proxy takes the absolute URL as the request target
+            path = f"http://{parts.netloc.rpartition('@')[2]}{path}"
+            headers = {**headers, **_proxy_auth(proxy)}
+        key = (scheme, host, port, proxy)
+
+        try:
+            resp, body, step = self._send(key, method, path, data, headers, timeout)
+        except http.client.HTTPException as e:
+            # Protocol errors are not OSErrors; surface them the way urllib would
+            raise urllib.error.URLError(e) from e
+        for phase, seconds in step.items():
+            timings[phase] = timings.get(phase, 0.0) + seconds
+        return resp, body
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+    def _send(
+        self,
+        key: _Key,
+        method: str,
+        path: str,
+        data: bytes | None,
+        headers: dict[str, str],
+        timeout: float,
+    ) -> tuple[http.client.HTTPResponse, bytes, dict[str, float]]:
+        conn, reused = self._acquire(key, timeout)
+        try:
+            resp, body, timings = self._roundtrip(conn, method, path, data, headers, timeout)
+        except _STALE_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+            # The server closed an idle keep-alive socket; retry once fresh
+            conn = self._connect(key, timeout)
+            try:
+                resp, body, timings = self._roundtrip(conn, method, path, data, headers, timeout)
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return resp, body, timings
+
+    def _roundtrip(
+        self,
+        conn: http.client.HTTPConnection,
+        method: str,
+        path: str,
+        data: bytes | None,
+        headers: dict[str, str],
+        timeout: float,
+    ) -> tuple[http.client.HTTPResponse, bytes, dict[str, float]]:
+        conn.timeout = timeout
+        if conn.sock is None:
+            # Connect explicitly so the handshake is not counted as response time
+            conn.connect()
+            timings = dict(getattr(conn, "timings", {}))
+        else:
+            conn.sock.settimeout(timeout)
+            timings = {}
+        start = time.perf_counter()
+        conn.request(method, path, body=data, headers=headers)
+        resp = conn.getresponse()
+        body = resp.read()
+        timings["response"] = time.perf_counter() - start
+        return resp, body, timings
+
+    def _acquire(self, key: _Key, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        with self._lock:
+            conns = self._idle.get(key, [])
+            while conns:
+                conn, since = conns.pop()
+                if now - since < MAX_IDLE_SECONDS and conn.sock is not None:
+                    return conn, True
+                conn.close()
+        return self._connect(key, timeout), False
+
+    def _connect(self, key: _Key, timeout: float) -> TimedHTTPConnection:
+        scheme, host, port, proxy = key
+        if proxy:
+            proxy_parts = urlsplit(proxy)
+            target = (proxy_parts.hostname or "", proxy_parts.port or 80)
+        else:
+            target = (host, port)
+        if scheme == "https":
+            if self.context is None:
+                import ssl
+
+                # Build the default context once instead of per connection
+                self.context = ssl.create_default_context()
+            conn = TimedHTTPSConnection(*target, timeout=timeout, context=self.context)
+            if proxy:
+                conn.set_tunnel(host, port, headers=_proxy_auth(proxy))
+            return conn
+        return TimedHTTPConnection(*target, timeout=timeout)
+
+    def _release(self, key: _Key, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) < self.max_idle_per_host:
+                conns.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+
+def uses_proxy(url: str) -> bool:
+    """Whether ``urlopen`` would send a request for ``url`` through a proxy."""
+    parts = urlsplit(url)
+    return bool(_proxy_for(parts.scheme.lower(), parts.hostname or ""))
+
+
+def _proxy_for(scheme: str, host: str) -> str:
+    """The proxy URL urllib would use for ``host``, or "" to connect directly."""
+    proxy = urllib.request.getproxies().get(scheme, "")
+    if not proxy or urllib.request.proxy_bypass(host):
+        return ""
+    return proxy if "://" in proxy else f"http://{proxy}"
+
+
+def _proxy_auth(proxy: str) -> dict[str, str]:
+    parts = urlsplit(proxy)
+    if parts.username is None:
+        return {}
+    credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+    return {"Proxy-Authorization": "Basic " + base64.b64encode(credentials.encode()).decode()}
+
+
+_default_pool = HTTPPool()
+
+
+def get_pool() -> HTTPPool:
+    """The process-wide pool shared by all notifiers."""
+    return _default_pool
+
+
+def urlopen(req: urllib.request.Request | str, timeout: float = 10) -> PooledResponse:
+    """Send a request through the shared pool (see module docstring)."""
+    return _default_pool.urlopen(req, timeout=timeout)
@@ -0,0 +1,344 @@
+"""Session lookup by ID prefix or directory substring, for ``find``.
+
+``sessions.idx`` in the storage directory indexes ``sessions.jsonl``: a
+JSON header line, then fixed-width records sorted by session ID (the ID,
+NUL padded to the header's ``width``; the byte offset of the entry's line;
+the number of its directory in the header's ``cwds``), then per directory
+the offsets of its entries in file order. An ID prefix is a binary search
+over the mapped records, a directory a substring match over the distinct
+directories, so a lookup reads only the matching lines of
+``sessions.jsonl``, however large it is.
+
+``record`` never touches the index. Entries appended since it was built
+are scanned from the end of ``sessions.jsonl`` on each lookup and merged
+in once they pass ``TAIL_LIMIT`` bytes; an index that no longer fits the
+file (``clean`` replaced it, an edit by hand) is rebuilt from scratch. The
+header keeps the offset and a hash of the last line it covers, so a file
+rewritten under the same inode is caught even where its offsets still
+happen to land on lines.
+"""
+
+from __future__ import annotations
+
+import bisect
+import fcntl
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collector.storage import SessionEntry, Storage
+
+INDEX_NAME = "sessions.idx"
+VERSION = 2
+
+# Unindexed bytes at the end of sessions.jsonl before a lookup merges them in
+TAIL_LIMIT = 256 * 1024
+
+
+@dataclass
+class _Line:
+    session_id: bytes
+    offset: int
+    cwd: str
+
+
+class _Index:
+    """A mapped ``sessions.idx``; a sequence of session IDs, for ``bisect``."""
+
+    def __init__(self, buf: mmap.mmap, header: dict, start: int):
+        self.buf = buf
+        self.header = header
+        self.width = header["width"]
+        self.count = header["count"]
+        self.cwds: list[str] = header["cwds"]
+        self.jsonl_bytes: int = header["jsonl_bytes"]
+        self.record = struct.Struct(f"<{self.width}sQI")
+        self.start = start
+        self.postings = start + self.count * self.record.size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> bytes:
+        offset = self.start + i * self.record.size
+        return self.buf[offset : offset + self.width].rstrip(b"\0")
+
+    def records(self) -> Iterator[tuple[bytes, int, int]]:
+        end = self.postings
+        for sid, offset, cwd in self.record.iter_unpack(self.buf[self.start : end]):
+            yield sid.rstrip(b"\0"), offset, cwd
+
+    def by_prefix(self, prefix: bytes) -> list[int]:
+        # IDs are ASCII, so every ID starting with the prefix sorts below prefix + 0xff
+        lo = bisect.bisect_left(self, prefix)
+        hi = bisect.bisect_left(self, prefix + b"\xff", lo)
+        size = self.record.size
+        data = self.buf[self.start + lo * size : self.start + hi * size]
+        return [offset for _, offset, _ in self.record.iter_unpack(data)]
+
+    def by_cwd(self, text: str) -> list[int]:
+        offsets: list[int] = []
+        for n, cwd in enumerate(self.cwds):
+            if text in cwd:
+                first, count = self.header["postings"][n]
+                start = self.postings + first * 8
+                offsets += _offsets(self.buf[start : start + count * 8])
+        return offsets
+
+    def close(self) -> None:
+        self.buf.close()
+
+
+def find(
+    store: Storage, query: str, field: str = "all", limit: int = 20
+) -> list[SessionEntry]:
+    """Entries whose session ID starts with ``query`` or whose directory contains it.
+
+    ``field`` narrows the match to ``"id"`` or ``"cwd"``. A pasted URL is
+    reduced to its session ID. The newest ``limit`` matches come back in
+    file order (all of them for 0).
+    """
+    query = query.strip()
+    if field != "cwd" and "session_" in query:
+        query = query.split("session_", 1)[1]
+    if not query:
+        return []
+    store.merge_spool()
+    for attempt in range(2):
+        index = _current(store, fresh=attempt > 0)
+        try:
+            entries = _lookup(store, index, query, field, limit)
+        finally:
+            if index is not None:
+                index.close()
+        if entries is not None:
+            return entries
+    return []
+
+
+def rebuild(store: Storage) -> None:
+    """Index all of ``sessions.jsonl`` from scratch."""
+    with store._locked(fcntl.LOCK_SH):
+        try:
+            with open(store.jsonl_file, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                content = f.read()
+        except FileNotFoundError:
+            inode, content = 0, b""
+    lines = sorted(_parse(content, 0), key=lambda line: line.session_id)
+    _write(store, inode, len(content), _fingerprint(content, len(content)), [], lines)
+
+
+def _current(store: Storage, fresh: bool = False) -> _Index | None:
+    """The index, rebuilt (always if ``fresh``) or merged first if needed.
+
+    None if there is nothing to index, or it can't be written.
+    """
+    index = None if fresh else _open(store)
+    if index is None:
+        rebuild(store)
+        index = _open(store)
+    elif _tail_size(store, index) > TAIL_LIMIT:
+        _merge(store, index)
+        index.close()
+        index = _open(store)
+    return index
+
+
+def _lookup(
+    store: Storage, index: _Index | None, query: str, field: str, limit: int
+) -> list[SessionEntry] | None:
+    """Matching entries, or None if ``sessions.jsonl`` no longer fits the index."""
+    from collector.storage import SessionEntry
+
+    covered = index.jsonl_bytes if index is not None else 0
+    prefix = query.encode()
+    offsets: set[int] = set()
+    if index is not None:
+        if field != "cwd":
+            offsets.update(index.by_prefix(prefix))
+        if field != "id":
+            offsets.update(index.by_cwd(query))
+    entries: dict[int, SessionEntry] = {}
+    try:
+        f = open(store.jsonl_file, "rb")
+    except FileNotFoundError:
+        return [] if index is None or not index.count else None
+    with f:
+        f.seek(covered)
+        for line in _parse(f.read(), covered):
+            if (field != "cwd" and line.session_id.startswith(prefix)) or (
+                field != "id" and query in line.cwd
+            ):
+                offsets.add(line.offset)
+        wanted = sorted(heapq.nlargest(limit, offsets) if limit > 0 else offsets)
+        for offset in wanted:
+            f.seek(offset)
+            try:
+                entry = SessionEntry.from_dict(json.loads(f.readline()))
+            except (ValueError, AttributeError):
+                return None
+            if not (
+                (field != "cwd" and entry.session_id.startswith(query))
+                or (field != "id" and query in entry.cwd)
+            ):
+                return None
+            entries[offset] = entry
+    return [entries[offset] for offset in wanted]
+
+
+def _open(store: Storage) -> _Index | None:
+    """Map the index if it still describes ``sessions.jsonl``."""
+    path = store.base_dir / INDEX_NAME
+    try:
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        header = json.loads(buf.readline())
+        index = _Index(buf, header, buf.tell())
+        stat = store.jsonl_file.stat()
+        fits = (
+            header["version"] == VERSION
+            and header["inode"] == stat.st_ino
+            and header["jsonl_bytes"] <= stat.st_size
+            and len(buf) == index.postings + 8 * index.count
+            and _still_there(store, header["last"])
+        )
+    except (OSError, ValueError, KeyError, TypeError, struct.error):
+        fits = False
+    if not fits:
+        buf.close()
+        return None
+    return index
+
+
+def _still_there(store: Storage, last: list | None) -> bool:
+    """Whether ``sessions.jsonl`` still holds the index's last line, as fingerprinted."""
+    if last is None:
+        return True
+    offset, length, digest = last
+    with open(store.jsonl_file, "rb") as f:
+        f.seek(offset)
+        return _digest(f.read(length)) == digest
+
+
+def _tail_size(store: Storage, index: _Index) -> int:
+    try:
+        return store.jsonl_file.stat().st_size - index.jsonl_bytes
+    except FileNotFoundError:
+        return 0
+
+
+def _merge(store: Storage, index: _Index) -> None:
+    """Fold the entries appended since ``index`` was built into it."""
+    with store._locked(fcntl.LOCK_SH):
+        with open(store.jsonl_file, "rb") as f:
+            inode = os.fstat(f.fileno()).st_ino
+            f.seek(index.jsonl_bytes)
+            tail = f.read()
+    lines = sorted(_parse(tail, index.jsonl_bytes), key=lambda line: line.session_id)
+    end = index.jsonl_bytes + len(tail)
+    last = _fingerprint(tail, end) or index.header["last"]
+    _write(store, inode, end, last, list(index.records()), lines, index.cwds)
+
+
+def _write(
+    store: Storage,
+    inode: int,
+    jsonl_bytes: int,
+    last: list | None,
+    records: list[tuple[bytes, int, int]],
+    lines: list[_Line],
+    cwds: list[str] | None = None,
+) -> None:
+    """Write an index of sorted ``records`` (already numbered against ``cwds``) plus ``lines``."""
+    cwds = list(cwds or [])
+    numbers = {cwd: n for n, cwd in enumerate(cwds)}
+    new = []
+    for line in lines:
+        n = numbers.get(line.cwd)
+        if n is None:
+            n = numbers[line.cwd] = len(cwds)
+            cwds.append(line.cwd)
+        new.append((line.session_id, line.offset, n))
+    merged = list(heapq.merge(records, new, key=lambda r: r[0]))
+    width = max((len(r[0]) for r in merged), default=1)
+    record = struct.Struct(f"<{width}sQI")
+    per_cwd: list[list[int]] = [[] for _ in cwds]
+    for _, offset, n in merged:
+        per_cwd[n].append(offset)
+    postings, first = [], 0
+    for offsets in per_cwd:
+        postings.append([first, len(offsets)])
+        first += len(offsets)
+    header = {
+        "version": VERSION,
+        "inode": inode,
+        "jsonl_bytes": jsonl_bytes,
+        "last": last,
+        "width": width,
+        "count": len(merged),
+        "cwds": cwds,
+        "postings": postings,
+    }
+    path = store.base_dir / INDEX_NAME
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(json.dumps(header, separators=(",", ":")).encode() + b"\n")
+            f.write(b"".join(record.pack(*r) for r in merged))
+            for offsets in per_cwd:
+                f.write(_packed(sorted(offsets)))
+        os.replace(tmp, path)
+    except OSError:
+        tmp.unlink(missing_ok=True)  # lookups still work, from the file itself
+
+
+def _fingerprint(data: bytes, end: int) -> list | None:
+    """Offset, length and hash of the last line of ``data``, which ends at ``end``."""
+    if not data:
+        return None
+    start = data.rfind(b"\n", 0, len(data) - 1) + 1
+    return [end - len(data) + start, len(data) - start, _digest(data[start:])]
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def _parse(content: bytes, base: int) -> Iterator[_Line]:
+    """Session ID, offset and directory of each entry in ``content`` (at ``base``)."""
+    offset = base
+    for raw in content.splitlines(keepends=True):
+        try:
+            d = json.loads(raw)
+            yield _Line(d["session_id"].encode(), offset, d.get("cwd", ""))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            pass
+        offset += len(raw)
+
+
+def _packed(offsets: list[int]) -> bytes:
+    data = array("Q", offsets)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _offsets(data: bytes) -> list[int]:
+    values = array("Q")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tolist()
@@ -0,0 +1,115 @@
+"""Persisted per-backend delivery latency histograms.
+
+Every send is counted as sent or failed per backend, and a delivery that
+went over the network adds its phase timings (see
+``NotifyResult.timings``) to a log-bucketed histogram per backend and
+phase, kept in ``latency.json`` in the storage directory. Buckets grow by
+a factor of 2**(1/4) (~19%), so percentiles read back from them are within
+that of the true value while the file stays a few KB no matter how many
+sends it has seen.
+"""
+
+from __future__ import annotations
+
+import math
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from collector.statefile import locked_json
+
+if TYPE_CHECKING:
+    from collector.notifier import NotifyResult
+
+STATE_NAME = "latency.json"
+
+PHASES = ("dns", "connect", "tls", "response", "total")
+PERCENTILES = (50, 95, 99)
+
+# Buckets per doubling of the latency
+BUCKETS_PER_OCTAVE = 4
+
+
+def default_state_file(base_dir: Path | None = None) -> Path:
+    """The state file in ``base_dir``, by default the per-user storage directory."""
+    from collector import storage
+
+    return (base_dir or storage.DEFAULT_DIR) / STATE_NAME
+
+
+def bucket_of(seconds: float) -> int:
+    """Index of the histogram bucket holding ``seconds``."""
+    ms = max(seconds * 1000, 0.001)
+    return math.ceil(math.log2(ms) * BUCKETS_PER_OCTAVE)
+
+
+def bucket_bound(index: int) -> float:
+    """Upper bound (seconds) of bucket ``index``."""
+    return 2 ** (index / BUCKETS_PER_OCTAVE) / 1000
+
+
+def percentile(histogram: dict[str, int], q: float) -> float:
+    """The ``q``-th percentile (0-100) of a histogram, in seconds."""
+    total = sum(histogram.values())
+    if not total:
+        return 0.0
+    rank = q / 100 * total
+    seen = 0
+    for index in sorted(histogram, key=int):
+        seen += histogram[index]
+        if seen >= rank:
+            return bucket_bound(int(index))
+    return bucket_bound(max(int(i) for i in histogram))
+
+
+class LatencyStats:
+    def __init__(self, state_file: Path):
+        self.state_file = state_file
+
+    def record(self, backend: str, result: NotifyResult) -> None:
+        """Count one send, and add its timings if it was delivered.
+
+        Every result counts as sent or failed, including those that never
+        reached the network (circuit open, unconfigured, refused).
+        Histograms only hold successful deliveries (a timeout would
+        otherwise show up as a 10 s "latency").
+        """
+        with locked_json(self.state_file) as state:
+            stats = state.setdefault(backend, {"sent": 0, "failed": 0, "sum": {}, "phases": {}})
+            if not result.success:
+                stats["failed"] += 1
+                return
+            stats["sent"] += 1
+            for phase, seconds in (result.timings or {}).items():
+                histogram = stats["phases"].setdefault(phase, {})
+                index = str(bucket_of(seconds))
+                histogram[index] = histogram.get(index, 0) + 1
+                stats["sum"][phase] = stats["sum"].get(phase, 0.0) + seconds
+
+    def summary(self) -> dict[str, dict]:
+        """Per backend: sent/failed counts and per-phase count, mean and percentiles."""
+        with locked_json(self.state_file) as state:
+            snapshot = {name: dict(stats) for name, stats in state.items()}
+        out: dict[str, dict] = {}
+        for backend, stats in sorted(snapshot.items()):
+            phases = {}
+            for phase in PHASES:
+                histogram = stats["phases"].get(phase)
+                if not histogram:
+                    continue
+                count = sum(histogram.values())
+                phases[phase] = {
+                    "count": count,
+                    "mean": stats["sum"].get(phase, 0.0) / count,
+                    **{f"p{q}": percentile(histogram, q) for q in PERCENTILES},
+                }
+            out[backend] = {"sent": stats["sent"], "failed": stats["failed"], "phases": phases}
+        return out
+
+    def reset(self) -> None:
+        with locked_json(self.state_file) as state:
+            state.clear()
+
+
+def record_latency(backend: str, result: NotifyResult, base_dir: Path | None = None) -> None:
+    """Record ``result`` in the latency histograms of the store at ``base_dir``."""
+    LatencyStats(default_state_file(base_dir)).record(backend, result)
@@ -0,0 +1,243 @@
+"""Counters and gauges for monitoring, as JSON or Prometheus text.
+
+``metrics.json`` in the storage directory holds what only the collector
+can count: sessions recorded per source, storage lock waits, and the
+capture latency of traced sessions (first terminal output, or URL
+detection, to the entry being stored) as a histogram. Notification
+counts come from the delivery histograms in ``latency.json``; the store
+size from the files themselves. The entry count is maintained
+incrementally. When the store grew by more than that (appends from another
+process interleaved) or changed behind our back (a ``clean``, an edit by
+hand), it is taken from the rollup; only ``refresh`` falls back to
+recounting ``sessions.jsonl``, never ``record``.
+
+With ``metrics.textfile`` set (for node_exporter's textfile collector,
+e.g. ``/var/lib/node_exporter/textfile_collector/claude_remote.prom``),
+the Prometheus text is rewritten atomically whenever a session is
+recorded, notifications are flushed or the store is cleaned.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from collector.statefile import locked_json
+
+if TYPE_CHECKING:
+    from collector.storage import SessionEntry, Storage
+
+STATE_NAME = "metrics.json"
+
+# Upper bounds (seconds) of the capture latency histogram buckets
+CAPTURE_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIX = "claude_remote"
+
+
+def observe_record(store: Storage, entry: SessionEntry, config: dict) -> None:
+    """Count a session ``store`` just appended and refresh the textfile."""
+    write_textfile(config, observe_records(store, [entry]), store.base_dir)
+
+
+def observe_records(store: Storage, entries: list[SessionEntry]) -> dict:
+    """Count sessions ``store`` just appended in one batch; return the new state.
+
+    The textfile is left for the caller: ``Storage.merge_spool`` has no config to find it.
+    """
+    with locked_json(store.base_dir / STATE_NAME) as state:
+        sessions = state.setdefault("sessions", {})
+        wait = state.setdefault("lock_wait", {"seconds": 0.0, "count": 0})
+        wait["seconds"] += store.last_lock_wait
+        wait["count"] += 1
+        line_bytes = 0
+        for entry in entries:
+            source = entry.source or "unknown"
+            sessions[source] = sessions.get(source, 0) + 1
+            latency = _capture_latency(entry)
+            if latency is not None:
+                histogram = state.setdefault(
+                    "capture_latency",
+                    {"buckets": [0] * len(CAPTURE_BUCKETS), "sum": 0.0, "count": 0},
+                )
+                for i, bound in enumerate(CAPTURE_BUCKETS):
+                    if latency <= bound:
+                        histogram["buckets"][i] += 1
+                        break
+                histogram["sum"] += latency
+                histogram["count"] += 1
+            line_bytes += len(json.dumps(entry.to_dict())) + 1
+        _update_store(state, store, appended=(len(entries), line_bytes), recount=False)
+        return json.loads(json.dumps(state))
+
+
+def refresh(store: Storage, config: dict) -> dict:
+    """Bring the store gauges up to date, rewrite the textfile; return the metrics."""
+    store.merge_spool()
+    with locked_json(store.base_dir / STATE_NAME) as state:
+        _update_store(state, store)
+        snapshot = json.loads(json.dumps(state))
+    write_textfile(config, snapshot, store.base_dir)
+    return collect(snapshot, store.base_dir)
+
+
+def collect(state: dict, base_dir: Path) -> dict:
+    """The full metrics: ``state`` plus the notification counts in ``base_dir``."""
+    from collector.latency import default_state_file
+
+    try:
+        latency = json.loads(default_state_file(base_dir).read_text())
+    except (OSError, ValueError):
+        latency = {}
+    return {
+        "sessions_recorded": state.get("sessions", {}),
+        "notifications": {
+            backend: {"sent": stats.get("sent", 0), "failed": stats.get("failed", 0)}
+            for backend, stats in sorted(latency.items())
+        },
+        "store": {k: v for k, v in state.get("store", {}).items() if k in ("bytes", "entries")},
+        "lock_wait": state.get("lock_wait", {"seconds": 0.0, "count": 0}),
+        "capture_latency": state.get(
+            "capture_latency", {"buckets": [0] * len(CAPTURE_BUCKETS), "sum": 0.0, "count": 0}
+        ),
+        "updated": time.time(),
+    }
+
+
+def render(metrics: dict) -> str:
+    """Prometheus text exposition format."""
+    lines: list[str] = []
+
+    def family(name: str, kind: str, help_text: str, samples: list[tuple]) -> None:
+        lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+            if label_text:
+                label_text = f"{{{label_text}}}"
+            lines.append(f"{PREFIX}_{name}{suffix}{label_text} {value!r}")
+
+    family(
+        "sessions_recorded_total", "counter", "Sessions recorded, by source.",
+        [("", {"source": s}, n) for s, n in sorted(metrics["sessions_recorded"].items())],
+    )
+    family(
+        "notifications_total", "counter", "Notification deliveries, by backend and result.",
+        [
+            ("", {"backend": backend, "result": result}, counts[result])
+            for backend, counts in metrics["notifications"].items()
+            for result in ("sent", "failed")
+        ],
+    )
+    store = metrics["store"]
+    family("store_bytes", "gauge", "Size of the session files.", [("", {}, store.get("bytes", 0))])
+    family(
+        "store_entries", "gauge", "Sessions in the store.", [("", {}, store.get("entries", 0))]
+    )
+    wait = metrics["lock_wait"]
+    family(
+        "lock_wait_seconds_total", "counter", "Time spent waiting for the storage lock.",
+        [("", {}, wait["seconds"])],
+    )
+    family(
+        "lock_acquisitions_total", "counter", "Storage lock acquisitions by record.",
+        [("", {}, wait["count"])],
+    )
+    capture = metrics["capture_latency"]
+    buckets, cumulative = [], 0
+    for bound, n in zip(CAPTURE_BUCKETS, capture["buckets"]):
+        cumulative += n
+        buckets.append(("_bucket", {"le": repr(bound)}, cumulative))
+    buckets.append(("_bucket", {"le": "+Inf"}, capture["count"]))
+    buckets += [("_sum", {}, capture["sum"]), ("_count", {}, capture["count"])]
+    family(
+        "capture_latency_seconds", "histogram",
+        "From the wrapper seeing terminal output to the session being stored.", buckets,
+    )
+    family(
+        "metrics_updated_timestamp_seconds", "gauge", "When these metrics were written.",
+        [("", {}, round(metrics["updated"], 3))],
+    )
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(config: dict, state: dict, base_dir: Path) -> None:
+    """Atomically replace the configured textfile; a no-op when unset."""
+    target = config.get("metrics", {}).get("textfile", "")
+    if not target:
+        return
+    path = Path(os.path.expanduser(target))
+    # Not *.prom, so the collector never picks up a half-written file
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(render(collect(state, base_dir)))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except OSError as e:
+        tmp.unlink(missing_ok=True)
+        print(f"Cannot write metrics to {path}: {e}", file=sys.stderr)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _capture_latency(entry: SessionEntry) -> float | None:
+    trace = entry.trace or {}
+    start = trace.get("first_byte", trace.get("url_detected"))
+    if start is None or "stored" not in trace or trace["stored"] < start:
+        return None
+    return trace["stored"] - start
+
+
+def _update_store(
+    state: dict, store: Storage, appended: tuple[int, int] = (0, 0), recount: bool = True
+) -> None:
+    """Update the store gauges after ``appended`` (entries, bytes) went in.
+
+    If the file moved by anything else the count comes from the rollup,
+    or with ``recount`` from the file itself. Without it the count is an
+    estimate, marked for the next ``refresh`` to recount.
+    """
+    from collector import rollup
+
+    try:
+        jsonl_bytes = store.jsonl_file.stat().st_size
+    except FileNotFoundError:
+        jsonl_bytes = 0
+    try:
+        txt_bytes = store.txt_file.stat().st_size
+    except FileNotFoundError:
+        txt_bytes = 0
+    gauges = state.get("store")
+    entries, line_bytes = appended
+    known = jsonl_bytes
+    if gauges and gauges.get("jsonl_bytes", -1) + line_bytes == jsonl_bytes:
+        entries += gauges["entries"]
+    elif (counted := rollup.entry_count(store.base_dir, jsonl_bytes)) is not None:
+        entries = counted
+    elif recount:
+        entries = _count_lines(store.jsonl_file)
+    else:
+        entries += gauges["entries"] if gauges else 0
+        known = -1
+    state["store"] = {
+        "bytes": jsonl_bytes + txt_bytes,
+        "entries": entries,
+        "jsonl_bytes": known,
+    }
+
+
+def _count_lines(path: Path) -> int:
+    count = 0
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(1 << 20):
+                count += chunk.count(b"\n")
+    except FileNotFoundError:
+        pass
+    return count
@@ -4,54 +4,279 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
 
+from collector.latency import record_latency
 from collector.storage import SessionEntry
 
+if TYPE_CHECKING:
+    from collector.breaker import CircuitBreaker
+
 
 @dataclass
 class NotifyResult:
     success: bool
     method: str
     message: str
+    # Set when the backend asked us to come back later (e.g. HTTP 429)
+    retry_after: float | None = None
+    # Seconds per request phase ("dns", "connect", "tls", "response",
+    # "total") for sends that reached the network; phases that did not
+    # happen (e.g. on a reused connection) are left out
+    timings: dict[str, float] | None = None
 
 
 class Notifier(ABC):
     """Base class for notification backends."""
 
     name: str = ""
+    timeout: float = 10
 
     @abstractmethod
     def send(self, entry: SessionEntry) -> NotifyResult:
         """Send a notification for the given session entry."""
 
+    def send_batch(self, entries: list[SessionEntry]) -> NotifyResult:
+        """Send a coalesced burst of entries.
+
+        The default sends them one at a time and stops at the first
+        failure; backends override this to deliver a single digest.
+        """
+        for entry in entries:
+            result = self.send(entry)
+            if not result.success or len(entries) == 1:
+                return result
+        return NotifyResult(
+            success=True, method=self.name, message=f"Sent {len(entries)} notifications"
+        )
+
+    async def send_async(self, entry: SessionEntry) -> NotifyResult:
+        """Asyncio flavour of ``send``.
+
+        The default runs the blocking ``send`` in a worker thread; HTTP
+        backends override it to use the non-blocking client.
+        """
+        import asyncio
+
+        return await asyncio.to_thread(self.send, entry)
+
+    async def send_batch_async(self, entries: list[SessionEntry]) -> NotifyResult:
+        """Asyncio flavour of ``send_batch``."""
+        import asyncio
+
+        return await asyncio.to_thread(self.send_batch, entries)
+
     @classmethod
     @abstractmethod
     def from_config(cls, config: dict) -> Notifier:
         """Create a notifier instance from config section dict."""
 
+    def use_state_dir(self, base_dir: Path) -> None:
+        """Keep state shared between processes (e.g. rate limits) in ``base_dir``.
 
-def get_notifier(config: dict) -> Notifier:
-    """Factory: create a notifier from the full config dict."""
+        The default keeps none; backends with such state override this.
+        """
+
+
+def digest_text(entries: list[SessionEntry], limit: int = 4000) -> str:
+    """Plain-text digest of several sessions, trimmed to ``limit`` chars."""
+    header = f"\U0001f517 {len(entries)} new Claude sessions:"
+    lines = [header]
+    size = len(header)
+    for i, e in enumerate(entries):
+        line = f"{e.url}  ({e.cwd})" if e.cwd else e.url
+        more = f"… and {len(entries) - i} more"
+        if size + len(line) + len(more) + 2 > limit:
+            lines.append(more)
+            break
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def coalesce_window(backend: str, config: dict) -> float:
+    """Coalescing window in seconds for ``backend`` (0 = send immediately).
+
+    ``notify.<backend>.coalesce_ms`` overrides the global ``notify.coalesce_ms``.
+    """
+    value = config.get(f"notify.{backend}", {}).get(
+        "coalesce_ms", config.get("notify", {}).get("coalesce_ms", 0)
+    )
+    return max(float(value), 0.0) / 1000
+
+
+def backend_names(config: dict) -> list[str]:
+    """Configured backend names, in order.
+
+    ``notify.backend`` may be a single name, a comma-separated string
+    (``"telegram,webhook"``) or a TOML array.
+    """
     backend = config.get("notify", {}).get("backend", "telegram")
-    backend_config = config.get(f"notify.{backend}", {})
+    if isinstance(backend, str):
+        backend = backend.split(",")
+    names: list[str] = []
+    for name in backend:
+        name = str(name).strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def create_notifier(backend: str, config: dict, base_dir: Path | None = None) -> Notifier:
+    """Factory: create the named backend from the full config dict.
+
+    Backends are looked up in the entry point registry (see
+    ``collector.plugins``); only the selected backend's module is imported.
+    With ``base_dir`` the backend keeps its state with that store instead
+    of the per-user default.
+    """
+    from collector.plugins import backend_class
+
+    notifier = backend_class(backend).from_config(config.get(f"notify.{backend}", {}))
+    if base_dir is not None:
+        notifier.use_state_dir(base_dir)
+    return notifier
+
+
+def get_notifier(config: dict) -> Notifier:
+    """Factory: create the first configured notifier from the full config dict."""
+    return create_notifier(backend_names(config)[0], config)
+
+
+def get_notifiers(
+    config: dict, backends: list[str] | None = None, base_dir: Path | None = None
+) -> list[Notifier]:
+    """Create every configured notifier (or just ``backends``)."""
+    names = backend_names(config) if backends is None else backends
+    return [create_notifier(name, config, base_dir) for name in names]
+
+
+def notify(
+    entry: SessionEntry,
+    config: dict,
+    backends: list[str] | None = None,
+    base_dir: Path | None = None,
+) -> list[NotifyResult]:
+    """Send to every configured backend; returns one result per backend.
+
+    Backends are sent to in parallel on a bounded thread pool
+    (``notify.max_workers``), so the total latency is that of the slowest
+    backend rather than the sum. Each backend applies its own
+    ``notify.<backend>.timeout``, and a backend whose circuit breaker is
+    open (see ``collector.breaker``) fails at once instead of timing out.
+    Breaker, rate limit and latency state live in ``base_dir``, the
+    storage directory by default.
+    """
+    from collector.breaker import circuit_breaker
+
+    notifiers = get_notifiers(config, backends, base_dir)
+    breaker = circuit_breaker(config, base_dir)
+    if len(notifiers) == 1:
+        return [_send(notifiers[0], entry, breaker, base_dir)]
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    max_workers = int(config.get("notify", {}).get("max_workers", 4))
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(notifiers)))) as pool:
+        futures = [pool.submit(_send, n, entry, breaker, base_dir) for n in notifiers]
+        return [f.result() for f in futures]
+
+
+def _send(
+    notifier: Notifier,
+    entry: SessionEntry,
+    breaker: CircuitBreaker | None = None,
+    base_dir: Path | None = None,
+) -> NotifyResult:
+    """Send one notification through ``breaker`` and record its latency.
+
+    An unexpected exception becomes a failed result. Every result is
+    counted, including one the open circuit returned without sending.
+    """
+    if breaker is not None:
+        result = breaker.call(notifier.name, lambda: _attempt(notifier, entry))
+    else:
+        result = _attempt(notifier, entry)
+    record_latency(notifier.name, result, base_dir)
+    return result
+
+
+def _attempt(notifier: Notifier, entry: SessionEntry) -> NotifyResult:
+    try:
+        return notifier.send(entry)
+    except Exception as e:
+        return NotifyResult(
+            success=False, method=notifier.name, message=f"{type(e).__name__}: {e}"
+        )
+
+
+async def notify_async(
+    entry: SessionEntry,
+    config: dict,
+    backends: list[str] | None = None,
+    base_dir: Path | None = None,
+) -> list[NotifyResult]:
+    """Asyncio flavour of ``notify``: every backend is awaited concurrently."""
+    import asyncio
+
+    from collector.breaker import circuit_breaker
+
+    notifiers = get_notifiers(config, backends, base_dir)
+    breaker = circuit_breaker(config, base_dir)
+    return list(
+        await asyncio.gather(*(_send_async(n, entry, breaker, base_dir) for n in notifiers))
+    )
+
+
+async def notify_many_async(
+    entries: list[SessionEntry],
+    config: dict,
+    backends: list[str] | None = None,
+    concurrency: int = 64,
+    base_dir: Path | None = None,
+) -> list[list[NotifyResult]]:
+    """Send many entries with up to ``concurrency`` requests in flight.
+
+    Returns one list of per-backend results for each entry, in order. The
+    notifiers (and so their keep-alive connections) are shared by all sends.
+    """
+    import asyncio
+
+    from collector.breaker import circuit_breaker
+
+    notifiers = get_notifiers(config, backends, base_dir)
+    breaker = circuit_breaker(config, base_dir)
+    slots = asyncio.Semaphore(max(1, concurrency))
 
-    if backend == "telegram":
-        from collector.notifiers.telegram import TelegramNotifier
+    async def one(notifier: Notifier, entry: SessionEntry) -> NotifyResult:
+        async with slots:
+            return await _send_async(notifier, entry, breaker, base_dir)
 
-        return TelegramNotifier.from_config(backend_config)
-    elif backend == "webhook":
-        from collector.notifiers.webhook import WebhookNotifier
+    results = await asyncio.gather(*(one(n, e) for e in entries for n in notifiers))
+    width = len(notifiers)
+    return [list(results[i:i + width]) for i in range(0, len(results), width)]
 
-        return WebhookNotifier.from_config(backend_config)
-    elif backend == "ntfy":
-        from collector.notifiers.ntfy import NtfyNotifier
 
-        return NtfyNotifier.from_config(backend_config)
+async def _send_async(
+    notifier: Notifier,
+    entry: SessionEntry,
+    breaker: CircuitBreaker | None = None,
+    base_dir: Path | None = None,
+) -> NotifyResult:
+    """Async ``_send``."""
+    if breaker is not None:
+        result = await breaker.call_async(notifier.name, lambda: _attempt_async(notifier, entry))
     else:
-        raise ValueError(f"Unknown notification backend: {backend}")
+        result = await _attempt_async(notifier, entry)
+    record_latency(notifier.name, result, base_dir)
+    return result
 
 
-def notify(entry: SessionEntry, config: dict) -> NotifyResult:
-    """Convenience function: create notifier from config and send."""
-    notifier = get_notifier(config)
-    return notifier.send(entry)
+async def _attempt_async(notifier: Notifier, entry: SessionEntry) -> NotifyResult:
+    try:
+        return await notifier.send_async(entry)
+    except Exception as e:
+        return NotifyResult(
+            success=False, method=notifier.name, message=f"{type(e).__name__}: {e}"
+        )
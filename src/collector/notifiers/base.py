@@ -0,0 +1,100 @@
+"""Shared plumbing for backends that deliver over HTTP."""
+
+from __future__ import annotations
+
+import time
+import urllib.error
+import urllib.request
+from abc import abstractmethod
+
+from collector import httppool
+from collector.httppool import PooledResponse
+from collector.notifier import Notifier, NotifyResult
+from collector.storage import SessionEntry
+
+
+class HTTPNotifier(Notifier):
+    """A backend that turns a batch of entries into one HTTP request.
+
+    Subclasses implement ``build_request`` and the two response hooks; the
+    blocking (``send``) and asyncio (``send_async``) paths are thin
+    wrappers that only differ in which client carries the request. Both
+    attach the request's phase timings to the result.
+    """
+
+    @abstractmethod
+    def build_request(self, entries: list[SessionEntry]) -> urllib.request.Request | NotifyResult:
+        """The request delivering ``entries``, or a failed result if unconfigured."""
+
+    @abstractmethod
+    def on_response(self, resp: PooledResponse) -> NotifyResult:
+        """Result for a 1xx-3xx response."""
+
+    @abstractmethod
+    def on_http_error(self, error: urllib.error.HTTPError) -> NotifyResult:
+        """Result for a 4xx/5xx response."""
+
+    def send(self, entry: SessionEntry) -> NotifyResult:
+        return self.send_batch([entry])
+
+    def send_batch(self, entries: list[SessionEntry]) -> NotifyResult:
+        req = self.build_request(entries)
+        if isinstance(req, NotifyResult):
+            return req
+        return self.deliver(req)
+
+    async def send_async(self, entry: SessionEntry) -> NotifyResult:
+        return await self.send_batch_async([entry])
+
+    async def send_batch_async(self, entries: list[SessionEntry]) -> NotifyResult:
+        req = self.build_request(entries)
+        if isinstance(req, NotifyResult):
+            return req
+        return await self.deliver_async(req)
+
+    def deliver(self, req: urllib.request.Request) -> NotifyResult:
+        phases: dict[str, float] = {}
+        start = time.perf_counter()
+        try:
+            with httppool.urlopen(req, timeout=self.timeout) as resp:
+                phases = resp.timings
+                result = self.on_response(resp)
+        except urllib.error.HTTPError as e:
+            result = self.on_http_error(e)
+        except (urllib.error.URLError, OSError) as e:
+            result = self.network_error(e)
+        result.timings = {**phases, "total": time.perf_counter() - start}
+        return result
+
+    async def deliver_async(self, req: urllib.request.Request) -> NotifyResult:
+        from collector import asynchttp
+
+        if httppool.uses_proxy(req.full_url):
+            return await self._deliver_in_thread(req)
+        phases: dict[str, float] = {}
+        start = time.perf_counter()
+        try:
+            resp = await asynchttp.urlopen(req, timeout=self.timeout)
+            if resp.status in httppool.REDIRECTS and resp.headers.get("Location"):
+                return await self._deliver_in_thread(req)
+            phases = resp.timings
+            result = self.on_response(resp)
+        except urllib.error.HTTPError as e:
+            result = self.on_http_error(e)
+        except (urllib.error.URLError, OSError) as e:
+            result = self.network_error(e)
+        result.timings = {**phases, "total": time.perf_counter() - start}
+        return result
+
+    async def _deliver_in_thread(self, req: urllib.request.Request) -> NotifyResult:
+        """The blocking path, for what the asyncio client doesn't do: proxies, redirects."""
+        import asyncio
+
+        return await asyncio.to_thread(self.deliver, req)
+
+    def network_error(self, error: Exception) -> NotifyResult:
+        return NotifyResult(
+            success=False,
+            method=self.name,
+            message=f"Network error: {error}",
+        )
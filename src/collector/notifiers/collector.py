@@ -0,0 +1,78 @@
+"""Forward entries to a central ``claude-remote-collector serve``."""
+
+from __future__ import annotations
+
+import json
+import socket
+import urllib.error
+import urllib.request
+
+from collector.httppool import PooledResponse
+from collector.notifier import NotifyResult
+from collector.notifiers.base import HTTPNotifier
+from collector.server import PATH
+from collector.storage import SessionEntry
+
+
+class CollectorNotifier(HTTPNotifier):
+    name = "collector"
+
+    def __init__(self, url: str, token: str = "", timeout: float = 10):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config: dict) -> CollectorNotifier:
+        return cls(
+            url=config.get("url", ""),
+            token=config.get("token", ""),
+            timeout=float(config.get("timeout", 10)),
+        )
+
+    def build_request(self, entries: list[SessionEntry]) -> urllib.request.Request | NotifyResult:
+        """A single entry is POSTed as a JSON object, a coalesced burst as NDJSON."""
+        if not self.url:
+            return NotifyResult(
+                success=False,
+                method=self.name,
+                message="Collector URL not configured. Run: claude-remote-collector config set notify.collector.url http://HOST:8765",
+            )
+
+        host = socket.gethostname()
+        lines = []
+        for entry in entries:
+            data = entry.to_dict()
+            data.pop("trace", None)
+            data.setdefault("host", host)
+            lines.append(json.dumps(data))
+
+        headers = {
+            "Content-Type": "application/json" if len(lines) == 1 else "application/x-ndjson"
+        }
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return urllib.request.Request(
+            self.url + PATH,
+            data="\n".join(lines).encode("utf-8"),
+            headers=headers,
+            method="POST",
+        )
+
+    def on_response(self, resp: PooledResponse) -> NotifyResult:
+        try:
+            accepted = json.loads(resp.read())["accepted"]
+        except (ValueError, KeyError, TypeError):
+            accepted = "?"
+        return NotifyResult(
+            success=True,
+            method=self.name,
+            message=f"Forwarded {accepted} to {self.url}",
+        )
+
+    def on_http_error(self, error: urllib.error.HTTPError) -> NotifyResult:
+        return NotifyResult(
+            success=False,
+            method=self.name,
+            message=f"Collector error: {error.code} {error.reason}",
+        )
@@ -5,17 +5,26 @@ from __future__ import annotations
 import urllib.error
 import urllib.request
 
-from collector.notifier import Notifier, NotifyResult
+from collector.httppool import PooledResponse
+from collector.notifier import NotifyResult
+from collector.notifiers.base import HTTPNotifier
 from collector.storage import SessionEntry
 
 
-class NtfyNotifier(Notifier):
+class NtfyNotifier(HTTPNotifier):
     name = "ntfy"
 
-    def __init__(self, topic: str, server: str = "https://ntfy.sh", priority: str = "default"):
+    def __init__(
+        self,
+        topic: str,
+        server: str = "https://ntfy.sh",
+        priority: str = "default",
+        timeout: float = 10,
+    ):
         self.topic = topic
         self.server = server.rstrip("/")
         self.priority = priority
+        self.timeout = timeout
 
     @classmethod
     def from_config(cls, config: dict) -> NtfyNotifier:
@@ -23,9 +32,10 @@ class NtfyNotifier(Notifier):
             topic=config.get("topic", ""),
             server=config.get("server", "https://ntfy.sh"),
             priority=config.get("priority", "default"),
+            timeout=float(config.get("timeout", 10)),
         )
 
-    def send(self, entry: SessionEntry) -> NotifyResult:
+    def build_request(self, entries: list[SessionEntry]) -> urllib.request.Request | NotifyResult:
         if not self.topic:
             return NotifyResult(
                 success=False,
@@ -33,32 +43,33 @@ class NtfyNotifier(Notifier):
                 message="ntfy topic not configured. Run: claude-remote-collector config set notify.ntfy.topic YOUR_TOPIC",
             )
 
+        if len(entries) == 1:
+            body = entries[0].url
+            title = f"Claude Session: {entries[0].session_id}"
+        else:
+            body = "\n".join(e.url for e in entries)
+            title = f"{len(entries)} Claude Sessions"
+
         url = f"{self.server}/{self.topic}"
-        body = entry.url.encode("utf-8")
 
-        req = urllib.request.Request(url, data=body, method="POST")
-        req.add_header("Title", f"Claude Session: {entry.session_id}")
-        req.add_header("Click", entry.url)
+        req = urllib.request.Request(url, data=body.encode("utf-8"), method="POST")
+        req.add_header("Title", title)
+        req.add_header("Click", entries[-1].url)
         req.add_header("Tags", "link,claude")
         if self.priority != "default":
             req.add_header("Priority", self.priority)
+        return req
 
-        try:
-            with urllib.request.urlopen(req, timeout=10):
-                return NotifyResult(
-                    success=True,
-                    method=self.name,
-                    message=f"Sent to ntfy topic '{self.topic}'",
-                )
-        except urllib.error.HTTPError as e:
-            return NotifyResult(
-                success=False,
-                method=self.name,
-                message=f"ntfy error: {e.code} {e.reason}",
-            )
-        except (urllib.error.URLError, OSError) as e:
-            return NotifyResult(
-                success=False,
-                method=self.name,
-                message=f"Network error: {e}",
-            )
+    def on_response(self, resp: PooledResponse) -> NotifyResult:
+        return NotifyResult(
+            success=True,
+            method=self.name,
+            message=f"Sent to ntfy topic '{self.topic}'",
+        )
+
+    def on_http_error(self, error: urllib.error.HTTPError) -> NotifyResult:
+        return NotifyResult(
+            success=False,
+            method=self.name,
+            message=f"ntfy error: {error.code} {error.reason}",
+        )
@@ -3,20 +3,43 @@
 from __future__ import annotations
 
 import json
+import time
 import urllib.error
 import urllib.request
+from pathlib import Path
 
-from collector.notifier import Notifier, NotifyResult
+from collector.httppool import PooledResponse
+from collector.notifier import NotifyResult, digest_text
+from collector.notifiers.base import HTTPNotifier
+from collector.ratelimit import RateLimiter, default_state_file
 from collector.storage import SessionEntry
 
+API_BASE = "https://api.telegram.org"
 
-class TelegramNotifier(Notifier):
+# How many 429 responses a single send absorbs before giving up
+MAX_RATE_LIMIT_RETRIES = 3
+
+
+class TelegramNotifier(HTTPNotifier):
     name = "telegram"
 
-    def __init__(self, bot_token: str, chat_id: str, message_template: str):
+    def __init__(
+        self,
+        bot_token: str,
+        chat_id: str,
+        message_template: str,
+        timeout: float = 10,
+        api_base: str = API_BASE,
+        limiter: RateLimiter | None = None,
+        max_wait: float = 30,
+    ):
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.message_template = message_template
+        self.timeout = timeout
+        self.api_base = api_base.rstrip("/")
+        self.limiter = limiter
+        self.max_wait = max_wait
 
     @classmethod
     def from_config(cls, config: dict) -> TelegramNotifier:
@@ -26,9 +49,22 @@ class TelegramNotifier(Notifier):
             message_template=config.get(
                 "message_template", "🔗 New Claude session:\n{url}"
             ),
+            timeout=float(config.get("timeout", 10)),
+            api_base=config.get("api_base", API_BASE),
+            limiter=RateLimiter(
+                default_state_file(),
+                rate=float(config.get("rate_per_second", 1.0)),
+                burst=int(config.get("burst", 1)),
+            ),
+            max_wait=float(config.get("max_wait", 30)),
         )
 
-    def send(self, entry: SessionEntry) -> NotifyResult:
+    def use_state_dir(self, base_dir: Path) -> None:
+        if self.limiter is not None:
+            self.limiter.state_file = default_state_file(base_dir)
+
+    def build_request(self, entries: list[SessionEntry]) -> urllib.request.Request | NotifyResult:
+        """One entry uses the message template; a coalesced burst becomes a digest."""
         if not self.bot_token or not self.chat_id:
             return NotifyResult(
                 success=False,
@@ -36,49 +72,116 @@ class TelegramNotifier(Notifier):
                 message="Telegram not configured. Run: claude-remote-collector config set notify.telegram.bot_token YOUR_TOKEN",
             )
 
-        text = self.message_template.format(
-            url=entry.url,
-            session_id=entry.session_id,
-            timestamp=entry.timestamp,
-            cwd=entry.cwd,
-        )
+        if len(entries) == 1:
+            entry = entries[0]
+            text = self.message_template.format(
+                url=entry.url,
+                session_id=entry.session_id,
+                timestamp=entry.timestamp,
+                cwd=entry.cwd,
+            )
+        else:
+            # Telegram caps messages at 4096 characters
+            text = digest_text(entries, limit=4000)
 
-        api_url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        api_url = f"{self.api_base}/bot{self.bot_token}/sendMessage"
         payload = json.dumps({
             "chat_id": self.chat_id,
             "text": text,
             "disable_web_page_preview": False,
         }).encode("utf-8")
 
-        req = urllib.request.Request(
+        return urllib.request.Request(
             api_url,
             data=payload,
             headers={"Content-Type": "application/json"},
             method="POST",
         )
 
-        try:
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                if resp.status == 200:
-                    return NotifyResult(
-                        success=True,
-                        method=self.name,
-                        message=f"Sent to Telegram chat {self.chat_id}",
-                    )
-                return NotifyResult(
-                    success=False,
-                    method=self.name,
-                    message=f"Telegram API returned status {resp.status}",
-                )
-        except urllib.error.HTTPError as e:
+    def on_response(self, resp: PooledResponse) -> NotifyResult:
+        if resp.status == 200:
             return NotifyResult(
-                success=False,
-                method=self.name,
-                message=f"Telegram API error: {e.code} {e.reason}",
-            )
-        except (urllib.error.URLError, OSError) as e:
-            return NotifyResult(
-                success=False,
+                success=True,
                 method=self.name,
-                message=f"Network error: {e}",
+                message=f"Sent to Telegram chat {self.chat_id}",
             )
+        return NotifyResult(
+            success=False,
+            method=self.name,
+            message=f"Telegram API returned status {resp.status}",
+        )
+
+    def on_http_error(self, error: urllib.error.HTTPError) -> NotifyResult:
+        if error.code == 429:
+            return self._rate_limited(_retry_after(error))
+        return NotifyResult(
+            success=False,
+            method=self.name,
+            message=f"Telegram API error: {error.code} {error.reason}",
+        )
+
+    def deliver(self, req: urllib.request.Request) -> NotifyResult:
+        """Send under the per-chat rate limit, absorbing a few 429s."""
+        key = f"telegram:{self.chat_id}"
+        retry_after = 0.0
+        for _ in range(MAX_RATE_LIMIT_RETRIES + 1):
+            wait = self.limiter.reserve(key, self.max_wait) if self.limiter else retry_after
+            if wait > self.max_wait:
+                return self._rate_limited(wait)
+            if wait > 0:
+                time.sleep(wait)
+            result = super().deliver(req)
+            if result.retry_after is None:
+                return result
+            retry_after = result.retry_after
+            if self.limiter:
+                self.limiter.penalize(key, retry_after)
+        return self._rate_limited(retry_after)
+
+    async def deliver_async(self, req: urllib.request.Request) -> NotifyResult:
+        """Async twin of ``deliver``; waits for a slot without blocking the loop.
+
+        The limiter's state file is locked in a worker thread, since another
+        process may be holding it.
+        """
+        import asyncio
+
+        key = f"telegram:{self.chat_id}"
+        retry_after = 0.0
+        for _ in range(MAX_RATE_LIMIT_RETRIES + 1):
+            if self.limiter:
+                wait = await asyncio.to_thread(self.limiter.reserve, key, self.max_wait)
+            else:
+                wait = retry_after
+            if wait > self.max_wait:
+                return self._rate_limited(wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            result = await super().deliver_async(req)
+            if result.retry_after is None:
+                return result
+            retry_after = result.retry_after
+            if self.limiter:
+                await asyncio.to_thread(self.limiter.penalize, key, retry_after)
+        return self._rate_limited(retry_after)
+
+    def _rate_limited(self, retry_after: float) -> NotifyResult:
+        return NotifyResult(
+            success=False,
+            method=self.name,
+            message=f"Rate limited by Telegram; rescheduled in {retry_after:.0f}s",
+            retry_after=retry_after,
+        )
+
+
+def _retry_after(error: urllib.error.HTTPError) -> float:
+    """Seconds to back off after a 429, from the JSON body or header."""
+    try:
+        body = json.loads(error.read())
+        return float(body["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError, OSError):
+        pass
+    try:
+        return float(error.headers.get("Retry-After", 1))
+    except (TypeError, ValueError, AttributeError):
+        return 1.0
@@ -6,25 +6,30 @@ import json
 import urllib.error
 import urllib.request
 
-from collector.notifier import Notifier, NotifyResult
+from collector.httppool import PooledResponse
+from collector.notifier import NotifyResult
+from collector.notifiers.base import HTTPNotifier
 from collector.storage import SessionEntry
 
 
-class WebhookNotifier(Notifier):
+class WebhookNotifier(HTTPNotifier):
     name = "webhook"
 
-    def __init__(self, url: str, method: str = "POST"):
+    def __init__(self, url: str, method: str = "POST", timeout: float = 10):
         self.url = url
         self.method = method.upper()
+        self.timeout = timeout
 
     @classmethod
     def from_config(cls, config: dict) -> WebhookNotifier:
         return cls(
             url=config.get("url", ""),
             method=config.get("method", "POST"),
+            timeout=float(config.get("timeout", 10)),
         )
 
-    def send(self, entry: SessionEntry) -> NotifyResult:
+    def build_request(self, entries: list[SessionEntry]) -> urllib.request.Request | NotifyResult:
+        """A single entry is POSTed as an object, a coalesced burst as an array."""
         if not self.url:
             return NotifyResult(
                 success=False,
@@ -32,31 +37,29 @@ class WebhookNotifier(Notifier):
                 message="Webhook URL not configured. Run: claude-remote-collector config set notify.webhook.url YOUR_URL",
             )
 
-        payload = json.dumps(entry.to_dict()).encode("utf-8")
+        if len(entries) == 1:
+            data: dict | list = entries[0].to_dict()
+        else:
+            data = [e.to_dict() for e in entries]
+        payload = json.dumps(data).encode("utf-8")
 
-        req = urllib.request.Request(
+        return urllib.request.Request(
             self.url,
             data=payload,
             headers={"Content-Type": "application/json"},
             method=self.method,
         )
 
-        try:
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                return NotifyResult(
-                    success=True,
-                    method=self.name,
-                    message=f"Webhook {self.method} {self.url} → {resp.status}",
-                )
-        except urllib.error.HTTPError as e:
-            return NotifyResult(
-                success=False,
-                method=self.name,
-                message=f"Webhook error: {e.code} {e.reason}",
-            )
-        except (urllib.error.URLError, OSError) as e:
-            return NotifyResult(
-                success=False,
-                method=self.name,
-                message=f"Network error: {e}",
-            )
+    def on_response(self, resp: PooledResponse) -> NotifyResult:
+        return NotifyResult(
+            success=True,
+            method=self.name,
+            message=f"Webhook {self.method} {self.url} → {resp.status}",
+        )
+
+    def on_http_error(self, error: urllib.error.HTTPError) -> NotifyResult:
+        return NotifyResult(
+            success=False,
+            method=self.name,
+            message=f"Webhook error: {error.code} {error.reason}",
+        )
@@ -0,0 +1,361 @@
+"""Durable on-disk outbox of pending notifications.
+
+Every notification is spooled as one JSON file under ``outbox/`` in the
+storage directory before delivery is attempted, and removed only once it
+has been delivered. Failed deliveries are rescheduled with jittered
+exponential backoff; as soon as one delivery succeeds again the rest of
+the queue is drained in the same pass.
+
+With several backends configured each item tracks which backends still
+owe a delivery, so a backend that is down never causes duplicates on the
+ones that already succeeded. Each backend is flushed as its own "lane",
+in parallel with the others; a lane with a coalescing window
+(``notify.coalesce_ms``) sends all of its due items as one batch.
+
+A flush leases the items it is about to send and lets go of the outbox
+lock while it sends, so ``record`` never queues behind a slow backend.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import random
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from collector.storage import SessionEntry
+
+if TYPE_CHECKING:
+    from collector.notifier import NotifyResult
+
+OUTBOX_DIR = "outbox"
+
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 3600.0
+
+# Seconds a flush may hold items it is sending before another flush may
+# take them over (it crashed, or was killed)
+LEASE = 900.0
+
+
+def backoff_delay(attempts: int) -> float:
+    """Jittered exponential backoff (seconds) after ``attempts`` failures.
+
+    Uses "equal jitter": half of the capped exponential delay is fixed and
+    the other half is random, so retries from many hosts spread out but
+    never fire immediately.
+    """
+    ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(attempts - 1, 0))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+@dataclass
+class OutboxItem:
+    path: Path
+    entry: SessionEntry
+    created: float
+    attempts: int = 0
+    next_attempt: float = 0.0
+    last_error: str = ""
+    # Backends still to deliver to; None means "all configured backends"
+    backends: list[str] | None = None
+    # Claimed by a flush that is sending it until then
+    lease_until: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "entry": self.entry.to_dict(),
+            "created": self.created,
+            "attempts": self.attempts,
+            "next_attempt": self.next_attempt,
+            "last_error": self.last_error,
+            "backends": self.backends,
+            "lease_until": self.lease_until,
+        }
+
+    @classmethod
+    def from_dict(cls, path: Path, d: dict) -> OutboxItem:
+        return cls(
+            path=path,
+            entry=SessionEntry.from_dict(d.get("entry", {})),
+            created=d.get("created", 0.0),
+            attempts=d.get("attempts", 0),
+            next_attempt=d.get("next_attempt", 0.0),
+            last_error=d.get("last_error", ""),
+            backends=d.get("backends"),
+            lease_until=d.get("lease_until", 0.0),
+        )
+
+
+@dataclass
+class FlushReport:
+    sent: int = 0
+    pending: int = 0
+    failures: list[tuple[OutboxItem, NotifyResult]] = field(default_factory=list)
+
+
+class Outbox:
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self.dir = base_dir / OUTBOX_DIR
+        self.lock_file = self.dir / ".lock"
+        self.linger_lock_file = self.dir / ".linger"
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    def enqueue(self, entry: SessionEntry, backends: list[str] | None = None) -> OutboxItem:
+        """Spool a notification for delivery; it is due immediately."""
+        now = time.time()
+        name = f"{time.time_ns()}-{os.getpid()}-{entry.session_id}.json"
+        item = OutboxItem(path=self.dir / name, entry=entry, created=now, backends=backends)
+        self._write(item)
+        return item
+
+    def items(self) -> list[OutboxItem]:
+        """All pending items, oldest first."""
+        items = []
+        for path in sorted(self.dir.glob("*.json")):
+            try:
+                items.append(OutboxItem.from_dict(path, json.loads(path.read_text())))
+            except (OSError, json.JSONDecodeError):
+                # Vanished (delivered concurrently) or half-written by a crash
+                continue
+        return items
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.dir.glob("*.json"))
+
+    def clear(self) -> int:
+        """Drop every pending item. Returns the number removed."""
+        with self._locked():
+            removed = 0
+            for path in self.dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def flush(
+        self,
+        config: dict,
+        force: bool = False,
+        backends: list[str] | None = None,
+        only: list[Path] | None = None,
+    ) -> FlushReport:
+        """Attempt delivery of every due item, oldest first.
+
+        With ``force`` the backoff schedule is ignored; ``backends``
+        restricts the pass to those lanes and ``only`` to those items.
+        Within a lane, a failure stops
+        the pass and pushes the lane's other due items back to the same
+        retry time (the backend is most likely down), while a success
+        means it has recovered, so the lane's remaining items are sent
+        right away regardless of their schedule. Rate-limited sends and
+        backends whose circuit breaker is open (results carrying
+        ``retry_after``) are rescheduled for exactly that long instead of
+        counting as a failed attempt.
+
+        The outbox lock is only held to claim items and to write the
+        results back, never while sending: items are leased for
+        ``LEASE`` seconds, and a concurrent flush skips them.
+        """
+        from collector.notifier import backend_names
+        from collector.trace import record_delivery
+
+        report = FlushReport()
+        with self._locked():
+            now = time.time()
+            items = []
+            for item in self.items():
+                if (only is not None and item.path not in only) or item.lease_until > now:
+                    continue
+                if item.backends is None:
+                    item.backends = backend_names(config)
+                if not item.backends:
+                    # Nothing configured to deliver to
+                    item.path.unlink(missing_ok=True)
+                elif backends is None or set(item.backends) & set(backends):
+                    item.lease_until = now + LEASE
+                    self._write(item)
+                    items.append(item)
+
+        lanes: dict[str, list[OutboxItem]] = {}
+        for item in items:
+            for name in item.backends or []:
+                if backends is None or name in backends:
+                    lanes.setdefault(name, []).append(item)
+        outcomes = self._run_lanes(lanes, config, force, now)
+
+        with self._locked():
+            for item in items:
+                item.lease_until = 0.0
+                if not item.path.exists():
+                    continue  # cleared meanwhile
+                lane_outcomes = outcomes.get(item.path, {}).values()
+                results = [o for o in lane_outcomes if not isinstance(o, float)]
+                delivered = {r.method for r in results if r.success}
+                for r in results:
+                    if r.success and item.entry.trace is not None:
+                        network = r.timings.get("total") if r.timings else None
+                        record_delivery(self.base_dir, item.entry, r.method, network)
+                failed = [r for r in results if not r.success]
+                deferred_until = max(
+                    (o for o in lane_outcomes if isinstance(o, float)), default=0.0
+                )
+                item.backends = [b for b in item.backends or [] if b not in delivered]
+                if not item.backends:
+                    item.path.unlink(missing_ok=True)
+                    report.sent += 1
+                    continue
+                report.pending += 1
+                if failed:
+                    rescheduled = [r.retry_after for r in failed if r.retry_after is not None]
+                    if len(rescheduled) == len(failed):
+                        # Rate limited, not broken: come back when the server said
+                        item.next_attempt = time.time() + max(rescheduled)
+                    else:
+                        item.attempts += 1
+                        item.next_attempt = time.time() + backoff_delay(item.attempts)
+                    item.last_error = "; ".join(f"[{r.method}] {r.message}" for r in failed)
+                    report.failures.extend((item, r) for r in failed)
+                elif deferred_until > item.next_attempt:
+                    item.next_attempt = deferred_until
+                self._write(item)  # releases the lease
+        if report.sent or report.failures:
+            from collector import metrics
+            from collector.storage import Storage
+
+            metrics.refresh(Storage(self.base_dir), config)
+        return report
+
+    def _run_lanes(
+        self, lanes: dict[str, list[OutboxItem]], config: dict, force: bool, now: float
+    ) -> dict[Path, dict[str, NotifyResult | float]]:
+        """Flush every backend lane, in parallel when there are several.
+
+        Returns, per item path, each lane's outcome: a NotifyResult if the
+        item was attempted, or the lane's retry time if it was deferred.
+        """
+        outcomes: dict[Path, dict[str, NotifyResult | float]] = {}
+        if not lanes:
+            return outcomes
+        if len(lanes) == 1:
+            [(name, lane)] = lanes.items()
+            lane_results = [(name, _flush_lane(name, lane, config, force, now, self.base_dir))]
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+
+            max_workers = int(config.get("notify", {}).get("max_workers", 4))
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(lanes)))) as pool:
+                futures = {
+                    name: pool.submit(
+                        _flush_lane, name, lane, config, force, now, self.base_dir
+                    )
+                    for name, lane in lanes.items()
+                }
+                lane_results = [(name, f.result()) for name, f in futures.items()]
+        for name, per_item in lane_results:
+            for path, outcome in per_item.items():
+                outcomes.setdefault(path, {})[name] = outcome
+        return outcomes
+
+    def next_due(self) -> float | None:
+        """Epoch time of the earliest scheduled retry, or None if empty."""
+        items = self.items()
+        return min((item.next_attempt for item in items), default=None)
+
+    @contextmanager
+    def linger_lock(self) -> Iterator[bool]:
+        """Non-blocking lock electing a single long-running retry flusher."""
+        with open(self.linger_lock_file, "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self.lock_file, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write(self, item: OutboxItem) -> None:
+        tmp = item.path.with_name(f".{item.path.name}.tmp")
+        tmp.write_text(json.dumps(item.to_dict()))
+        os.replace(tmp, item.path)
+
+
+def _flush_lane(
+    name: str,
+    items: list[OutboxItem],
+    config: dict,
+    force: bool,
+    now: float,
+    base_dir: Path,
+) -> dict[Path, NotifyResult | float]:
+    """Deliver one backend's share of the outbox (see ``Outbox.flush``)."""
+    from collector.breaker import circuit_breaker
+    from collector.latency import record_latency
+    from collector.notifier import NotifyResult, coalesce_window, create_notifier
+
+    due = [i for i in items if force or i.next_attempt <= now]
+    waiting = [i for i in items if not (force or i.next_attempt <= now)]
+    if not due:
+        return {}
+    try:
+        notifier = create_notifier(name, config, base_dir)
+    except ValueError as e:
+        result = NotifyResult(success=False, method=name, message=str(e))
+        record_latency(name, result, base_dir)
+        return {i.path: result for i in due}
+
+    def send(entries: list[SessionEntry]) -> NotifyResult:
+        try:
+            return notifier.send_batch(entries)
+        except Exception as e:
+            return NotifyResult(success=False, method=name, message=f"{type(e).__name__}: {e}")
+
+    breaker = circuit_breaker(config, base_dir)
+    coalesce = coalesce_window(name, config) > 0
+    chunks = [due] if coalesce else [[i] for i in due]
+    outcomes: dict[Path, NotifyResult | float] = {}
+    pos = 0
+    while pos < len(chunks):
+        chunk = chunks[pos]
+        pos += 1
+        entries = [i.entry for i in chunk]
+        if breaker is None:
+            result = send(entries)
+        else:
+            # A forced flush is an explicit "try now", even with the circuit open
+            result = breaker.call(name, lambda: send(entries), force=force)
+        record_latency(name, result, base_dir)
+        for item in chunk:
+            outcomes[item.path] = result
+        if result.success:
+            if waiting:
+                # Backend is reachable again: drain everything now
+                chunks.extend([waiting] if coalesce else [[i] for i in waiting])
+                waiting = []
+            continue
+        retry_at = time.time() + (
+            result.retry_after if result.retry_after is not None else BACKOFF_BASE
+        )
+        for rest in chunks[pos:]:
+            for item in rest:
+                outcomes[item.path] = retry_at
+        break
+    return outcomes
+
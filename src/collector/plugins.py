@@ -0,0 +1,128 @@
+"""Notifier backend discovery through entry points.
+
+Backends register under the ``claude_remote_collector.notifiers`` entry
+point group as ``name = "module:Class"``; the built-ins are declared
+in this project's own ``pyproject.toml`` the same way, so a third-party
+package adds a backend just by being installed:
+
+    [project.entry-points."claude_remote_collector.notifiers"]
+    slack = "my_package.slack:SlackNotifier"
+
+Scanning installed distributions (``importlib.metadata``) costs tens of
+milliseconds, so the resolved name -> "module:Class" map is cached in
+``plugins.json`` in the storage directory, keyed on the modification times
+of the ``sys.path`` directories (installing or removing a distribution
+touches its site-packages directory). Backend modules themselves are only
+imported when selected.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collector.notifier import Notifier
+
+ENTRY_POINT_GROUP = "claude_remote_collector.notifiers"
+CACHE_NAME = "plugins.json"
+
+# Used when running from a source checkout that was never installed (no
+# dist-info, so no entry points); installed entry points take precedence.
+BUILTIN_BACKENDS = {
+    "telegram": "collector.notifiers.telegram:TelegramNotifier",
+    "webhook": "collector.notifiers.webhook:WebhookNotifier",
+    "ntfy": "collector.notifiers.ntfy:NtfyNotifier",
+    "collector": "collector.notifiers.collector:CollectorNotifier",
+}
+
+_registry: dict[str, str] | None = None
+
+
+def default_cache_file() -> Path:
+    from collector import storage
+
+    return storage.DEFAULT_DIR / CACHE_NAME
+
+
+def registry() -> dict[str, str]:
+    """Every known backend: name -> "module:attribute" (memoized per process)."""
+    global _registry
+    if _registry is None:
+        _registry = _load(default_cache_file())
+    return _registry
+
+
+def clear_registry() -> None:
+    """Forget the in-process registry so the next lookup re-reads the cache."""
+    global _registry
+    _registry = None
+
+
+def backend_class(name: str) -> type[Notifier]:
+    """Import and return the notifier class registered as ``name``."""
+    try:
+        target = registry()[name]
+    except KeyError:
+        raise ValueError(f"Unknown notification backend: {name}") from None
+    module_name, _, attr = target.partition(":")
+    obj = importlib.import_module(module_name)
+    for part in filter(None, attr.split(".")):
+        obj = getattr(obj, part)
+    return obj  # type: ignore[return-value]
+
+
+def scan() -> dict[str, str]:
+    """Resolve the registry from installed entry points (slow path)."""
+    from importlib.metadata import entry_points
+
+    backends = dict(BUILTIN_BACKENDS)
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        backends[ep.name] = ep.value
+    return backends
+
+
+def _cache_key() -> list[list]:
+    """Modification times of the directories distributions are found in.
+
+    ``sys.path[0]`` (the script directory or cwd) is left out: it is not
+    an install location and would otherwise change from call to call.
+    """
+    key = []
+    for entry in sys.path[1:]:
+        try:
+            key.append([entry, os.stat(entry or ".").st_mtime_ns])
+        except OSError:
+            continue
+    return key
+
+
+def _load(cache_file: Path) -> dict[str, str]:
+    key = _cache_key()
+    try:
+        cache = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    if not isinstance(cache, dict):
+        cache = {}
+    # One slot per interpreter, so several venvs don't evict each other
+    cached = cache.get(sys.executable)
+    if isinstance(cached, dict) and cached.get("key") == key:
+        # Built-ins added since the cache was written (a source checkout's
+        # sys.path doesn't change when it is updated)
+        return {**BUILTIN_BACKENDS, **cached["backends"]}
+
+    backends = scan()
+    cache[sys.executable] = {"key": key, "backends": backends}
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(cache))
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass  # A read-only state dir just means no caching
+    return backends
@@ -0,0 +1,65 @@
+"""Cross-process send rate limiting backed by a small state file.
+
+Each key (e.g. one Telegram chat) gets a token bucket, stored in GCRA form
+as a single "theoretical arrival time" so the whole state stays a tiny
+JSON object. Every process that sends to the same key reserves its slot
+under an ``fcntl`` lock on the state file, so a burst of concurrent
+`record` calls is spread out instead of tripping the server's limits.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from collector.statefile import locked_json
+
+STATE_NAME = "ratelimit.json"
+
+
+def default_state_file(base_dir: Path | None = None) -> Path:
+    """The state file in ``base_dir``, by default the per-user storage directory."""
+    from collector import storage
+
+    return (base_dir or storage.DEFAULT_DIR) / STATE_NAME
+
+
+class RateLimiter:
+    def __init__(self, state_file: Path, rate: float = 1.0, burst: int = 1):
+        self.state_file = state_file
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.tolerance = max(burst - 1, 0) * self.interval
+
+    def reserve(self, key: str, max_wait: float = float("inf")) -> float:
+        """Reserve the next send slot for ``key``; returns seconds to wait.
+
+        If the wait would exceed ``max_wait`` nothing is reserved and the
+        (too long) wait is returned, so the caller can reschedule instead.
+        """
+        with self._locked() as state:
+            now = time.time()
+            tat = max(state.get(key, 0.0), now)
+            wait = max(tat - self.tolerance - now, 0.0)
+            if wait <= max_wait:
+                state[key] = tat + self.interval
+            return wait
+
+    def penalize(self, key: str, retry_after: float) -> None:
+        """Block ``key`` for ``retry_after`` seconds (server-imposed limit)."""
+        with self._locked() as state:
+            blocked_until = time.time() + retry_after + self.tolerance
+            state[key] = max(state.get(key, 0.0), blocked_until)
+
+    @contextmanager
+    def _locked(self) -> Iterator[dict[str, float]]:
+        """Yield the state dict under an exclusive lock; write back changes."""
+        with locked_json(self.state_file) as state:
+            original = dict(state)
+            yield state
+            if state != original:
+                # Drop keys whose slots are long past to keep the file tiny
+                now = time.time()
+                for key in [k for k, v in state.items() if v <= now - 3600]:
+                    del state[key]
@@ -0,0 +1,106 @@
+"""Retention policies: how old and how large the store may get.
+
+``clean --older-than 30d --max-bytes 50M`` applies a policy once. With
+``retention.auto`` set, ``record`` applies the ``[retention]`` policy
+(``keep``, ``older_than``, ``max_bytes``; 0 or empty for no limit) by
+itself, amortized: only after ``every`` appends or ``interval`` minutes
+since the last check, whichever comes first, so the store stays bounded
+without a cron job and a typical ``record`` pays one small state update.
+``retention.json`` in the storage directory counts the appends since the
+last check.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from collector.statefile import locked_json
+
+if TYPE_CHECKING:
+    from collector.storage import Storage
+
+STATE_NAME = "retention.json"
+
+_AGE_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+_SIZE_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30}
+
+
+@dataclass
+class Policy:
+    keep: int | None = None
+    older_than: str | None = None  # storage timestamp
+    max_bytes: int | None = None
+
+    def __bool__(self) -> bool:
+        return any(v is not None for v in (self.keep, self.older_than, self.max_bytes))
+
+
+def parse_age(value: str) -> float:
+    """Seconds in ``30d``, ``12h``, ``2w`` or ``90m``."""
+    value = value.strip().lower()
+    if len(value) < 2 or value[-1] not in _AGE_UNITS or not value[:-1].isdigit():
+        raise ValueError(f"Invalid age: {value!r} (expected e.g. 30d, 12h, 2w)")
+    return int(value[:-1]) * _AGE_UNITS[value[-1]]
+
+
+def parse_size(value: str | int) -> int:
+    """Bytes in ``5000000``, ``500K``, ``50M`` or ``1G``."""
+    text = str(value).strip().lower().removesuffix("b").removesuffix("i")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    number = text[: len(text) - len(unit)]
+    if not number.isdigit():
+        raise ValueError(f"Invalid size: {value!r} (expected e.g. 500K, 50M)")
+    return int(number) * _SIZE_UNITS[unit]
+
+
+def cutoff(age: str, now: float | None = None) -> str:
+    """The storage timestamp ``age`` ago."""
+    now = time.time() if now is None else now
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - parse_age(age)))
+
+
+def policy(config: dict, now: float | None = None) -> Policy:
+    """The ``[retention]`` policy; ValueError if it doesn't parse."""
+    section = config.get("retention", {})
+    keep = int(section.get("keep", 0))
+    older_than = str(section.get("older_than", ""))
+    max_bytes = parse_size(section.get("max_bytes", 0) or 0)
+    return Policy(
+        keep=keep or None,
+        older_than=cutoff(older_than, now) if older_than else None,
+        max_bytes=max_bytes or None,
+    )
+
+
+def apply(store: Storage, rules: Policy) -> int:
+    """Remove what ``rules`` don't allow; return how many entries went."""
+    if not rules:
+        return 0
+    return store.clean(keep_last=rules.keep, older_than=rules.older_than, max_bytes=rules.max_bytes)
+
+
+def maybe_apply(
+    store: Storage, config: dict, now: float | None = None, appends: int = 1
+) -> int | None:
+    """Called after each append (of ``appends`` entries): apply the policy if a check is due.
+
+    Returns the entries removed, or None if no check was due.
+    """
+    section = config.get("retention", {})
+    now = time.time() if now is None else now
+    every = int(section.get("every", 100))
+    interval = float(section.get("interval", 60)) * 60
+    with locked_json(store.base_dir / STATE_NAME) as state:
+        appends += state.get("appends", 0)
+        last = state.get("checked", 0.0)
+        if appends < every and now - last < interval:
+            state["appends"] = appends
+            return None
+        state.update(appends=0, checked=now)
+    try:
+        rules = policy(config, now)
+    except ValueError:
+        return None  # a malformed policy disables it rather than failing record
+    return apply(store, rules)
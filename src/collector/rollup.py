@@ -0,0 +1,296 @@
+"""Session counts per day, directory and source, kept up to date on append.
+
+``rollups/`` in the storage directory holds one file per month,
+``YYYY-MM.json``: ``{day: {cwd: {source: count}}}`` (UTC days, as in the
+entry timestamps), so an append rewrites a month's worth of counters at
+most and a query only reads the months in its range. ``state.json``
+records the size of ``sessions.jsonl`` the rollup covers, how many entries
+that is and, while the two files are known to agree, the size of ``sessions.txt``: ``list`` copies
+that file only if it has a line per entry. ``Storage``
+applies each append under its lock, but only if the rollup was current
+when the append started; otherwise (an older version wrote the entries,
+a crash, the files were deleted or edited) the rollup is stale and the
+next query rebuilds it from ``sessions.jsonl``.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collector.storage import SessionEntry, Storage
+
+ROLLUP_DIR = "rollups"
+STATE_NAME = "state.json"
+
+
+def apply(
+    base_dir: Path,
+    entries: Iterable[SessionEntry],
+    before: int,
+    after: int,
+    txt: tuple[int, int] | None = None,
+) -> None:
+    """Count appended ``entries``, which took ``sessions.jsonl`` from ``before`` to ``after`` bytes.
+
+    ``txt`` is the same for ``sessions.txt``. Called with the storage lock held.
+    """
+    rollup_dir = base_dir / ROLLUP_DIR
+    state = _read_json(rollup_dir / STATE_NAME)
+    if state is None and before == 0:
+        # A brand-new store: start from scratch, whatever is lying around
+        write_all(base_dir, [], 0)
+        state = {"jsonl_bytes": 0, "entries": 0, "txt_bytes": 0}
+    elif state is None or state.get("jsonl_bytes") != before:
+        return  # stale: left for the next query to rebuild
+    new_state = {"jsonl_bytes": after}
+    if txt is not None and state.get("txt_bytes") == txt[0]:
+        new_state["txt_bytes"] = txt[1]
+    months: dict[str, dict] = {}
+    n = 0
+    for entry in entries:
+        day = entry.timestamp[:10]
+        month = months.get(day[:7])
+        if month is None:
+            month = months[day[:7]] = _read_json(rollup_dir / f"{day[:7]}.json") or {}
+        _count(month, day, entry.cwd, entry.source)
+        n += 1
+    if "entries" in state:
+        new_state["entries"] = state["entries"] + n
+    try:
+        # Months first: a crash in between leaves the state behind, i.e. stale
+        for name, month in months.items():
+            _write_json(rollup_dir / f"{name}.json", month)
+        _write_json(rollup_dir / STATE_NAME, new_state)
+    except OSError:
+        pass  # the append itself succeeded; the stale rollup gets rebuilt
+
+
+def drop(
+    base_dir: Path,
+    entries: Iterable[SessionEntry],
+    before: int,
+    after: int,
+    txt_bytes: int | None = None,
+) -> None:
+    """Uncount ``entries``, which a clean removed, taking ``sessions.jsonl`` from ``before`` to ``after`` bytes.
+
+    ``txt_bytes`` is the size of the ``sessions.txt`` written to match.
+    Called with the storage lock held.
+    """
+    rollup_dir = base_dir / ROLLUP_DIR
+    state = _read_json(rollup_dir / STATE_NAME)
+    if state is None or state.get("jsonl_bytes") != before:
+        return
+    months: dict[str, dict] = {}
+    n = 0
+    for entry in entries:
+        day = entry.timestamp[:10]
+        month = months.get(day[:7])
+        if month is None:
+            month = months[day[:7]] = _read_json(rollup_dir / f"{day[:7]}.json") or {}
+        _count(month, day, entry.cwd, entry.source, -1)
+        n += 1
+    try:
+        for name, month in months.items():
+            if month:
+                _write_json(rollup_dir / f"{name}.json", month)
+            else:
+                (rollup_dir / f"{name}.json").unlink(missing_ok=True)
+        new_state = {"jsonl_bytes": after}
+        if "entries" in state:
+            new_state["entries"] = state["entries"] - n
+        if txt_bytes is not None:
+            new_state["txt_bytes"] = txt_bytes
+        _write_json(rollup_dir / STATE_NAME, new_state)
+    except OSError:
+        pass
+
+
+def entry_count(base_dir: Path, jsonl_bytes: int) -> int | None:
+    """Entries in ``sessions.jsonl`` at ``jsonl_bytes``, or None if the rollup doesn't know."""
+    state = _read_json(base_dir / ROLLUP_DIR / STATE_NAME) or {}
+    if state.get("jsonl_bytes") != jsonl_bytes:
+        return None
+    return state.get("entries")
+
+
+def txt_in_sync(base_dir: Path, jsonl_bytes: int, txt_bytes: int) -> bool:
+    """Whether ``sessions.txt`` at ``txt_bytes`` is known to have a line per entry."""
+    state = _read_json(base_dir / ROLLUP_DIR / STATE_NAME) or {}
+    return state.get("jsonl_bytes") == jsonl_bytes and state.get("txt_bytes") == txt_bytes
+
+
+def mark_txt_in_sync(base_dir: Path, jsonl_bytes: int, txt_bytes: int) -> None:
+    """Record that the files agree at these sizes (storage lock held, shared is enough)."""
+    path = base_dir / ROLLUP_DIR / STATE_NAME
+    state = _read_json(path)
+    if state is None or state.get("jsonl_bytes") != jsonl_bytes:
+        return  # stale: the rebuild by the next query starts over
+    try:
+        _write_json(path, {**state, "txt_bytes": txt_bytes})
+    except OSError:
+        pass
+
+
+def rebuild(store: Storage) -> None:
+    """Recount everything in ``sessions.jsonl`` (takes the storage lock)."""
+    from collector.storage import _parse_jsonl
+
+    with store._locked(fcntl.LOCK_EX):
+        try:
+            content = store.jsonl_file.read_bytes()
+        except FileNotFoundError:
+            content = b""
+        write_all(store.base_dir, _parse_jsonl(content.decode()), len(content))
+
+
+def write_all(base_dir: Path, entries: Iterable[SessionEntry], jsonl_bytes: int) -> None:
+    """Replace the rollup with counts of ``entries`` (storage lock held)."""
+    import shutil
+
+    months: dict[str, dict] = {}
+    n = 0
+    for entry in entries:
+        day = entry.timestamp[:10]
+        _count(months.setdefault(day[:7], {}), day, entry.cwd, entry.source)
+        n += 1
+    rollup_dir = base_dir / ROLLUP_DIR
+    shutil.rmtree(rollup_dir, ignore_errors=True)
+    rollup_dir.mkdir()
+    for name, month in months.items():
+        _write_json(rollup_dir / f"{name}.json", month)
+    _write_json(rollup_dir / STATE_NAME, {"jsonl_bytes": jsonl_bytes, "entries": n})
+
+
+@dataclass
+class Counts:
+    total: int = 0
+    by_day: dict[str, int] = field(default_factory=dict)
+    by_cwd: dict[str, int] = field(default_factory=dict)
+    by_source: dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "by_day": self.by_day,
+            "by_cwd": self.by_cwd,
+            "by_source": self.by_source,
+        }
+
+
+def query(
+    store: Storage,
+    since: str | None = None,
+    until: str | None = None,
+    cwd: str | None = None,
+    source: str | None = None,
+) -> Counts:
+    """Sessions between the ``since`` and ``until`` days (``YYYY-MM-DD``, inclusive).
+
+    ``cwd`` matches that directory and everything below it. The rollup is
+    rebuilt first if it no longer matches ``sessions.jsonl``.
+    """
+    store.merge_spool()
+    first, last = (since or "")[:7], (until or "9999-12")[:7]
+    if cwd:
+        cwd = cwd.rstrip("/")
+    months = _load(store, first, last)
+    if months is None:
+        rebuild(store)
+        months = _load(store, first, last) or {}
+    counts = Counts()
+    for name in sorted(months):
+        for day, dirs in sorted(months[name].items()):
+            if (since and day < since) or (until and day > until):
+                continue
+            for directory, sources in dirs.items():
+                if cwd is not None and directory != cwd and not directory.startswith(cwd + "/"):
+                    continue
+                for src, n in sources.items():
+                    if source and src != source:
+                        continue
+                    counts.total += n
+                    counts.by_day[day] = counts.by_day.get(day, 0) + n
+                    counts.by_cwd[directory] = counts.by_cwd.get(directory, 0) + n
+                    counts.by_source[src] = counts.by_source.get(src, 0) + n
+    return counts
+
+
+def parse_since(value: str, today: str | None = None) -> str:
+    """``YYYY-MM-DD``, ``today``, ``week`` (since Monday), ``month`` or ``Nd`` (N days back)."""
+    today = today or time.strftime("%Y-%m-%d", time.gmtime())
+    if value == "today":
+        return today
+    if value == "week":
+        weekday = time.strptime(today, "%Y-%m-%d").tm_wday
+        return _days_before(today, weekday)
+    if value == "month":
+        return today[:8] + "01"
+    if value.endswith("d") and value[:-1].isdigit():
+        return _days_before(today, int(value[:-1]))
+    time.strptime(value, "%Y-%m-%d")  # ValueError if malformed
+    return value
+
+
+def _days_before(day: str, days: int) -> str:
+    import calendar
+
+    epoch = calendar.timegm(time.strptime(day, "%Y-%m-%d"))
+    return time.strftime("%Y-%m-%d", time.gmtime(epoch - days * 86400))
+
+
+def _load(store: Storage, first: str, last: str) -> dict[str, dict] | None:
+    """The rollup's months from ``first`` to ``last`` (``YYYY-MM``), or None if stale."""
+    rollup_dir = store.base_dir / ROLLUP_DIR
+    with store._locked(fcntl.LOCK_SH):
+        state = _read_json(rollup_dir / STATE_NAME)
+        try:
+            size = store.jsonl_file.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if state is None or state.get("jsonl_bytes") != size:
+            return None
+        months = {}
+        for path in rollup_dir.glob("????-??.json"):
+            if not first <= path.stem <= last:
+                continue
+            month = _read_json(path)
+            if month is None:
+                return None
+            months[path.stem] = month
+    return months
+
+
+def _count(month: dict, day: str, cwd: str, source: str, n: int = 1) -> None:
+    dirs = month.setdefault(day, {})
+    sources = dirs.setdefault(cwd, {})
+    sources[source] = sources.get(source, 0) + n
+    if sources[source] <= 0:
+        # Only reached by drop: keep emptied days and directories out of the files
+        del sources[source]
+        if not sources:
+            del dirs[cwd]
+            if not dirs:
+                del month[day]
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        data = json.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":")))
+    os.replace(tmp, path)
@@ -0,0 +1,212 @@
+"""HTTP ingest server: one central store fed by collectors on other machines.
+
+``serve`` accepts ``POST /sessions`` with a JSON object, a JSON array or
+NDJSON (one entry per line), as sent by the ``collector`` notification
+backend, and answers ``{"accepted": N}`` once the entries are stored.
+``GET /health`` answers ``{"ok": true}``. Connections are kept alive
+(HTTP/1.1), and with ``serve.token`` set every request needs
+``Authorization: Bearer <token>``.
+
+Requests arriving together are group-committed: whichever handler finds
+no write in progress appends everything queued so far with one
+``Storage.append_many`` (one lock, one write per file) while the others
+wait for it, so a burst from many machines costs a few lock acquisitions
+instead of one per entry.
+"""
+
+from __future__ import annotations
+
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from collector.capture import URL_PATTERN
+from collector.storage import SessionEntry, Storage
+
+PATH = "/sessions"
+
+# Largest request body accepted
+MAX_BODY = 1 << 20
+
+
+class BadRequest(ValueError):
+    """The request body isn't a session entry, or a batch of them."""
+
+
+class GroupCommit:
+    """Appends entries submitted by concurrent threads in shared batches."""
+
+    def __init__(self, store: Storage):
+        self.store = store
+        self.batches = 0
+        self._cond = threading.Condition()
+        self._pending: list[SessionEntry] = []
+        self._committing = False
+        # Number of the batch being gathered, and of the last one written
+        self._open = 1
+        self._done = 0
+        self._errors: dict[int, Exception] = {}
+
+    def submit(self, entries: list[SessionEntry]) -> None:
+        """Return once ``entries`` are stored; raise if their batch failed."""
+        with self._cond:
+            ticket = self._open
+            self._pending += entries
+            while self._done < ticket:
+                if self._committing:
+                    self._cond.wait()
+                    continue
+                self._committing = True
+                batch, number = self._pending, self._open
+                self._pending = []
+                self._open += 1
+                self._cond.release()
+                try:
+                    self.store.append_many(batch)
+                except Exception as e:
+                    self._errors[number] = e
+                finally:
+                    self._cond.acquire()
+                    self._committing = False
+                    self._done = number
+                    self.batches += 1
+                    self._cond.notify_all()
+            error = self._errors.get(ticket)
+        if error is not None:
+            raise error
+
+
+def parse_entries(body: bytes, content_type: str = "") -> list[SessionEntry]:
+    """Entries from a JSON object, a JSON array or NDJSON."""
+    try:
+        text = body.decode()
+        if "ndjson" in content_type or "jsonlines" in content_type:
+            items = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            data = json.loads(text)
+            items = data if isinstance(data, list) else [data]
+    except ValueError as e:
+        raise BadRequest(f"Malformed JSON: {e}") from None
+    if not items:
+        raise BadRequest("No entries")
+    return [_entry(item) for item in items]
+
+
+def _entry(item: object) -> SessionEntry:
+    if not isinstance(item, dict):
+        raise BadRequest("Entries must be JSON objects")
+    url = item.get("url")
+    if not isinstance(url, str) or not URL_PATTERN.fullmatch(url):
+        raise BadRequest(f"Invalid session URL: {str(url)[:100]}")
+    fields = {k: item.get(k, "") for k in ("timestamp", "cwd", "source", "host")}
+    if not all(isinstance(v, str) for v in fields.values()):
+        raise BadRequest("timestamp, cwd, source and host must be strings")
+    return SessionEntry(
+        timestamp=fields["timestamp"] or time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        session_id=url.split("session_", 1)[-1],
+        url=url,
+        cwd=fields["cwd"],
+        source=fields["source"],
+        host=fields["host"],
+    ).received_from()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; avoid Nagle delays on kept-alive connections
+    disable_nagle_algorithm = True
+    # Drop idle kept-alive connections after this many seconds
+    timeout = 60
+
+    server: IngestServer
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._reply(404, {"error": "Not found"})
+        elif self._authorized():
+            self._reply(200, {"ok": True})
+
+    def do_POST(self) -> None:
+        if self.path != PATH:
+            self._reply(404, {"error": "Not found"})
+            self._discard_body()
+            return
+        if not self._authorized():
+            self._discard_body()
+            return
+        length = self.headers.get("Content-Length")
+        if length is None or not length.isdigit():
+            self._reply(411, {"error": "Content-Length required"})
+            self.close_connection = True
+            return
+        if int(length) > MAX_BODY:
+            self._reply(413, {"error": f"Body over {MAX_BODY} bytes"})
+            self.close_connection = True
+            return
+        body = self.rfile.read(int(length))
+        try:
+            entries = parse_entries(body, self.headers.get("Content-Type", ""))
+            self.server.commit.submit(entries)
+        except BadRequest as e:
+            self._reply(400, {"error": str(e)})
+            return
+        except OSError as e:
+            self._reply(500, {"error": f"Cannot store entries: {e}"})
+            return
+        self._reply(200, {"accepted": len(entries)})
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token:
+            return True
+        given = self.headers.get("Authorization", "")
+        if hmac.compare_digest(given.encode(), f"Bearer {token}".encode()):
+            return True
+        self._reply(401, {"error": "Unauthorized"})
+        return False
+
+    def _discard_body(self) -> None:
+        length = self.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) <= MAX_BODY:
+            self.rfile.read(int(length))
+        else:
+            self.close_connection = True
+
+    def _reply(self, status: int, data: dict) -> None:
+        payload = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: object) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class IngestServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when many collectors connect at once
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        store: Storage,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        token: str = "",
+        verbose: bool = False,
+    ):
+        super().__init__((host, port), _Handler)
+        self.store = store
+        self.commit = GroupCommit(store)
+        self.token = token
+        self.verbose = verbose
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
@@ -6,10 +6,9 @@ import json
 import sys
 import time
 import urllib.error
-import urllib.request
 
-from collector import config
-from collector.notifier import get_notifier
+from collector import config, httppool
+from collector.notifier import create_notifier
 from collector.storage import SessionEntry
 
 
@@ -79,17 +78,19 @@ def setup_telegram() -> None:
 
     # Step 4: Save config
     print("\nSaving configuration...", end=" ", flush=True)
-    config.set_value("notify.enabled", "true")
-    config.set_value("notify.backend", "telegram")
-    config.set_value("notify.telegram.bot_token", bot_token)
-    config.set_value("notify.telegram.chat_id", chat_id)
-    config.set_value("notify.telegram.message_template", template)
+    config.update({
+        "notify.enabled": True,
+        "notify.backend": "telegram",
+        "notify.telegram.bot_token": bot_token,
+        "notify.telegram.chat_id": chat_id,
+        "notify.telegram.message_template": template,
+    })
     print("OK")
 
     # Step 5: Test message
     print("\nSending test message...", end=" ", flush=True)
     cfg = config.load_config()
-    notifier = get_notifier(cfg)
+    notifier = create_notifier("telegram", cfg)
     test_entry = SessionEntry(
         timestamp="2026-01-01T00:00:00Z",
         session_id="test_setup",
@@ -108,7 +109,7 @@ def setup_telegram() -> None:
     print()
     auto = _prompt("Enable auto-notify on session capture? (Y/n): ").strip().lower()
     if auto != "n":
-        config.set_value("notify.auto_notify", "true")
+        config.update({"notify.auto_notify": True})
         print("Auto-notify enabled. New sessions will be sent to Telegram automatically.")
     else:
         print("Auto-notify disabled. Use 'claude-remote-collector notify' to send manually.")
@@ -127,15 +128,17 @@ def setup_webhook() -> None:
 
     method = _prompt("HTTP method (POST/GET) [POST]: ").strip().upper() or "POST"
 
-    config.set_value("notify.enabled", "true")
-    config.set_value("notify.backend", "webhook")
-    config.set_value("notify.webhook.url", url)
-    config.set_value("notify.webhook.method", method)
+    config.update({
+        "notify.enabled": True,
+        "notify.backend": "webhook",
+        "notify.webhook.url": url,
+        "notify.webhook.method": method,
+    })
 
     # Test
     print("\nSending test request...", end=" ", flush=True)
     cfg = config.load_config()
-    notifier = get_notifier(cfg)
+    notifier = create_notifier("webhook", cfg)
     test_entry = SessionEntry(
         timestamp="2026-01-01T00:00:00Z",
         session_id="test_setup",
@@ -149,7 +152,7 @@ def setup_webhook() -> None:
 
     auto = _prompt("\nEnable auto-notify? (Y/n): ").strip().lower()
     if auto != "n":
-        config.set_value("notify.auto_notify", "true")
+        config.update({"notify.auto_notify": True})
 
     print(f"\nSetup complete! Config saved to: {config.CONFIG_FILE}")
 
@@ -168,16 +171,18 @@ def setup_ntfy() -> None:
     server = _prompt("Server URL [https://ntfy.sh]: ").strip() or "https://ntfy.sh"
     priority = _prompt("Priority (min/low/default/high/max) [default]: ").strip() or "default"
 
-    config.set_value("notify.enabled", "true")
-    config.set_value("notify.backend", "ntfy")
-    config.set_value("notify.ntfy.topic", topic)
-    config.set_value("notify.ntfy.server", server)
-    config.set_value("notify.ntfy.priority", priority)
+    config.update({
+        "notify.enabled": True,
+        "notify.backend": "ntfy",
+        "notify.ntfy.topic": topic,
+        "notify.ntfy.server": server,
+        "notify.ntfy.priority": priority,
+    })
 
     # Test
     print("\nSending test notification...", end=" ", flush=True)
     cfg = config.load_config()
-    notifier = get_notifier(cfg)
+    notifier = create_notifier("ntfy", cfg)
     test_entry = SessionEntry(
         timestamp="2026-01-01T00:00:00Z",
         session_id="test_setup",
@@ -192,7 +197,7 @@ def setup_ntfy() -> None:
 
     auto = _prompt("\nEnable auto-notify? (Y/n): ").strip().lower()
     if auto != "n":
-        config.set_value("notify.auto_notify", "true")
+        config.update({"notify.auto_notify": True})
 
     print(f"\nSetup complete! Config saved to: {config.CONFIG_FILE}")
 
@@ -213,7 +218,7 @@ def _telegram_get_me(token: str) -> dict | None:
     """Validate a Telegram bot token by calling getMe."""
     url = f"https://api.telegram.org/bot{token}/getMe"
     try:
-        with urllib.request.urlopen(url, timeout=10) as resp:
+        with httppool.urlopen(url, timeout=10) as resp:
             data = json.loads(resp.read())
             if data.get("ok"):
                 return data.get("result", {})
@@ -227,7 +232,7 @@ def _telegram_detect_chat_id(token: str, retries: int = 3, delay: float = 2.0) -
     url = f"https://api.telegram.org/bot{token}/getUpdates?limit=5&timeout=5"
     for _ in range(retries):
         try:
-            with urllib.request.urlopen(url, timeout=15) as resp:
+            with httppool.urlopen(url, timeout=15) as resp:
                 data = json.loads(resp.read())
                 if data.get("ok") and data.get("result"):
                     # Return the chat_id from the most recent message
@@ -0,0 +1,40 @@
+"""Small JSON state files shared between processes under an ``fcntl`` lock."""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+@contextmanager
+def locked_json(path: Path) -> Iterator[dict]:
+    """Yield the file's JSON object under an exclusive lock; write back changes.
+
+    A missing or corrupt file reads as ``{}``. The file is only rewritten
+    if the dict was modified and the block exited normally.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        raw = b""
+        while chunk := os.read(fd, 1 << 16):
+            raw += chunk
+        try:
+            state = json.loads(raw) if raw else {}
+        except json.JSONDecodeError:
+            state = {}
+        original = json.dumps(state, sort_keys=True)
+        yield state
+        data = json.dumps(state, sort_keys=True)
+        if data != original:
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, data.encode())
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
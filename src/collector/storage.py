@@ -2,16 +2,38 @@
 
 from __future__ import annotations
 
+import errno
 import fcntl
 import json
-from dataclasses import dataclass
+import os
+import stat
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import BinaryIO
 
+from collector import rollup
 
 DEFAULT_DIR = Path.home() / ".claude-remote-sessions"
 
 URL_PREFIX = "https://claude.ai/code/session_"
 
+# Spool size at which record starts a merge before the interval is up
+SPOOL_BATCH_BYTES = 64 * 1024
+
+
+def spool_dir() -> Path:
+    """Where spool mode keeps entries until they are merged: local, per user.
+
+    ``CRC_SPOOL_DIR`` overrides it, e.g. with a directory under
+    ``$XDG_RUNTIME_DIR`` (which is emptied at logout, so only for
+    sessions that outlive a merge interval).
+    """
+    default = f"/var/tmp/claude-remote-collector-{os.getuid()}"
+    return Path(os.environ.get("CRC_SPOOL_DIR") or default)
+
 
 @dataclass
 class SessionEntry:
@@ -20,19 +42,36 @@ class SessionEntry:
     url: str
     cwd: str = ""
     source: str = ""
+    # Monotonic stage timestamps for latency tracing (see collector.trace)
+    trace: dict[str, float] | None = None
+    # Machine that forwarded the entry to a central `serve` (see collector.server)
+    host: str = ""
 
     def to_dict(self) -> dict:
-        return {
+        d = {
             "timestamp": self.timestamp,
             "session_id": self.session_id,
             "url": self.url,
             "cwd": self.cwd,
             "source": self.source,
         }
+        if self.trace is not None:
+            d["trace"] = self.trace
+        if self.host:
+            d["host"] = self.host
+        return d
 
     def to_text_line(self) -> str:
         return f"{self.timestamp} {self.url}"
 
+    def received_from(self, host: str = "") -> SessionEntry:
+        """This entry as stored after arriving from another machine.
+
+        The trace is dropped (monotonic stamps from another machine mean
+        nothing here) and ``host`` filled in unless the entry names one.
+        """
+        return replace(self, trace=None, host=self.host or host)
+
     @classmethod
     def from_dict(cls, d: dict) -> SessionEntry:
         return cls(
@@ -41,6 +80,8 @@ class SessionEntry:
             url=d.get("url", ""),
             cwd=d.get("cwd", ""),
             source=d.get("source", ""),
+            trace=d.get("trace"),
+            host=d.get("host", ""),
         )
 
     @classmethod
@@ -57,72 +98,472 @@ class SessionEntry:
 
 
 class Storage:
-    def __init__(self, base_dir: Path | None = None):
+    def __init__(self, base_dir: Path | None = None, spool: bool = False):
         self.base_dir = base_dir or DEFAULT_DIR
         self.txt_file = self.base_dir / "sessions.txt"
         self.jsonl_file = self.base_dir / "sessions.jsonl"
         self.lock_file = self.base_dir / ".lock"
-        self.base_dir.mkdir(parents=True, exist_ok=True)
+        # Appends go to a local spool first (see append_many); readers
+        # always check it, a stat on the local disk
+        self.spool = spool
+        self.spool_file = spool_dir() / (
+            os.path.abspath(self.base_dir).replace("/", "_") + ".jsonl"
+        )
+        if not spool:
+            # In spool mode even this is a round trip to the file server
+            self.base_dir.mkdir(parents=True, exist_ok=True)
+        # Seconds spent waiting for the lock: the last acquisition, and in total
+        self.last_lock_wait = 0.0
+        self.lock_wait = 0.0
 
-    def append(self, entry: SessionEntry) -> None:
-        """Append an entry to both files under a single lock."""
+    @contextmanager
+    def _locked(self, operation: int) -> Iterator[None]:
         with open(self.lock_file, "w") as lock:
+            start = time.perf_counter()
+            fcntl.flock(lock, operation)
+            self.last_lock_wait = time.perf_counter() - start
+            self.lock_wait += self.last_lock_wait
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _spool_locked(self, suffix: str) -> Iterator[None]:
+        with open(self.spool_file.with_suffix(suffix), "w") as lock:
             fcntl.flock(lock, fcntl.LOCK_EX)
             try:
-                with open(self.txt_file, "a") as f:
-                    f.write(entry.to_text_line() + "\n")
-                with open(self.jsonl_file, "a") as f:
-                    f.write(json.dumps(entry.to_dict()) + "\n")
+                yield
             finally:
                 fcntl.flock(lock, fcntl.LOCK_UN)
 
-    def read_all(self) -> list[SessionEntry]:
-        if not self.jsonl_file.exists():
-            return []
-        with open(self.lock_file, "w") as lock:
-            fcntl.flock(lock, fcntl.LOCK_SH)
+    def append(self, entry: SessionEntry) -> None:
+        """Append an entry to both files under a single lock.
+
+        The per-day rollup (see ``collector.rollup``) is updated under the
+        same lock. A traced entry gets its ``stored`` stage stamped once the lock is held.
+        """
+        self.append_many([entry])
+
+    def append_many(self, entries: list[SessionEntry]) -> None:
+        """Append ``entries`` with one lock acquisition and one write per file.
+
+        In spool mode they go to the local spool instead, for
+        ``merge_spool`` to move into the store; if the spool can't be
+        used, straight to the store after all (and ``spool`` is cleared).
+        """
+        if not entries:
+            return
+        if self.spool:
             try:
-                content = self.jsonl_file.read_text()
+                self._append_spool(entries)
+                return
+            except OSError:
+                self.spool = False
+                self.base_dir.mkdir(parents=True, exist_ok=True)
+        with self._locked(fcntl.LOCK_EX):
+            _stamp_stored(entries)
+            self._append_locked(entries)
+
+    def _append_locked(self, entries: list[SessionEntry]) -> None:
+        with open(self.txt_file, "a") as f:
+            txt_before = f.tell()
+            f.write("".join(e.to_text_line() + "\n" for e in entries))
+            txt_after = f.tell()
+        with open(self.jsonl_file, "a") as f:
+            before = f.tell()
+            f.write("".join(json.dumps(e.to_dict()) + "\n" for e in entries))
+            after = f.tell()
+        rollup.apply(self.base_dir, entries, before, after, txt=(txt_before, txt_after))
+
+    def _append_spool(self, entries: list[SessionEntry]) -> None:
+        _private_dir(self.spool_file.parent)
+        with self._spool_locked(".lock"):
+            _stamp_stored(entries)
+            with open(self.spool_file, "a") as f:
+                f.write("".join(json.dumps(e.to_dict()) + "\n" for e in entries))
+
+    def spool_due(self, interval: float, max_bytes: int = SPOOL_BATCH_BYTES) -> bool:
+        """Whether the spool should be merged: it is large, or ``interval`` seconds passed.
+
+        Checking marks the spool as handled, so records that follow don't
+        each start a merge of their own.
+        """
+        marker = self.spool_file.with_suffix(".merged")
+        try:
+            size = self.spool_file.stat().st_size
+            since = time.time() - marker.stat().st_mtime
+        except FileNotFoundError:
+            size, since = 1, interval  # never merged: start the clock
+        if size < max_bytes and since < interval:
+            return False
+        marker.touch()
+        return True
+
+    def merge_scheduled(self) -> bool:
+        """Whether a delayed ``merge-spool`` is waiting to run (see ``merge_schedule``)."""
+        try:
+            with self.merge_schedule() as elected:
+                return not elected
+        except OSError:
+            return False
+
+    @contextmanager
+    def merge_schedule(self) -> Iterator[bool]:
+        """Non-blocking lock a delayed ``merge-spool`` holds while it waits.
+
+        Yields whether it was acquired. The waiting worker lets go before
+        it merges, so an entry spooled after that schedules another one.
+        """
+        with open(self.spool_file.with_suffix(".merge-wait"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
             finally:
                 fcntl.flock(lock, fcntl.LOCK_UN)
-        entries = []
-        for line in content.splitlines():
-            line = line.strip()
-            if line:
+
+    def merge_spool(self) -> list[SessionEntry]:
+        """Move spooled entries into the store under one lock; return them.
+
+        The spool is renamed aside (under the local spool lock, so
+        ``record`` waits for a rename, never for the file server), then
+        appended; a batch left behind by a crash is merged first. Only the
+        entries of an interrupted merge can end up in the store twice.
+        Merged entries are counted in the metrics.
+        """
+        batch = self.spool_file.with_suffix(".merging")
+        if not (self.spool_file.exists() or batch.exists()):
+            return []
+        merged: list[SessionEntry] = []
+        with self._spool_locked(".merge-lock"):
+            while True:
+                if not batch.exists():
+                    with self._spool_locked(".lock"):
+                        if not self.spool_file.exists():
+                            break
+                        os.replace(self.spool_file, batch)
+                entries = _parse_jsonl(batch.read_text())
+                if entries:
+                    self.base_dir.mkdir(parents=True, exist_ok=True)
+                    with self._locked(fcntl.LOCK_EX):
+                        self._append_locked(entries)
+                batch.unlink()
+                merged += entries
+        if merged:
+            from collector import metrics
+
+            metrics.observe_records(self, merged)
+        return merged
+
+    def read_all(self) -> list[SessionEntry]:
+        self.merge_spool()
+        if not self.jsonl_file.exists():
+            return []
+        with self._locked(fcntl.LOCK_SH):
+            content = self.jsonl_file.read_text()
+        return _parse_jsonl(content)
+
+    def copy_jsonl(self, out: int, last: int = 0) -> int:
+        """Copy ``sessions.jsonl`` (its ``last`` lines, if set) to file descriptor ``out``.
+
+        The bytes go out as stored, without decoding, through
+        ``os.sendfile`` where the kernel supports it. The lock is only
+        held to take a snapshot of the size: the copy reads the opened
+        file, which a concurrent ``clean`` replaces rather than rewrites,
+        and stops where the file ended, so a slow reader on the other end
+        never holds up ``record``. Returns the bytes copied.
+        """
+        self.merge_spool()
+        try:
+            f = open(self.jsonl_file, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            with self._locked(fcntl.LOCK_SH):
+                size = os.fstat(f.fileno()).st_size
+            return _copy_lines(f, size, out, last)
+
+    def copy_txt(self, out: int, last: int = 0) -> int | None:
+        """Like ``copy_jsonl``, for ``sessions.txt``: what ``list`` prints.
+
+        None, with nothing copied, if ``sessions.txt`` doesn't have a line
+        per entry (written by an older version, edited by hand); the
+        entries have to be decoded then.
+        """
+        self.merge_spool()
+        try:
+            f = open(self.txt_file, "rb")
+        except FileNotFoundError:
+            return 0 if not self.jsonl_file.exists() else None
+        with f:
+            with self._locked(fcntl.LOCK_SH):
+                size = os.fstat(f.fileno()).st_size
                 try:
-                    entries.append(SessionEntry.from_dict(json.loads(line)))
-                except (json.JSONDecodeError, KeyError):
-                    continue
-        return entries
+                    jsonl_size = self.jsonl_file.stat().st_size
+                except FileNotFoundError:
+                    jsonl_size = 0
+                if not rollup.txt_in_sync(self.base_dir, jsonl_size, size):
+                    # Unknown: count the lines once, and remember if they agree
+                    with open(self.jsonl_file, "rb") as jsonl:
+                        if _count_lines(f, size) != _count_lines(jsonl, jsonl_size):
+                            return None
+                    rollup.mark_txt_in_sync(self.base_dir, jsonl_size, size)
+            return _copy_lines(f, size, out, last)
 
     def read_latest(self, n: int = 1) -> list[SessionEntry]:
         entries = self.read_all()
         return entries[-n:]
 
     def read_txt(self) -> str:
+        self.merge_spool()
         if not self.txt_file.exists():
             return ""
         return self.txt_file.read_text()
 
-    def clean(self, keep_last: int = 10) -> int:
-        entries = self.read_all()
-        if len(entries) <= keep_last:
+    def clean(
+        self,
+        keep_last: int | None = 10,
+        older_than: str | None = None,
+        max_bytes: int | None = None,
+    ) -> int:
+        """Drop old entries from the front of the store; return how many went.
+
+        An entry goes if it is not among the newest ``keep_last``, if
+        ``sessions.jsonl`` would otherwise exceed ``max_bytes``, or if it
+        is timestamped before ``older_than`` (a storage timestamp). The
+        cut point is found without decoding the store: by counting lines
+        back from the end, by size, and by a binary search on the
+        timestamps, which are appended in time order. Only the dropped
+        entries are decoded, to take them out of the rollup. If ``sync``
+        or ``serve`` added one that is newer than ``older_than`` before
+        older entries, it is kept. An older entry after the cut stays until
+        the entries before it go.
+
+        Reading and rewriting happen under one exclusive lock, so entries
+        appended meanwhile can't be lost.
+        """
+        self.merge_spool()
+        if not self.jsonl_file.exists():
             return 0
-        removed = len(entries) - keep_last
-        kept = entries[-keep_last:]
+        with self._locked(fcntl.LOCK_EX):
+            content = self.jsonl_file.read_bytes()
+            hard_cut = max(
+                _tail_start(content, keep_last) if keep_last is not None else 0,
+                _size_cut(content, max_bytes) if max_bytes is not None else 0,
+            )
+            age_cut = _age_cut(content, older_than) if older_than else 0
+            cut = max(hard_cut, age_cut)
+            if not cut:
+                return 0
+            dropped: list[SessionEntry] = []
+            rescued: list[tuple[int, bytes]] = []  # (line number, line)
+            offset = 0
+            lines = content[:cut].splitlines(keepends=True)
+            for n, line in enumerate(lines):
+                entry = _parse_line(line)
+                if entry is None:
+                    pass  # malformed: dropped without a trace
+                elif older_than and offset >= hard_cut and entry.timestamp >= older_than:
+                    rescued.append((n, line))
+                else:
+                    dropped.append(entry)
+                offset += len(line)
+            jsonl = b"".join(line for _, line in rescued) + content[cut:]
+            txt_bytes = self._replace_txt(content, len(lines), rescued, jsonl)
+            _replace(self.jsonl_file, jsonl)
+            rollup.drop(self.base_dir, dropped, len(content), len(jsonl), txt_bytes)
+            from collector import trace
 
-        with open(self.lock_file, "w") as lock:
-            fcntl.flock(lock, fcntl.LOCK_EX)
-            try:
-                self.jsonl_file.write_text(
-                    "\n".join(json.dumps(e.to_dict()) for e in kept) + "\n"
-                )
-                self.txt_file.write_text(
-                    "\n".join(e.to_text_line() for e in kept) + "\n"
-                )
-            finally:
-                fcntl.flock(lock, fcntl.LOCK_UN)
-        return removed
+            kept = {e.session_id for _, line in rescued if (e := _parse_line(line))}
+            trace.drop(self.base_dir, {e.session_id for e in dropped} - kept)
+        return len(dropped)
+
+    def _replace_txt(
+        self, content: bytes, cut_lines: int, rescued: list[tuple[int, bytes]], jsonl: bytes
+    ) -> int:
+        """Drop the same lines from ``sessions.txt``, or rebuild it if the files disagree.
+
+        Returns the new size: ``sessions.txt`` has a line per entry now.
+        """
+        try:
+            txt = self.txt_file.read_bytes()
+        except FileNotFoundError:
+            txt = b""
+        lines = content.count(b"\n")
+        if txt.count(b"\n") == lines and content.endswith(b"\n") and txt.endswith(b"\n"):
+            if rescued:
+                txt_lines = txt.splitlines(keepends=True)
+                kept = b"".join(txt_lines[n] for n, _ in rescued) + b"".join(txt_lines[cut_lines:])
+            else:
+                pos = 0
+                for _ in range(cut_lines):
+                    pos = txt.index(b"\n", pos) + 1
+                kept = txt[pos:]
+        else:
+            entries = _parse_jsonl(jsonl.decode())
+            kept = "".join(e.to_text_line() + "\n" for e in entries).encode()
+        _replace(self.txt_file, kept)
+        return len(kept)
 
     def count(self) -> int:
         return len(self.read_all())
+
+
+def _parse_jsonl(content: str) -> list[SessionEntry]:
+    entries = []
+    for line in content.splitlines():
+        line = line.strip()
+        if line:
+            try:
+                entries.append(SessionEntry.from_dict(json.loads(line)))
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return entries
+
+
+def _stamp_stored(entries: list[SessionEntry]) -> None:
+    stored = round(time.monotonic(), 6)
+    for entry in entries:
+        if entry.trace is not None:
+            entry.trace["stored"] = stored
+
+
+def _private_dir(path: Path) -> None:
+    """Create ``path`` for this user only; refuse one someone else could write to.
+
+    ``/var/tmp`` is shared, so the directory may have been put there (or
+    replaced by a symlink) by another user.
+    """
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise PermissionError(f"{path} is not a private directory")
+
+
+def _parse_line(line: bytes) -> SessionEntry | None:
+    try:
+        return SessionEntry.from_dict(json.loads(line))
+    except (ValueError, AttributeError):
+        return None
+
+
+def _tail_start(content: bytes, n: int) -> int:
+    """Offset where the last ``n`` lines of ``content`` start."""
+    if n <= 0:
+        return len(content)
+    pos = len(content) - 1  # past the final newline
+    for _ in range(n):
+        pos = content.rfind(b"\n", 0, pos)
+        if pos < 0:
+            return 0
+    return pos + 1
+
+
+def _size_cut(content: bytes, max_bytes: int) -> int:
+    """Offset of the first line from which the rest fits in ``max_bytes``."""
+    start = len(content) - max_bytes
+    if start <= 0:
+        return 0
+    return content.find(b"\n", start - 1) + 1 or len(content)
+
+
+def _age_cut(content: bytes, older_than: str) -> int:
+    """Offset of the first line timestamped at or after ``older_than`` (binary search).
+
+    ``lo`` and ``hi`` stay on line starts: lines before ``lo`` are older,
+    lines from ``hi`` on are not. Each step decodes the one line around
+    the midpoint.
+    """
+    lo, hi = 0, len(content)
+    while lo < hi:
+        start = content.rfind(b"\n", lo, (lo + hi) // 2) + 1 or lo
+        end = content.find(b"\n", start) + 1 or len(content)
+        entry = _parse_line(content[start:end])
+        if entry is None or entry.timestamp < older_than:
+            lo = end
+        else:
+            hi = start
+    return lo
+
+
+def _copy_lines(f: BinaryIO, size: int, out: int, last: int) -> int:
+    """Copy the first ``size`` bytes of ``f`` (the ``last`` lines, if set) to ``out``."""
+    start = _tail_offset(f, size, last) if last > 0 else 0
+    copied = _copy_range(f, out, start, size)
+    if copied and _byte_at(f, size - 1) != b"\n":
+        os.write(out, b"\n")
+    return copied
+
+
+def _count_lines(f: BinaryIO, size: int) -> int:
+    f.seek(0)
+    count = 0
+    while size > 0 and (chunk := f.read(min(size, 1 << 20))):
+        count += chunk.count(b"\n")
+        size -= len(chunk)
+    return count
+
+
+def _tail_offset(f: BinaryIO, size: int, n: int) -> int:
+    """Where the last ``n`` lines of the first ``size`` bytes of ``f`` start."""
+    pos, end = size, size - 1  # past the final newline
+    while pos > 0:
+        block = min(1 << 16, pos)
+        pos -= block
+        f.seek(pos)
+        chunk = f.read(block)
+        while end > pos:
+            end = pos + chunk.rfind(b"\n", 0, end - pos)
+            if end < pos:
+                break
+            n -= 1
+            if n == 0:
+                return end + 1
+        end = pos
+    return 0
+
+
+def _copy_range(f: BinaryIO, out: int, start: int, end: int) -> int:
+    """Copy bytes ``start`` to ``end`` of ``f`` to ``out``, kernel-side if possible."""
+    offset = start
+    try:
+        while offset < end:
+            sent = os.sendfile(out, f.fileno(), offset, min(end - offset, 1 << 30))
+            if not sent:
+                break
+            offset += sent
+        return offset - start
+    except OSError as e:
+        if e.errno not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP):
+            raise
+    # No sendfile to this kind of output (or this platform): large buffered writes
+    f.seek(offset)
+    while offset < end:
+        chunk = f.read(min(end - offset, 1 << 20))
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(out, view) :]
+        offset += len(chunk)
+    return offset - start
+
+
+def _byte_at(f: BinaryIO, offset: int) -> bytes:
+    f.seek(offset)
+    return f.read(1)
+
+
+def _replace(path: Path, content: bytes) -> None:
+    """Write ``content`` to a temp file and rename it over ``path``.
+
+    Readers that don't take the lock (``tail``, wrappers) see the old or
+    the new file, never a truncated one.
+    """
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(content)
+    tmp.replace(path)
@@ -0,0 +1,207 @@
+"""Replicate another machine's ``sessions.jsonl`` into the local store.
+
+``sync`` copies only what was appended to the source since the last run.
+``sync.json`` in the storage directory keeps a checkpoint per source:
+the byte offset copied up to, plus a fingerprint of the line just before it
+(its length and hash) and the file's inode. A step re-reads that one line, and
+if it still matches, reads from the offset to the end: the cost is the
+new entries, however large the source is. The fingerprint, not the inode,
+decides: inode numbers are not stable on every network filesystem, but a
+``clean`` on the source rewrites the file, and the line before the offset
+moves or disappears.
+
+If the line doesn't match, the source is rescanned. Copying resumes after the last line this
+checkpoint copied, if the source still has it. Otherwise, any entry the
+local store doesn't already have is copied. Entries are appended in
+batches of up to ``CHUNK`` bytes, and the checkpoint is saved after each
+one, so an interrupted sync (a crash, Ctrl+C under ``--follow``) resumes
+after the last batch it appended. Only a batch interrupted between its
+append and its checkpoint is copied again. Syncs into one store hold
+``.sync.lock`` for the whole run, so concurrent ones don't copy twice.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from collector.statefile import locked_json
+from collector.storage import SessionEntry, Storage
+
+STATE_NAME = "sync.json"
+LOCK_NAME = ".sync.lock"
+
+# Bytes read per batch, so a first sync of a huge source doesn't hold it all
+CHUNK = 4 << 20
+
+
+@dataclass
+class SyncResult:
+    copied: int = 0
+    # The checkpoint didn't match the source (truncated or rewritten)
+    rescanned: bool = False
+    # Lines that aren't entries (a partial last line is left for next time)
+    skipped: int = 0
+
+
+def source_file(path: Path) -> Path:
+    """``path`` itself, or the ``sessions.jsonl`` in a store directory."""
+    return path / "sessions.jsonl" if path.is_dir() else path
+
+
+def sync_once(store: Storage, source: Path, host: str = "") -> SyncResult:
+    """Copy what was appended to ``source`` since the last checkpoint.
+
+    ``host`` tags copied entries that don't name a machine already.
+    """
+    source = source_file(source).resolve()
+    key = str(source)
+    result = SyncResult()
+    with _locked(store), open(source, "rb") as f:
+        with locked_json(store.base_dir / STATE_NAME) as state:
+            checkpoint = state.get(key, {})
+        stat = os.fstat(f.fileno())
+        offset = checkpoint.get("offset", 0)
+        if checkpoint.get("rescan") or (offset and not _matches(f, checkpoint)):
+            result.rescanned = True
+            if not stat.st_size:
+                # Emptied: nothing to compare against until entries arrive
+                result.rescanned = not checkpoint.get("rescan")
+                _save(store, key, {"offset": 0, "inode": stat.st_ino, "rescan": True})
+                return result
+            offset = _resume_offset(f, checkpoint)
+            if offset is None:
+                offset, last = _copy_missing(f, store, host, result)
+                if last is not None:
+                    _save(store, key, _checkpoint(offset, stat.st_ino, last))
+        while True:
+            f.seek(offset)
+            chunk = f.read(CHUNK)
+            end = chunk.rfind(b"\n") + 1
+            if not end:
+                break
+            entries = _parse(chunk[:end], host, result)
+            store.append_many(entries)
+            result.copied += len(entries)
+            offset += end
+            last = _fingerprint(_last_line(chunk[:end]))
+            _save(store, key, _checkpoint(offset, stat.st_ino, last))
+    return result
+
+
+def follow(
+    store: Storage,
+    source: Path,
+    interval: float = 5.0,
+    host: str = "",
+    on_step: Callable[[SyncResult], None] | None = None,
+) -> None:
+    """Sync every ``interval`` seconds until interrupted.
+
+    A source that is missing for a while (an unmounted share) is retried.
+    """
+    while True:
+        try:
+            result = sync_once(store, source, host)
+        except FileNotFoundError:
+            result = None
+        if result is not None and on_step is not None:
+            on_step(result)
+        time.sleep(interval)
+
+
+@contextmanager
+def _locked(store: Storage) -> Iterator[None]:
+    """Serialize syncs into ``store``, so concurrent ones don't copy twice."""
+    store.base_dir.mkdir(parents=True, exist_ok=True)
+    with open(store.base_dir / LOCK_NAME, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _save(store: Storage, key: str, checkpoint: dict) -> None:
+    with locked_json(store.base_dir / STATE_NAME) as state:
+        state[key] = checkpoint
+
+
+def _checkpoint(offset: int, inode: int, last: dict) -> dict:
+    return {
+        "offset": offset,
+        "inode": inode,
+        "last": last,
+        "synced": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def _fingerprint(line: bytes) -> dict:
+    return {"length": len(line), "sha1": hashlib.sha1(line).hexdigest()}
+
+
+def _matches(f, checkpoint: dict) -> bool:
+    """Whether the line before the checkpoint offset is still the one copied last."""
+    last = checkpoint.get("last") or {}
+    offset, length = checkpoint.get("offset", 0), last.get("length", 0)
+    if not 0 < length <= offset:
+        return False
+    f.seek(offset - length)
+    line = f.read(length)
+    return line.endswith(b"\n") and _fingerprint(line) == last
+
+
+def _resume_offset(f, checkpoint: dict) -> int | None:
+    """Offset just past the last copied line, if the rewritten source still has it."""
+    last = checkpoint.get("last") or {}
+    f.seek(0)
+    found, offset = None, 0
+    for line in f:
+        offset += len(line)
+        if len(line) == last.get("length") and _fingerprint(line) == last:
+            found = offset
+    return found
+
+
+def _copy_missing(f, store: Storage, host: str, result: SyncResult) -> tuple[int, dict | None]:
+    """Copy the complete entries the local store lacks.
+
+    Returns the offset reached and the fingerprint of the line before it.
+    """
+    have = {(e.timestamp, e.session_id) for e in store.read_all()}
+    f.seek(0)
+    content = f.read()
+    end = content.rfind(b"\n") + 1
+    entries = [
+        e for e in _parse(content[:end], host, result) if (e.timestamp, e.session_id) not in have
+    ]
+    store.append_many(entries)
+    result.copied += len(entries)
+    return end, _fingerprint(_last_line(content[:end])) if end else None
+
+
+def _last_line(content: bytes) -> bytes:
+    """The last line of ``content``, which ends with a newline."""
+    return content[content.rfind(b"\n", 0, -1) + 1 :]
+
+
+def _parse(content: bytes, host: str, result: SyncResult) -> list[SessionEntry]:
+    entries = []
+    for line in content.splitlines():
+        try:
+            entry = SessionEntry.from_dict(json.loads(line))
+        except (ValueError, AttributeError):
+            result.skipped += 1
+            continue
+        if not entry.url:
+            result.skipped += 1
+            continue
+        entries.append(entry.received_from(host))
+    return entries
@@ -0,0 +1,70 @@
+"""Per-phase timing of one CLI invocation, enabled by ``CRC_TRACE``.
+
+``CRC_TRACE=1`` prints a one-line breakdown to stderr when the command
+exits; any other value is a file the line is appended to instead, which
+is how to trace the wrappers (their stderr goes to ``/dev/null``):
+
+    export CRC_TRACE=~/.claude-remote-sessions/timing.log
+
+Phases are wall-clock seconds, except ``import``: the CPU time from
+interpreter start through the CLI module's imports, a close stand-in for
+that start-up since it is CPU bound. Disabled, every call is a no-op.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+ENV_VAR = "CRC_TRACE"
+
+_target = os.environ.get(ENV_VAR, "")
+_phases: dict[str, float] = {}
+
+
+def enabled() -> bool:
+    return bool(_target)
+
+
+def add(name: str, seconds: float) -> None:
+    """Account ``seconds`` to a phase (summed if it is added again)."""
+    if _target:
+        _phases[name] = _phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the block as one phase."""
+    if not _target:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - start)
+
+
+def format_line(command: str, total: float) -> str:
+    parts = [f"{name} {seconds * 1000:.1f}ms" for name, seconds in _phases.items()]
+    parts.append(f"total {total * 1000:.1f}ms")
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    return f"{stamp} crc {command} [{os.getpid()}]: " + ", ".join(parts)
+
+
+def report(command: str, total: float) -> None:
+    """Write the breakdown to stderr or the ``CRC_TRACE`` file."""
+    if not _target:
+        return
+    line = format_line(command, total)
+    if _target in ("1", "stderr"):
+        print(line, file=sys.stderr)
+        return
+    try:
+        with open(os.path.expanduser(_target), "a") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"{ENV_VAR}: cannot write {_target}: {e}", file=sys.stderr)
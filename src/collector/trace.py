@@ -0,0 +1,185 @@
+"""End-to-end capture-to-delivery tracing.
+
+A traced ``SessionEntry`` carries ``trace``: monotonic timestamps (seconds,
+``time.monotonic()``, which is system-wide on one boot) for each stage it
+went through:
+
+- ``first_byte``: the wrapper's watcher first saw output in the capture
+  file (to within its 0.5 s polling interval)
+- ``url_detected``: the watcher found the session URL
+- ``record_start``: the `record` command started running
+- ``stored``: the entry was being written to storage, lock held
+
+The wrapper stages are taken in the shell as wall-clock times and converted
+by `record` (``from_wall``). Deliveries finish after the entry has been
+written, so they go to a ``traces.jsonl`` sidecar instead: one line per
+backend with the monotonic delivery time and the network time of the send.
+``clean`` drops the lines of the entries it removes.
+
+Only sessions recorded with ``--trace`` are traced; the shell wrappers pass
+it when ``CRC_LATENCY_TRACE`` is set. This is separate from ``CRC_TRACE``,
+which only times the phases of each command (see ``collector.timing``).
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import time
+from pathlib import Path
+
+from collector.storage import SessionEntry
+
+TRACE_NAME = "traces.jsonl"
+
+STAGES = ("first_byte", "url_detected", "record_start", "stored")
+
+
+def from_wall(epoch: float) -> float:
+    """Convert a wall-clock (epoch) timestamp to the monotonic clock."""
+    return epoch - (time.time() - time.monotonic())
+
+
+def parse_stages(values: list[str]) -> dict[str, float]:
+    """Parse ``stage=epoch`` pairs from the wrapper into monotonic times.
+
+    Unknown stages and malformed values (e.g. a ``date`` without
+    sub-second support) are skipped rather than failing the record.
+    """
+    stages = {}
+    for value in values:
+        stage, _, epoch = value.partition("=")
+        if stage not in STAGES:
+            continue
+        try:
+            stages[stage] = round(from_wall(float(epoch)), 6)
+        except ValueError:
+            continue
+    return stages
+
+
+def record_delivery(
+    base_dir: Path, entry: SessionEntry, backend: str, network: float | None = None
+) -> None:
+    """Append a delivery to the trace sidecar (traced entries only)."""
+    if entry.trace is None:
+        return
+    line = {
+        "session_id": entry.session_id,
+        "backend": backend,
+        "notified": round(time.monotonic(), 6),
+    }
+    if network is not None:
+        line["network"] = round(network, 6)
+    with open(base_dir / TRACE_NAME, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        f.write(json.dumps(line) + "\n")
+
+
+def drop(base_dir: Path, session_ids: set[str]) -> None:
+    """Remove the deliveries of ``session_ids`` from the sidecar.
+
+    Rewritten in place under the lock ``record_delivery`` appends with,
+    so a delivery finishing meanwhile is not lost.
+    """
+    if not session_ids:
+        return
+    try:
+        f = open(base_dir / TRACE_NAME, "r+b")
+    except FileNotFoundError:
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        lines = f.read().splitlines(keepends=True)
+        kept = [line for line in lines if _session_id(line) not in session_ids]
+        if len(kept) == len(lines):
+            return
+        f.seek(0)
+        f.write(b"".join(kept))
+        f.truncate()
+
+
+def _session_id(line: bytes) -> str | None:
+    try:
+        return json.loads(line).get("session_id")
+    except (ValueError, AttributeError):
+        return None
+
+
+def load_deliveries(base_dir: Path) -> dict[str, dict[str, dict]]:
+    """Deliveries from the sidecar: session_id -> backend -> first delivery."""
+    deliveries: dict[str, dict[str, dict]] = {}
+    try:
+        lines = (base_dir / TRACE_NAME).read_text().splitlines()
+    except FileNotFoundError:
+        return deliveries
+    for line in lines:
+        try:
+            d = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        deliveries.setdefault(d["session_id"], {}).setdefault(d["backend"], d)
+    return deliveries
+
+
+def breakdown(entry: SessionEntry, deliveries: dict[str, dict]) -> dict[str, float]:
+    """Seconds spent in each segment of one entry's trace.
+
+    Segments between stages that were not recorded are left out, as are
+    negative spans (stages from before a reboot).
+    """
+    trace = entry.trace or {}
+    spans: dict[str, float] = {}
+
+    def span(name: str, start: float | None, end: float | None) -> None:
+        if start is not None and end is not None and end >= start:
+            spans[name] = end - start
+
+    span("capture → detect", trace.get("first_byte"), trace.get("url_detected"))
+    span("detect → record", trace.get("url_detected"), trace.get("record_start"))
+    span("record → stored", trace.get("record_start"), trace.get("stored"))
+    for backend, d in sorted(deliveries.items()):
+        span(f"stored → delivered [{backend}]", trace.get("stored"), d["notified"])
+        if "network" in d:
+            spans[f"network [{backend}]"] = d["network"]
+    if deliveries:
+        first = next((trace[s] for s in STAGES if s in trace), None)
+        span("end to end", first, max(d["notified"] for d in deliveries.values()))
+    return spans
+
+
+def report(entries: list[SessionEntry], base_dir: Path) -> dict[str, dict[str, float]]:
+    """Per segment, over the traced ``entries``: count, p50, p95 and max."""
+    deliveries = load_deliveries(base_dir)
+    samples: dict[str, list[float]] = {}
+    for entry in entries:
+        if entry.trace is None:
+            continue
+        for name, seconds in breakdown(entry, deliveries.get(entry.session_id, {})).items():
+            samples.setdefault(name, []).append(seconds)
+    out = {}
+    for name in sorted(samples, key=_segment_order):
+        values = sorted(samples[name])
+        out[name] = {
+            "count": len(values),
+            "p50": _nearest_rank(values, 50),
+            "p95": _nearest_rank(values, 95),
+            "max": values[-1],
+        }
+    return out
+
+
+def _segment_order(name: str) -> tuple:
+    """Pipeline order; each backend's network time follows its delivery."""
+    backend = name.partition("[")[2]
+    for rank, prefix in enumerate(("capture", "detect", "record", "stored", "network", "end")):
+        if name.startswith(prefix):
+            if prefix in ("stored", "network"):
+                return (3, backend, prefix == "network")
+            return (rank, "", False)
+    return (len(STAGES) + 2, name, False)
+
+
+def _nearest_rank(values: list[float], q: float) -> float:
+    rank = max(1, -(-len(values) * q // 100))
+    return values[int(rank) - 1]
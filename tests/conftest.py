@@ -0,0 +1,61 @@
+"""Shared pytest fixtures."""
+
+from __future__ import annotations
+
+import shutil
+import ssl
+import subprocess
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from collector.storage import SessionEntry
+
+
+@pytest.fixture(autouse=True)
+def isolated_state_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Keep per-user state (rate limits etc.) out of the real home directory."""
+    state_dir = tmp_path / "state"
+    monkeypatch.setattr("collector.storage.DEFAULT_DIR", state_dir)
+    monkeypatch.setenv("CRC_SPOOL_DIR", str(tmp_path / "spool"))
+    return state_dir
+
+
+@pytest.fixture
+def make_entry() -> Callable[..., SessionEntry]:
+    """Factory for session entries: ``make_entry("01Abc", cwd="/srv")``.
+
+    The URL follows the session ID; any field not given is that of a wrapper
+    recording in ``/home/user/project``.
+    """
+
+    def make(session_id: str = "01Test", **fields) -> SessionEntry:
+        fields.setdefault("timestamp", "2026-02-25T12:00:00Z")
+        fields.setdefault("url", f"https://claude.ai/code/session_{session_id}")
+        fields.setdefault("cwd", "/home/user/project")
+        fields.setdefault("source", "wrapper")
+        return SessionEntry(session_id=session_id, **fields)
+
+    return make
+
+
+@pytest.fixture
+def tls_pair(tmp_path: Path) -> tuple[ssl.SSLContext, ssl.SSLContext]:
+    """(server, client) TLS contexts backed by a throwaway self-signed cert."""
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl not available")
+    cert, key = tmp_path / "cert.pem", tmp_path / "key.pem"
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", str(key), "-out", str(cert), "-days", "1",
+            "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    server_ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_ctx.load_cert_chain(cert, key)
+    client_ctx = ssl.create_default_context(cafile=str(cert))
+    return server_ctx, client_ctx
@@ -0,0 +1,99 @@
+"""Local HTTP stub server for exercising notifier backends without a network."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every response on a kept-alive connection.
+    disable_nagle_algorithm = True
+
+    def _handle(self) -> None:
+        server: StubServer = self.server  # type: ignore[assignment]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, payload, *extra = server.respond(self.command, self.path, body)
+        if server.delay:
+            time.sleep(server.delay)
+        with server.lock:
+            server.requests.append((self.command, self.path, dict(self.headers), body))
+            server.peers.add(self.client_address)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (extra[0] if extra else {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        if server.drop_keepalive:
+            # Close without announcing it, like a server reaping idle sockets
+            self.close_connection = True
+
+    do_GET = do_POST = do_PUT = _handle
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub that records requests and answers with a fixed status.
+
+    Subclass and override ``respond`` for backend-specific behavior.
+    """
+
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when many clients connect at once
+    request_queue_size = 128
+
+    def __init__(self, delay: float = 0.0, status: int = 200, ssl_context: object | None = None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        if ssl_context is not None:
+            self.socket = ssl_context.wrap_socket(self.socket, server_side=True)  # type: ignore[attr-defined]
+        self.scheme = "http" if ssl_context is None else "https"
+        self.delay = delay
+        self.status = status
+        self.drop_keepalive = False
+        self.lock = threading.Lock()
+        self.requests: list[tuple[str, str, dict, bytes]] = []
+        # Distinct client (host, port) pairs, i.e. TCP connections served
+        self.peers: set[tuple[str, int]] = set()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def respond(self, method: str, path: str, body: bytes) -> tuple:
+        """(status, body), optionally followed by a dict of extra headers."""
+        return self.status, b'{"ok": true}'
+
+    def handle_error(self, request: object, client_address: object) -> None:
+        # Clients that gave up (timeouts) leave the handler writing to a
+        # closed socket; that is expected here, not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def wait_for(self, n: int, timeout: float = 10.0) -> bool:
+        """Block until at least ``n`` requests were served."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                if len(self.requests) >= n:
+                    return True
+            time.sleep(0.02)
+        return False
+
+    def __enter__(self) -> StubServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,245 @@
+"""Tests for the asyncio HTTP client and the async notifier path."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Callable
+
+import pytest
+
+from collector.asynchttp import AsyncHTTPPool
+from collector.notifier import Notifier, NotifyResult, notify_async, notify_many_async
+from collector.notifiers.ntfy import NtfyNotifier
+from collector.notifiers.telegram import TelegramNotifier
+from collector.notifiers.webhook import WebhookNotifier
+from collector.storage import SessionEntry
+from tests.stub_server import StubServer
+
+
+@pytest.fixture
+def sample_entry(make_entry) -> SessionEntry:
+    return make_entry("abc")
+
+
+@pytest.fixture
+def make_batch(make_entry) -> Callable[[int], list[SessionEntry]]:
+    return lambda n: [make_entry(f"s{i}") for i in range(n)]
+
+
+def _request(url: str, payload: dict) -> urllib.request.Request:
+    return urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+
+
+def test_requests_share_keepalive_connection():
+    async def run(url: str) -> list[int]:
+        pool = AsyncHTTPPool()
+        try:
+            return [(await pool.urlopen(_request(url, {"i": i}))).status for i in range(5)]
+        finally:
+            await pool.close()
+
+    with StubServer() as srv:
+        statuses = asyncio.run(run(srv.url + "/hook"))
+    assert statuses == [200] * 5
+    assert len(srv.peers) == 1
+    method, path, headers, body = srv.requests[-1]
+    assert (method, path) == ("POST", "/hook")
+    assert {k.lower(): v for k, v in headers.items()}["content-type"] == "application/json"
+    assert json.loads(body) == {"i": 4}
+
+
+def test_many_requests_in_flight():
+    async def run(url: str) -> float:
+        pool = AsyncHTTPPool()
+        start = time.perf_counter()
+        await asyncio.gather(*(pool.urlopen(_request(url, {"i": i})) for i in range(20)))
+        elapsed = time.perf_counter() - start
+        await pool.close()
+        return elapsed
+
+    with StubServer(delay=0.1) as srv:
+        elapsed = asyncio.run(run(srv.url))
+    assert len(srv.requests) == 20
+    # Twenty 100 ms responses back to back would take 2 s
+    assert elapsed < 1.0
+
+
+def test_stale_connection_reconnects():
+    async def run(url: str) -> None:
+        pool = AsyncHTTPPool()
+        for i in range(3):
+            assert (await pool.urlopen(_request(url, {"i": i}))).status == 200
+        await pool.close()
+
+    with StubServer() as srv:
+        srv.drop_keepalive = True
+        asyncio.run(run(srv.url))
+    assert len(srv.requests) == 3
+    assert len(srv.peers) == 3
+
+
+def test_http_error_keeps_body():
+    async def run(url: str) -> urllib.error.HTTPError:
+        pool = AsyncHTTPPool()
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            await pool.urlopen(url)
+        await pool.close()
+        return exc_info.value
+
+    with StubServer(status=429) as srv:
+        error = asyncio.run(run(srv.url + "/x"))
+    assert error.code == 429
+    assert json.loads(error.read()) == {"ok": True}
+
+
+def test_timeout_is_urlerror():
+    async def run(url: str) -> None:
+        with pytest.raises(urllib.error.URLError):
+            await AsyncHTTPPool().urlopen(url, timeout=0.1)
+
+    with StubServer(delay=0.5) as srv:
+        asyncio.run(run(srv.url))
+
+
+def test_connection_refused_is_oserror():
+    with StubServer() as srv:
+        url = srv.url
+    with pytest.raises(OSError):
+        asyncio.run(AsyncHTTPPool().urlopen(url, timeout=2))
+
+
+def test_https_connection_is_reused(tls_pair):
+    server_ctx, client_ctx = tls_pair
+
+    async def run(url: str) -> None:
+        pool = AsyncHTTPPool(context=client_ctx)
+        for i in range(4):
+            assert (await pool.urlopen(_request(url, {"i": i}))).status == 200
+        await pool.close()
+
+    with StubServer(ssl_context=server_ctx) as srv:
+        asyncio.run(run(srv.url))
+    assert len(srv.requests) == 4
+    assert len(srv.peers) == 1
+
+
+def test_async_send_matches_sync_request(sample_entry, make_batch):
+    """Both paths build the same request for every backend."""
+    with StubServer() as srv:
+        notifiers = [
+            WebhookNotifier(url=srv.url + "/hook"),
+            NtfyNotifier(topic="topic", server=srv.url),
+            TelegramNotifier("TOKEN", "42", "{url}", api_base=srv.url),
+        ]
+        for notifier in notifiers:
+            assert notifier.send(sample_entry).success
+            assert asyncio.run(notifier.send_async(sample_entry)).success
+            assert asyncio.run(notifier.send_batch_async(make_batch(3))).success
+
+    by_path: dict[str, list[tuple]] = {}
+    for method, path, headers, body in srv.requests:
+        content_type = {k.lower(): v for k, v in headers.items()}.get("content-type")
+        by_path.setdefault(path, []).append((method, content_type, body))
+    assert sorted(by_path) == ["/botTOKEN/sendMessage", "/hook", "/topic"]
+    for sync, async_, batch in by_path.values():
+        assert sync == async_
+        assert batch[2] != sync[2]
+    assert len(json.loads(by_path["/hook"][2][2])) == 3
+
+
+def test_async_send_reports_failures(sample_entry):
+    with StubServer(status=500) as srv:
+        result = asyncio.run(WebhookNotifier(url=srv.url).send_async(sample_entry))
+    assert not result.success
+    assert "500" in result.message
+
+    result = asyncio.run(WebhookNotifier(url="").send_async(sample_entry))
+    assert not result.success
+    assert "not configured" in result.message
+
+
+def test_default_send_async_runs_blocking_send(make_batch):
+    class Blocking(Notifier):
+        name = "blocking"
+
+        def send(self, entry: SessionEntry) -> NotifyResult:
+            time.sleep(0.1)
+            return NotifyResult(success=True, method=self.name, message=entry.session_id)
+
+        @classmethod
+        def from_config(cls, config: dict) -> Notifier:
+            return cls()
+
+    async def run() -> list[NotifyResult]:
+        notifier = Blocking()
+        return await asyncio.gather(*(notifier.send_async(e) for e in make_batch(5)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    assert [r.message for r in results] == [f"s{i}" for i in range(5)]
+    # Offloaded to threads, so the sleeps overlap instead of blocking the loop
+    assert time.perf_counter() - start < 0.4
+
+
+def test_notify_async_fans_out(sample_entry):
+    with StubServer() as hook, StubServer() as push:
+        config = {
+            "notify": {"backend": "webhook,ntfy"},
+            "notify.webhook": {"url": hook.url},
+            "notify.ntfy": {"topic": "t", "server": push.url},
+        }
+        results = asyncio.run(notify_async(sample_entry, config))
+    assert [(r.method, r.success) for r in results] == [("webhook", True), ("ntfy", True)]
+
+
+def test_notify_many_async_bounds_concurrency(make_batch):
+    with StubServer(delay=0.05) as srv:
+        config = {"notify": {"backend": "webhook"}, "notify.webhook": {"url": srv.url}}
+        results = asyncio.run(notify_many_async(make_batch(40), config, concurrency=8))
+    assert len(results) == 40
+    assert all(r.success for [r] in results)
+    assert sorted(json.loads(body)["session_id"] for *_, body in srv.requests) == sorted(
+        f"s{i}" for i in range(40)
+    )
+    # Connections are pooled, never more than the number of requests in flight
+    assert len(srv.peers) <= 8
+
+
+def test_async_send_through_proxy_uses_blocking_path(monkeypatch, sample_entry):
+    with StubServer() as proxy:
+        monkeypatch.setenv("http_proxy", proxy.url)
+        notifier = WebhookNotifier(url="http://hooks.invalid/hook")
+        result = asyncio.run(notifier.send_async(sample_entry))
+    assert result.success, result.message
+    assert [path for _, path, _, _ in proxy.requests] == ["http://hooks.invalid/hook"]
+
+
+def test_telegram_async_rate_limit_is_locked_off_the_loop(tmp_path, sample_entry):
+    from collector.ratelimit import RateLimiter
+
+    threads = []
+
+    class Watched(RateLimiter):
+        def reserve(self, key: str, max_wait: float = float("inf")) -> float:
+            threads.append(threading.get_ident())
+            return super().reserve(key, max_wait)
+
+    async def send(notifier: TelegramNotifier):
+        return threading.get_ident(), await notifier.send_async(sample_entry)
+
+    with StubServer() as srv:
+        limiter = Watched(tmp_path / "rl.json", rate=100)
+        notifier = TelegramNotifier("TOKEN", "42", "{url}", api_base=srv.url, limiter=limiter)
+        loop_thread, result = asyncio.run(send(notifier))
+    assert result.success
+    assert threads and loop_thread not in threads
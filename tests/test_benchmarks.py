@@ -0,0 +1,37 @@
+"""Smoke test for the benchmark suite."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_benchmarks_run_and_compare(tmp_path: Path):
+    out = tmp_path / "results.json"
+    subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks", "run",
+            "--sizes", "50", "--capture-mb", "0.01", "--cli-entries", "10",
+            "--repeat", "1", "-o", str(out),
+        ],
+        cwd=ROOT, capture_output=True, check=True,
+    )
+    data = json.loads(out.read_text())
+    assert data["meta"]["format"] == 1
+    names = {r["name"] for r in data["results"]}
+    assert {"storage.append", "storage.clean", "capture.extract_urls", "cli.record"} <= names
+    assert all(r["median"] > 0 for r in data["results"])
+
+    compare = [sys.executable, "-m", "benchmarks", "compare", str(out), str(out)]
+    assert subprocess.run(compare, cwd=ROOT, capture_output=True).returncode == 0
+
+    slower = dict(data, results=[dict(r, median=r["median"] * 2) for r in data["results"]])
+    (tmp_path / "slower.json").write_text(json.dumps(slower))
+    compare[-1] = str(tmp_path / "slower.json")
+    regressed = subprocess.run(compare, cwd=ROOT, capture_output=True, text=True)
+    assert regressed.returncode == 1
+    assert "REGRESSION" in regressed.stdout
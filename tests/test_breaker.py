@@ -0,0 +1,166 @@
+"""Tests for the per-backend circuit breaker."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+from collector.breaker import CircuitBreaker, circuit_breaker
+from collector.notifier import NotifyResult, notify
+from collector.outbox import Outbox
+from collector.storage import SessionEntry
+from tests.stub_server import StubServer
+
+ENTRY = SessionEntry(
+    timestamp="2026-02-25T12:00:00Z",
+    session_id="abc",
+    url="https://claude.ai/code/session_abc",
+)
+
+OK = NotifyResult(True, "webhook", "ok")
+DOWN = NotifyResult(False, "webhook", "Network error: timed out")
+
+
+class Backend:
+    """Counts calls and answers with a fixed result."""
+
+    def __init__(self, result: NotifyResult):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self) -> NotifyResult:
+        self.calls += 1
+        return self.result
+
+
+def test_opens_after_threshold(tmp_path: Path):
+    breaker = CircuitBreaker(tmp_path / "b.json", threshold=3, cooldown=60)
+    backend = Backend(DOWN)
+    for _ in range(3):
+        assert breaker.call("webhook", backend) is DOWN
+    result = breaker.call("webhook", backend)
+    assert backend.calls == 3
+    assert not result.success
+    assert 59 < result.retry_after <= 60
+    assert "3 consecutive failures" in result.message
+    assert "timed out" in result.message
+
+
+def test_success_resets_failure_count(tmp_path: Path):
+    breaker = CircuitBreaker(tmp_path / "b.json", threshold=2, cooldown=60)
+    breaker.call("webhook", Backend(DOWN))
+    breaker.call("webhook", Backend(OK))
+    breaker.call("webhook", Backend(DOWN))
+    assert breaker.before("webhook") == 0
+    assert breaker.status("webhook")["failures"] == 1
+
+
+def test_half_open_probe(tmp_path: Path):
+    breaker = CircuitBreaker(tmp_path / "b.json", threshold=1, cooldown=0.2)
+    breaker.call("webhook", Backend(DOWN))
+    assert breaker.before("webhook") > 0
+    time.sleep(0.25)
+
+    # The first caller becomes the probe; everyone else keeps waiting
+    assert breaker.before("webhook") == 0
+    assert breaker.before("webhook") > 0
+
+    # A failed probe keeps the circuit open for another cooldown
+    breaker.record("webhook", DOWN)
+    assert breaker.before("webhook") > 0.1
+    time.sleep(0.25)
+
+    backend = Backend(OK)
+    assert breaker.call("webhook", backend).success
+    assert backend.calls == 1
+    assert breaker.before("webhook") == 0
+    assert breaker.status("webhook")["failures"] == 0
+
+
+def test_rate_limits_do_not_count(tmp_path: Path):
+    breaker = CircuitBreaker(tmp_path / "b.json", threshold=1, cooldown=60)
+    breaker.call("telegram", Backend(NotifyResult(False, "telegram", "429", retry_after=5)))
+    assert breaker.before("telegram") == 0
+
+
+def test_backends_are_independent(tmp_path: Path):
+    breaker = CircuitBreaker(tmp_path / "b.json", threshold=1, cooldown=60)
+    breaker.call("webhook", Backend(DOWN))
+    assert breaker.before("webhook") > 0
+    assert breaker.before("ntfy") == 0
+
+
+def test_force_bypasses_open_circuit(tmp_path: Path):
+    breaker = CircuitBreaker(tmp_path / "b.json", threshold=1, cooldown=60)
+    breaker.call("webhook", Backend(DOWN))
+    backend = Backend(OK)
+    assert breaker.call("webhook", backend, force=True).success
+    assert backend.calls == 1
+    assert breaker.before("webhook") == 0
+
+
+def test_force_bypasses_open_circuit_async(tmp_path: Path):
+    breaker = CircuitBreaker(tmp_path / "b.json", threshold=1, cooldown=60)
+    breaker.call("webhook", Backend(DOWN))
+    backend = Backend(OK)
+
+    async def send() -> NotifyResult:
+        return backend()
+
+    assert not asyncio.run(breaker.call_async("webhook", send)).success
+    assert asyncio.run(breaker.call_async("webhook", send, force=True)).success
+    assert backend.calls == 1
+    assert breaker.before("webhook") == 0
+
+
+def test_threshold_zero_disables():
+    assert circuit_breaker({"notify": {"breaker_threshold": 0}}) is None
+    assert circuit_breaker({}) is not None
+
+
+def test_open_circuit_skips_timeout():
+    with StubServer(delay=1.0) as srv:
+        cfg = {
+            "notify": {"backend": "webhook", "breaker_threshold": 2},
+            "notify.webhook": {"url": srv.url, "timeout": 0.2},
+        }
+        for _ in range(2):
+            [result] = notify(ENTRY, cfg)
+            assert "timed out" in result.message
+
+        start = time.perf_counter()
+        [result] = notify(ENTRY, cfg)
+        elapsed = time.perf_counter() - start
+    assert not result.success
+    assert result.message.startswith("Circuit open")
+    assert elapsed < 0.05
+    assert len(srv.requests) <= 2
+
+
+def test_outbox_holds_items_while_open(tmp_path: Path):
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(ENTRY)
+    with StubServer(status=503) as srv:
+        cfg = {
+            "notify": {"backend": "webhook", "breaker_threshold": 1},
+            "notify.webhook": {"url": srv.url},
+        }
+        outbox.flush(cfg)
+        [item] = outbox.items()
+        assert item.attempts == 1
+
+        outbox.flush(cfg, force=True)
+        assert len(srv.requests) == 2
+        [item] = outbox.items()
+        assert item.attempts == 2
+
+        # Due again, but the open circuit reschedules it without a request
+        item.next_attempt = 0
+        outbox._write(item)
+        report = outbox.flush(cfg)
+    assert len(srv.requests) == 2
+    assert report.failures[0][1].message.startswith("Circuit open")
+    [item] = outbox.items()
+    assert item.attempts == 2
+    assert 55 < item.next_attempt - time.time() <= 60
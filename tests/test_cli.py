@@ -1,11 +1,14 @@
 """Tests for CLI commands."""
 
 import json
+import os
 import subprocess
 import sys
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+
 from collector import storage
 
 
@@ -75,4 +78,104 @@ def test_record_cli_integration(tmp_path: Path):
     assert result.returncode == 0
 
 
-import pytest
+# Import cost budget for `record`, in microseconds of cumulative import time
+# from the first `collector` import onwards (argparse + storage dominate).
+# About 35-40 ms is typical, and up to 60 ms on a busy machine; the best
+# of a few runs is checked, to ride out scheduling noise without hiding a
+# new heavy import.
+RECORD_IMPORT_BUDGET_US = 75_000
+RECORD_IMPORT_RUNS = 3
+
+# Modules the `record` hot path must not pull in when notifications are off.
+RECORD_FORBIDDEN_IMPORTS = {
+    "datetime",
+    "tomllib",
+    "collector.notifier",
+    "collector.wrapper",
+    "collector.setup",
+    "urllib.request",
+}
+
+
+def _importtime(args: list[str], home: Path) -> tuple[set[str], int]:
+    """Run the CLI under ``-X importtime``; return (modules, cost in us)."""
+    env = dict(os.environ, HOME=str(home))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "collector.cli", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    assert result.returncode == 0, result.stderr
+    modules: set[str] = set()
+    cost = 0
+    counting = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        modules.add(name.strip())
+        top_level = not name[1:].startswith(" ")
+        if top_level and name.strip() == "collector":
+            counting = True
+        if counting and top_level:
+            cost += int(cumulative)
+    return modules, cost
+
+
+def test_record_import_budget(tmp_path: Path):
+    """`record` imports only what it uses and stays under the time budget."""
+    costs = []
+    for n in range(RECORD_IMPORT_RUNS):
+        modules, cost = _importtime(
+            ["record", "--url", f"https://claude.ai/code/session_budget{n}"], tmp_path
+        )
+        assert not modules & RECORD_FORBIDDEN_IMPORTS
+        costs.append(cost)
+    assert min(costs) < RECORD_IMPORT_BUDGET_US, f"record import cost {costs}us"
+
+
+def test_record_uses_config_snapshot(tmp_path: Path):
+    """With a config file, only the first `record` pays for parsing it."""
+    state_dir = tmp_path / ".claude-remote-sessions"
+    state_dir.mkdir()
+    (state_dir / "config.toml").write_text('[notify]\nenabled = false\nbackend = "ntfy"\n')
+    args = ["record", "--url", "https://claude.ai/code/session_snapshot1"]
+    first, _ = _importtime(args, tmp_path)
+    second, _ = _importtime(args, tmp_path)
+    assert "tomllib" in first
+    assert "tomllib" not in second
+
+
+def test_latest_and_path_skip_config(tmp_path: Path):
+    """`latest` and `path` never load config or notifier modules."""
+    subprocess.run(
+        [sys.executable, "-m", "collector.cli",
+         "record", "--url", "https://claude.ai/code/session_abc"],
+        env=dict(os.environ, HOME=str(tmp_path)),
+        check=True,
+    )
+    for args in (["path"], ["latest"]):
+        modules, _ = _importtime(args, tmp_path)
+        assert "collector.config" not in modules
+        assert not modules & RECORD_FORBIDDEN_IMPORTS
+
+
+def test_config_set_many(tmp_path: Path):
+    env = dict(os.environ, HOME=str(tmp_path))
+    cmd = [sys.executable, "-m", "collector.cli", "config"]
+    out = subprocess.run(
+        cmd + ["set-many", "notify.backend=ntfy", "notify.ntfy.topic=a=b", "notify.ntfy.timeout=3"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    assert "Set notify.ntfy.topic = a=b" in out
+    get = subprocess.run(
+        cmd + ["get", "notify.ntfy.timeout"], env=env, capture_output=True, text=True, check=True
+    )
+    assert get.stdout.strip() == "3"
+
+    bad = subprocess.run(cmd + ["set-many", "notify.enabled"], env=env, capture_output=True, text=True)
+    assert bad.returncode == 1
+    assert "Expected KEY=VALUE" in bad.stderr
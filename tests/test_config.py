@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import os
+import subprocess
+import sys
 from pathlib import Path
 from unittest.mock import patch
 
+import pytest
+
 from collector import config
 
 
@@ -78,3 +83,112 @@ def test_roundtrip(tmp_path: Path):
     assert cfg["notify"]["enabled"] is True
     assert cfg["notify"]["backend"] == "ntfy"
     assert cfg["notify.ntfy"]["topic"] == "my-topic"
+
+
+def _forbid_parse(monkeypatch) -> None:
+    def fail() -> dict:
+        raise AssertionError("config.toml was parsed again")
+
+    monkeypatch.setattr(config, "_parse", fail)
+
+
+def test_load_config_is_cached(tmp_path: Path, monkeypatch):
+    """Unchanged files are served from memory, then from the snapshot."""
+    fake_config = tmp_path / "config.toml"
+    fake_config.write_text('[notify]\nbackend = "ntfy"\n')
+    monkeypatch.setattr(config, "CONFIG_FILE", fake_config)
+    assert config.load_config()["notify"]["backend"] == "ntfy"
+    assert (tmp_path / config.CACHE_NAME).exists()
+
+    real_parse = config._parse
+    _forbid_parse(monkeypatch)
+    assert config.load_config()["notify"]["backend"] == "ntfy"
+    # A new process has no memo but still skips the parse
+    monkeypatch.setattr(config, "_memo", None)
+    assert config.load_config()["notify"]["backend"] == "ntfy"
+
+    monkeypatch.setattr(config, "_parse", real_parse)
+    fake_config.write_text('[notify]\nbackend = "webhook"\n')
+    assert config.load_config()["notify"]["backend"] == "webhook"
+
+
+def test_snapshot_invalidated_by_new_defaults(tmp_path: Path, monkeypatch):
+    fake_config = tmp_path / "config.toml"
+    fake_config.write_text("[notify]\nenabled = true\n")
+    monkeypatch.setattr(config, "CONFIG_FILE", fake_config)
+    config.load_config()
+
+    monkeypatch.setattr(config, "_memo", None)
+    monkeypatch.setitem(config.DEFAULT_CONFIG, "notify.new", {"flag": True})
+    monkeypatch.setattr(config, "_defaults_repr", None)
+    cfg = config.load_config()
+    assert cfg["notify.new"] == {"flag": True}
+    assert cfg["notify"]["enabled"] is True
+
+
+def test_cached_config_is_copied(tmp_path: Path, monkeypatch):
+    fake_config = tmp_path / "config.toml"
+    fake_config.write_text('[notify]\nbackend = ["telegram", "ntfy"]\n')
+    monkeypatch.setattr(config, "CONFIG_FILE", fake_config)
+    cfg = config.load_config()
+    cfg["notify"]["enabled"] = True
+    cfg["notify"]["backend"].append("webhook")
+    again = config.load_config()
+    assert again["notify"]["enabled"] is False
+    assert again["notify"]["backend"] == ["telegram", "ntfy"]
+
+
+def test_unmarshalable_values_are_not_cached(tmp_path: Path, monkeypatch):
+    fake_config = tmp_path / "config.toml"
+    fake_config.write_text("[notify]\nsince = 2026-01-01\n")
+    monkeypatch.setattr(config, "CONFIG_FILE", fake_config)
+    assert str(config.load_config()["notify"]["since"]) == "2026-01-01"
+    assert not (tmp_path / config.CACHE_NAME).exists()
+
+
+def test_update_writes_once_atomically(tmp_path: Path, monkeypatch):
+    fake_config = tmp_path / "config.toml"
+    fake_config.write_text('[notify]\nbackend = "ntfy"\n')
+    monkeypatch.setattr(config, "CONFIG_FILE", fake_config)
+    old_inode = fake_config.stat().st_ino
+
+    writes = []
+    real_write = config._write_config
+    monkeypatch.setattr(config, "_write_config", lambda cfg: writes.append(1) or real_write(cfg))
+    config.update({"notify.enabled": "true", "notify.ntfy.topic": "t", "notify.ntfy.priority": "high"})
+
+    assert writes == [1]
+    assert fake_config.stat().st_ino != old_inode
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".config.lock", "config.toml"]
+    cfg = config.load_config()
+    assert cfg["notify"]["enabled"] is True
+    assert cfg["notify"]["backend"] == "ntfy"
+    assert cfg["notify.ntfy"]["topic"] == "t"
+
+
+def test_update_rejects_bad_keys_without_writing(tmp_path: Path, monkeypatch):
+    fake_config = tmp_path / "config.toml"
+    monkeypatch.setattr(config, "CONFIG_FILE", fake_config)
+    with pytest.raises(ValueError, match="Invalid config key: enabled"):
+        config.update({"notify.backend": "ntfy", "enabled": "true"})
+    assert not fake_config.exists()
+
+
+def test_concurrent_updates_keep_every_key(tmp_path: Path, monkeypatch):
+    fake_config = tmp_path / "config.toml"
+    monkeypatch.setattr(config, "CONFIG_FILE", fake_config)
+    script = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "from collector import config\n"
+        "config.CONFIG_FILE = Path(sys.argv[1])\n"
+        "for i in range(10):\n"
+        "    config.set_value(f'notify.race.w{sys.argv[2]}_{i}', str(i))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    procs = [
+        subprocess.Popen([sys.executable, "-c", script, str(fake_config), str(n)], env=env)
+        for n in range(4)
+    ]
+    assert [p.wait() for p in procs] == [0] * 4
+    assert len(config.load_config()["notify.race"]) == 40
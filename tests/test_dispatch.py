@@ -0,0 +1,136 @@
+"""Tests for detached notification delivery."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from collector.dispatch import LOG_NAME, run_worker
+from collector.outbox import Outbox
+from collector.storage import SessionEntry
+from tests.stub_server import StubServer
+
+URL = "https://claude.ai/code/session_01XNYXVWynq7cb6rsR4inaM3"
+
+
+def _write_webhook_config(home: Path, url: str) -> Path:
+    base = home / ".claude-remote-sessions"
+    base.mkdir(parents=True, exist_ok=True)
+    (base / "config.toml").write_text(
+        '[notify]\nenabled = true\nbackend = "webhook"\n\n'
+        f'[notify.webhook]\nurl = "{url}"\n'
+    )
+    return base
+
+
+def _record(home: Path, *extra: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "collector.cli", "record", "--url", URL, "--notify", *extra],
+        env=dict(os.environ, HOME=str(home)),
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def test_detached_record_returns_before_slow_delivery(tmp_path: Path):
+    """record --detach persists and returns while the stub is still sleeping."""
+    with StubServer(delay=3.0) as srv:
+        base = _write_webhook_config(tmp_path, srv.url + "/hook")
+        elapsed = _record(tmp_path, "--detach")
+
+        assert elapsed < srv.delay
+        assert (base / "sessions.jsonl").read_text().count(URL) == 1
+        # The detached worker still delivers once the stub answers
+        assert srv.wait_for(1)
+    method, path, _, body = srv.requests[0]
+    assert (method, path) == ("POST", "/hook")
+    assert json.loads(body)["url"] == URL
+
+
+def test_sync_record_waits_for_delivery(tmp_path: Path):
+    with StubServer(delay=0.5) as srv:
+        _write_webhook_config(tmp_path, srv.url + "/hook")
+        elapsed = _record(tmp_path)
+        assert len(srv.requests) == 1
+    assert elapsed >= srv.delay
+
+
+def test_detached_record_queues_while_backend_down(tmp_path: Path):
+    with StubServer(status=503) as srv:
+        base = _write_webhook_config(tmp_path, srv.url)
+        (base / "config.toml").write_text(
+            (base / "config.toml").read_text().replace(
+                "enabled = true", "enabled = true\noutbox_linger = 0"
+            )
+        )
+        _record(tmp_path, "--detach")
+        assert srv.wait_for(1)
+        deadline = time.monotonic() + 10
+        while not (base / LOG_NAME).exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    assert len(Outbox(base)) == 1
+    assert "queued for retry" in (base / LOG_NAME).read_text()
+
+
+def test_run_worker_logs_failure(tmp_path: Path):
+    cfg = {
+        "notify": {"backend": "webhook"},
+        "notify.webhook": {"url": ""},
+    }
+    Outbox(tmp_path).enqueue(
+        SessionEntry(timestamp="2026-02-25T12:00:00Z", session_id="abc", url=URL)
+    )
+    report = run_worker(cfg, tmp_path)
+    assert report.sent == 0
+    log = (tmp_path / LOG_NAME).read_text()
+    assert "[webhook] abc:" in log
+    assert "not configured" in log
+
+
+def test_run_worker_lingers_until_backend_recovers(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr("collector.outbox.backoff_delay", lambda attempts: 0.2)
+    Outbox(tmp_path).enqueue(
+        SessionEntry(timestamp="2026-02-25T12:00:00Z", session_id="abc", url=URL)
+    )
+    with StubServer(status=503) as srv:
+
+        def respond(method: str, path: str, body: bytes) -> tuple[int, bytes]:
+            status = 503 if len(srv.requests) < 2 else 200
+            return status, b"{}"
+
+        srv.respond = respond  # type: ignore[method-assign]
+        report = run_worker({"notify": {"backend": "webhook"},
+                             "notify.webhook": {"url": srv.url}}, tmp_path, linger=10)
+    assert report.sent == 1
+    assert len(srv.requests) == 3
+    assert len(Outbox(tmp_path)) == 0
+
+
+@pytest.mark.parametrize("detach", [["--detach"], []])
+def test_burst_is_coalesced_into_one_request(tmp_path: Path, detach: list[str]):
+    with StubServer() as srv:
+        base = _write_webhook_config(tmp_path, srv.url)
+        (base / "config.toml").write_text(
+            (base / "config.toml").read_text().replace(
+                "enabled = true", "enabled = true\ncoalesce_ms = 2000"
+            )
+        )
+        for i in range(3):
+            subprocess.run(
+                [sys.executable, "-m", "collector.cli", "record", "--url",
+                 f"{URL}{i}", "--notify", *detach],
+                env=dict(os.environ, HOME=str(tmp_path)),
+                check=True,
+            )
+        assert srv.wait_for(1)
+        time.sleep(0.5)
+    assert len(srv.requests) == 1
+    batch = json.loads(srv.requests[0][3])
+    assert [e["url"] for e in batch] == [f"{URL}{i}" for i in range(3)]
@@ -0,0 +1,167 @@
+"""Tests for the keep-alive HTTP connection pool."""
+
+from __future__ import annotations
+
+import json
+import urllib.error
+import urllib.request
+import pytest
+
+from collector.httppool import HTTPPool
+from collector.notifiers.webhook import WebhookNotifier
+from collector.storage import SessionEntry
+from tests.stub_server import StubServer
+
+
+def _post(pool: HTTPPool, url: str, payload: dict) -> int:
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with pool.urlopen(req, timeout=5) as resp:
+        return resp.status
+
+
+def test_connection_is_reused():
+    pool = HTTPPool()
+    with StubServer() as srv:
+        for i in range(5):
+            assert _post(pool, srv.url + "/hook", {"i": i}) == 200
+    assert len(srv.requests) == 5
+    assert len(srv.peers) == 1
+    assert json.loads(srv.requests[-1][3]) == {"i": 4}
+
+
+def test_stale_connection_reconnects():
+    pool = HTTPPool()
+    with StubServer() as srv:
+        srv.drop_keepalive = True
+        for i in range(3):
+            assert _post(pool, srv.url, {"i": i}) == 200
+    assert len(srv.requests) == 3
+    assert len(srv.peers) == 3
+
+
+def test_http_error_keeps_body():
+    pool = HTTPPool()
+    with StubServer(status=429) as srv:
+        with pytest.raises(urllib.error.HTTPError) as exc_info:
+            pool.urlopen(srv.url + "/x")
+        # The connection survives an error status and is reused
+        with pytest.raises(urllib.error.HTTPError):
+            pool.urlopen(srv.url + "/x")
+    assert exc_info.value.code == 429
+    assert json.loads(exc_info.value.read()) == {"ok": True}
+    assert len(srv.peers) == 1
+
+
+def test_connection_refused_is_oserror():
+    with StubServer() as srv:
+        url = srv.url
+    with pytest.raises(OSError):
+        HTTPPool().urlopen(url, timeout=2)
+
+
+def test_notifier_uses_shared_pool():
+    entry = SessionEntry(
+        timestamp="2026-02-25T12:00:00Z",
+        session_id="abc",
+        url="https://claude.ai/code/session_abc",
+    )
+    with StubServer() as srv:
+        notifier = WebhookNotifier(url=srv.url + "/hook")
+        for _ in range(3):
+            assert notifier.send(entry).success
+    assert len(srv.peers) == 1
+
+
+def test_https_connection_is_reused(tls_pair):
+    server_ctx, client_ctx = tls_pair
+    pool = HTTPPool(context=client_ctx)
+    with StubServer(ssl_context=server_ctx) as srv:
+        assert srv.url.startswith("https://")
+        for i in range(4):
+            assert _post(pool, srv.url, {"i": i}) == 200
+    assert len(srv.peers) == 1
+
+
+class _Redirecting(StubServer):
+    """Redirects /old (with the status in the query) to /new."""
+
+    def respond(self, method: str, path: str, body: bytes) -> tuple:
+        if path.startswith("/old"):
+            return int(path.rpartition("=")[2]), b"", {"Location": "/new"}
+        if path == "/loop":
+            return 302, b"", {"Location": "/loop"}
+        return 200, b'{"ok": true}'
+
+
+def test_redirects_are_followed():
+    pool = HTTPPool()
+    with _Redirecting() as srv:
+        for status in (301, 302, 303, 307, 308):
+            req = urllib.request.Request(
+                f"{srv.url}/old?s={status}", data=b'{"a": 1}', method="POST",
+                headers={"Content-Type": "application/json"},
+            )
+            with pool.urlopen(req, timeout=5) as resp:
+                assert resp.status == 200
+                assert resp.url == srv.url + "/new"
+        with pytest.raises(urllib.error.HTTPError):
+            pool.urlopen(srv.url + "/loop", timeout=5)
+    followed = [(m, p, b) for m, p, _, b in srv.requests if p == "/new"]
+    # 307/308 repeat the POST; the others turn into a GET, as with urllib
+    assert [m for m, _, _ in followed] == ["GET", "GET", "GET", "POST", "POST"]
+    assert followed[-1][2] == b'{"a": 1}'
+
+
+def test_http_goes_through_the_proxy(monkeypatch):
+    pool = HTTPPool()
+    with StubServer() as proxy:
+        monkeypatch.setenv("http_proxy", f"http://user:pw@{proxy.url.split('//')[1]}")
+        monkeypatch.setenv("no_proxy", "skip.invalid")
+        assert _post(pool, "http://hooks.invalid:8080/hook?x=1", {"i": 1}) == 200
+        with pytest.raises(OSError):
+            pool.urlopen("http://skip.invalid/", timeout=2)
+    [(_, path, headers, _)] = proxy.requests
+    assert path == "http://hooks.invalid:8080/hook?x=1"
+    assert headers["Proxy-Authorization"] == "Basic dXNlcjpwdw=="
+
+
+def test_https_tunnels_through_the_proxy(tls_pair, monkeypatch):
+    import socket
+    import threading
+
+    server_ctx, client_ctx = tls_pair
+    tunnels = []
+
+    def serve_connect(listener: socket.socket, target: tuple[str, int]) -> None:
+        client, _ = listener.accept()
+        request = b""
+        while not request.endswith(b"\r\n\r\n"):
+            request += client.recv(1)
+        tunnels.append(request.split(b"\r\n")[0])
+        upstream = socket.create_connection(target)
+        client.sendall(b"HTTP/1.1 200 Connection established\r\n\r\n")
+
+        def pipe(a: socket.socket, b: socket.socket) -> None:
+            while data := a.recv(65536):
+                b.sendall(data)
+            b.close()
+
+        threading.Thread(target=pipe, args=(upstream, client), daemon=True).start()
+        pipe(client, upstream)
+
+    pool = HTTPPool(context=client_ctx)
+    with StubServer(ssl_context=server_ctx) as srv, socket.create_server(("127.0.0.1", 0)) as lis:
+        threading.Thread(
+            target=serve_connect, args=(lis, srv.server_address[:2]), daemon=True
+        ).start()
+        monkeypatch.setenv("https_proxy", f"127.0.0.1:{lis.getsockname()[1]}")
+        # The certificate is for 127.0.0.1, which the tunnel connects to
+        for i in range(2):
+            assert _post(pool, srv.url + "/hook", {"i": i}) == 200
+    assert [line.split()[:2] for line in tunnels] == [[b"CONNECT", srv.url.split("//")[1].encode()]]
+    assert len(srv.requests) == 2
@@ -0,0 +1,120 @@
+"""Tests for the session ID / directory index behind `find`."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from collector import index
+from collector.storage import SessionEntry, Storage
+
+
+@pytest.fixture
+def store(tmp_path: Path, make_entry) -> Storage:
+    store = Storage(tmp_path)
+    for e in [
+        make_entry("01AbcDef", cwd="/home/u/work/foo"),
+        make_entry("01AbzXyz", cwd="/home/u/work/bar"),
+        make_entry("02Qrs", cwd="/home/u/other"),
+        make_entry("01Abc999", cwd="/home/u/work/foo/sub"),
+    ]:
+        store.append(e)
+    return store
+
+
+def _ids(entries: list[SessionEntry]) -> list[str]:
+    return [e.session_id for e in entries]
+
+
+def test_find_by_id_prefix_and_cwd_substring(store: Storage):
+    assert _ids(index.find(store, "01Abc")) == ["01AbcDef", "01Abc999"]
+    assert _ids(index.find(store, "01Ab")) == ["01AbcDef", "01AbzXyz", "01Abc999"]
+    assert _ids(index.find(store, "https://claude.ai/code/session_02Q")) == ["02Qrs"]
+    assert _ids(index.find(store, "work/foo")) == ["01AbcDef", "01Abc999"]
+    assert _ids(index.find(store, "work", field="id")) == []
+    assert _ids(index.find(store, "01", field="cwd")) == []
+    assert index.find(store, "nomatch") == []
+    # The newest N, in file order
+    assert _ids(index.find(store, "/home/u", limit=2)) == ["02Qrs", "01Abc999"]
+    assert (store.base_dir / index.INDEX_NAME).exists()
+
+
+def test_appended_entries_found_without_rebuild(store: Storage, monkeypatch, make_entry):
+    index.find(store, "01")
+    store.append(make_entry("01AbcNew", cwd="/srv/new"))
+    monkeypatch.setattr(index, "rebuild", lambda s: pytest.fail("index was rebuilt"))
+    assert _ids(index.find(store, "01Abc")) == ["01AbcDef", "01Abc999", "01AbcNew"]
+    assert _ids(index.find(store, "srv")) == ["01AbcNew"]
+
+
+def test_large_tail_is_merged_into_index(store: Storage, monkeypatch, make_entry):
+    index.find(store, "01")
+    monkeypatch.setattr(index, "TAIL_LIMIT", 300)
+    for n in range(5):
+        store.append(make_entry(f"03Tail{n}", cwd=f"/srv/t{n}"))
+    monkeypatch.setattr(index, "rebuild", lambda s: pytest.fail("index was rebuilt"))
+    assert _ids(index.find(store, "03Tail")) == [f"03Tail{n}" for n in range(5)]
+    header = json.loads((store.base_dir / index.INDEX_NAME).read_bytes().split(b"\n")[0])
+    assert header["count"] == 9
+    assert header["jsonl_bytes"] == store.jsonl_file.stat().st_size
+    assert _ids(index.find(store, "/srv/t3")) == ["03Tail3"]
+    assert _ids(index.find(store, "01Abc")) == ["01AbcDef", "01Abc999"]
+
+
+def test_index_rebuilt_after_clean_or_edit(store: Storage):
+    index.find(store, "01")
+    store.clean(keep_last=2)
+    assert _ids(index.find(store, "01Ab")) == ["01Abc999"]
+
+    # Rewritten in place: same inode, different offsets
+    lines = store.jsonl_file.read_text().splitlines(keepends=True)
+    with open(store.jsonl_file, "r+") as f:
+        f.write("".join(reversed(lines)))
+    assert _ids(index.find(store, "0")) == ["01Abc999", "02Qrs"]
+
+
+def test_stale_index_on_a_reused_inode_is_rebuilt(store: Storage, make_entry):
+    index.find(store, "01")
+    # Rewritten in place, so the inode stays; every indexed offset is still
+    # the start of a line, but the last two lines now hold other sessions
+    lines = store.jsonl_file.read_bytes().splitlines(keepends=True)
+    swapped = [
+        json.dumps(make_entry(sid, cwd=cwd).to_dict()).encode() + b"\n"
+        for sid, cwd in (("02Zzz", "/home/u/zzzzz"), ("01Abc777", "/home/u/work/foo/sub"))
+    ]
+    assert [len(line) for line in swapped] == [len(line) for line in lines[2:]]
+    with open(store.jsonl_file, "r+b") as f:
+        f.write(b"".join(lines[:2] + swapped))
+    assert _ids(index.find(store, "02Z")) == ["02Zzz"]
+    assert _ids(index.find(store, "01Abc7")) == ["01Abc777"]
+    assert _ids(index.find(store, "zzzzz")) == ["02Zzz"]
+
+
+def test_find_on_empty_store(tmp_path: Path):
+    assert index.find(Storage(tmp_path), "01") == []
+
+
+def test_find_cli(tmp_path: Path):
+    env = dict(os.environ, HOME=str(tmp_path))
+    for sid in ("01AbcDef", "01Xyz"):
+        subprocess.run(
+            [sys.executable, "-m", "collector.cli", "record",
+             "--url", f"https://claude.ai/code/session_{sid}"],
+            env=env, check=True,
+        )
+    run = subprocess.run(
+        [sys.executable, "-m", "collector.cli", "find", "01Ab", "--url-only"],
+        env=env, capture_output=True, text=True,
+    )
+    assert run.stdout == "https://claude.ai/code/session_01AbcDef\n"
+    run = subprocess.run(
+        [sys.executable, "-m", "collector.cli", "find", "zzz"],
+        env=env, capture_output=True, text=True,
+    )
+    assert run.returncode == 1
+    assert "No sessions match 'zzz'" in run.stderr
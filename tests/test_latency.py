@@ -0,0 +1,121 @@
+"""Tests for delivery timing and the persisted latency histograms."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from collector.httppool import HTTPPool
+from collector.latency import LatencyStats, bucket_bound, bucket_of, percentile
+from collector.notifier import NotifyResult, notify
+from collector.storage import SessionEntry
+from tests.stub_server import StubServer
+
+ENTRY = SessionEntry(
+    timestamp="2026-02-25T12:00:00Z",
+    session_id="abc",
+    url="https://claude.ai/code/session_abc",
+)
+
+
+def test_bucket_resolution():
+    for seconds in (0.0004, 0.003, 0.25, 1.7, 12.0):
+        bound = bucket_bound(bucket_of(seconds))
+        assert seconds <= bound < seconds * 1.2
+
+
+def test_percentiles_from_histogram():
+    histogram: dict[str, int] = {}
+    # 90 fast sends at 100 ms, 10 slow ones at 2 s
+    for seconds, n in ((0.1, 90), (2.0, 10)):
+        index = str(bucket_of(seconds))
+        histogram[index] = histogram.get(index, 0) + n
+    assert 0.1 <= percentile(histogram, 50) < 0.12
+    assert 2.0 <= percentile(histogram, 95) < 2.4
+    assert percentile({}, 99) == 0.0
+
+
+def test_stats_record_and_summarize(tmp_path: Path):
+    stats = LatencyStats(tmp_path / "latency.json")
+    for ms in range(1, 101):
+        stats.record("telegram", NotifyResult(True, "telegram", "ok", timings={"total": ms / 1000}))
+    stats.record("telegram", NotifyResult(False, "telegram", "down", timings={"total": 10.0}))
+    # Never reached the network (not configured, circuit open): counted, no timings
+    stats.record("telegram", NotifyResult(False, "telegram", "not configured"))
+
+    summary = stats.summary()["telegram"]
+    assert (summary["sent"], summary["failed"]) == (1 + 99, 2)
+    total = summary["phases"]["total"]
+    assert total["count"] == 100
+    assert abs(total["mean"] - 0.0505) < 1e-9
+    assert 0.050 <= total["p50"] < 0.060
+    assert 0.095 <= total["p95"] < 0.114
+    assert 0.099 <= total["p99"] < 0.119
+
+    stats.reset()
+    assert stats.summary() == {}
+
+
+def test_pool_reports_phase_timings():
+    pool = HTTPPool()
+    with StubServer(delay=0.05) as srv:
+        first = pool.urlopen(srv.url)
+        second = pool.urlopen(srv.url)
+    assert set(first.timings) == {"dns", "connect", "response"}
+    assert first.timings["response"] >= 0.05
+    # A reused connection only has the response phase
+    assert set(second.timings) == {"response"}
+
+
+def test_https_timings_include_handshake(tls_pair):
+    server_ctx, client_ctx = tls_pair
+    with StubServer(ssl_context=server_ctx) as srv:
+        resp = HTTPPool(context=client_ctx).urlopen(srv.url)
+    assert set(resp.timings) == {"dns", "connect", "tls", "response"}
+    assert resp.timings["tls"] > 0
+
+
+def test_notify_records_latency(isolated_state_dir: Path):
+    with StubServer() as srv:
+        cfg = {"notify": {"backend": "webhook"}, "notify.webhook": {"url": srv.url}}
+        for _ in range(3):
+            [result] = notify(ENTRY, cfg)
+    assert result.timings is not None
+    assert result.timings["total"] >= result.timings["response"]
+
+    state = json.loads((isolated_state_dir / "latency.json").read_text())
+    assert state["webhook"]["sent"] == 3
+    assert sum(state["webhook"]["phases"]["total"].values()) == 3
+
+
+def test_stats_notify_cli(tmp_path: Path):
+    state_dir = tmp_path / ".claude-remote-sessions"
+    stats = LatencyStats(state_dir / "latency.json")
+    for ms in (120, 300, 310):
+        stats.record("telegram", NotifyResult(True, "telegram", "ok", timings={"total": ms / 1000}))
+
+    env = dict(os.environ, HOME=str(tmp_path))
+    cmd = [sys.executable, "-m", "collector.cli", "stats", "notify"]
+    out = subprocess.run(cmd, capture_output=True, text=True, env=env, check=True).stdout
+    assert "telegram: 3 delivered, 0 failed" in out
+    assert "p95" in out and "total" in out
+
+    out = subprocess.run(cmd + ["--json"], capture_output=True, text=True, env=env, check=True).stdout
+    assert json.loads(out)["telegram"]["phases"]["total"]["count"] == 3
+
+
+def test_open_circuit_and_errors_are_counted(isolated_state_dir: Path):
+    config = {
+        "notify": {"backend": "webhook", "breaker_threshold": 1, "breaker_cooldown": 60},
+        "notify.webhook": {"url": "http://127.0.0.1:9/"},
+    }
+    for _ in range(3):
+        [result] = notify(ENTRY, config)
+        assert not result.success
+    summary = LatencyStats(isolated_state_dir / "latency.json").summary()["webhook"]
+    # One refused connection, then two short-circuited sends
+    assert (summary["sent"], summary["failed"]) == (0, 3)
+    assert summary["phases"] == {}
@@ -0,0 +1,145 @@
+"""Tests for the metrics counters and Prometheus textfile export."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from collector import metrics
+from collector.latency import LatencyStats
+from collector.notifier import NotifyResult
+from collector.storage import SessionEntry, Storage
+
+
+def _record(
+    store: Storage,
+    session_id: str,
+    source: str = "wrapper",
+    trace: dict | None = None,
+    config: dict | None = None,
+) -> None:
+    entry = SessionEntry(
+        timestamp="2026-02-25T12:00:00Z",
+        session_id=session_id,
+        url=f"https://claude.ai/code/session_{session_id}",
+        source=source,
+        trace=trace,
+    )
+    store.append(entry)
+    metrics.observe_record(store, entry, config or {})
+
+
+def test_observe_record_counts(tmp_path: Path):
+    store = Storage(tmp_path)
+    now = time.monotonic()
+    _record(store, "a", "startup", trace={"first_byte": now - 0.2})
+    _record(store, "b", "exit", trace={"url_detected": now - 30})
+    _record(store, "c", "exit")
+
+    current = metrics.refresh(store, {})
+    assert current["sessions_recorded"] == {"startup": 1, "exit": 2}
+    assert current["lock_wait"]["count"] == 3
+    assert current["store"] == {
+        "bytes": store.jsonl_file.stat().st_size + store.txt_file.stat().st_size,
+        "entries": 3,
+    }
+    capture = current["capture_latency"]
+    assert capture["count"] == 2
+    assert capture["buckets"][:2] == [0, 1]
+    # Over the last bound: only in the count (the +Inf bucket)
+    assert sum(capture["buckets"]) == 1
+
+
+def test_entries_are_recounted_after_external_changes(tmp_path: Path, monkeypatch):
+    store = Storage(tmp_path)
+    for i in range(5):
+        _record(store, f"s{i}")
+
+    counted = []
+    real_count = metrics._count_lines
+    monkeypatch.setattr(metrics, "_count_lines", lambda p: counted.append(p) or real_count(p))
+    _record(store, "s5")
+    # Another process's append landed in between: the rollup has the count
+    Storage(tmp_path).append(SessionEntry(
+        timestamp="2026-02-25T12:00:00Z", session_id="s6",
+        url="https://claude.ai/code/session_s6",
+    ))
+    _record(store, "s7")
+    store.clean(keep_last=7)
+    assert metrics.refresh(store, {})["store"]["entries"] == 7
+    assert counted == []
+
+    # Edited by hand, so the rollup is stale too: record only estimates,
+    # the next refresh recounts
+    with open(store.jsonl_file, "a") as f:
+        f.write(store.jsonl_file.read_text().splitlines(keepends=True)[0])
+    _record(store, "s8")
+    assert counted == []
+    assert metrics.refresh(store, {})["store"]["entries"] == 9
+    assert len(counted) == 1
+
+
+def test_render_prometheus_text(tmp_path: Path):
+    text = metrics.render({
+        "sessions_recorded": {'we"ird\\src': 2},
+        "notifications": {"telegram": {"sent": 5, "failed": 1}},
+        "store": {"bytes": 100, "entries": 1},
+        "lock_wait": {"seconds": 0.5, "count": 3},
+        "capture_latency": {"buckets": [1, 2, 0, 0, 0, 0, 0], "sum": 0.6, "count": 4},
+        "updated": 1700000000.0,
+    })
+    lines = text.splitlines()
+    assert 'claude_remote_sessions_recorded_total{source="we\\"ird\\\\src"} 2' in lines
+    assert 'claude_remote_notifications_total{backend="telegram",result="failed"} 1' in lines
+    assert "claude_remote_store_entries 1" in lines
+    assert "# TYPE claude_remote_capture_latency_seconds histogram" in lines
+    # Buckets are cumulative; +Inf includes what is over the last bound
+    assert 'claude_remote_capture_latency_seconds_bucket{le="0.25"} 3' in lines
+    assert 'claude_remote_capture_latency_seconds_bucket{le="10.0"} 3' in lines
+    assert 'claude_remote_capture_latency_seconds_bucket{le="+Inf"} 4' in lines
+
+
+def test_textfile_is_replaced_atomically(tmp_path: Path, capsys):
+    store = Storage(tmp_path / "store")
+    prom = tmp_path / "textfile" / "claude.prom"
+    prom.parent.mkdir()
+    config = {"metrics": {"textfile": str(prom)}}
+    _record(store, "a", config=config)
+    first_inode = prom.stat().st_ino
+    _record(store, "b", config=config)
+
+    assert prom.stat().st_ino != first_inode
+    assert prom.stat().st_mode & 0o777 == 0o644
+    assert [p.name for p in prom.parent.iterdir()] == ["claude.prom"]
+    assert 'claude_remote_sessions_recorded_total{source="wrapper"} 2' in prom.read_text()
+
+    # An unwritable target never breaks recording
+    _record(store, "c", config={"metrics": {"textfile": str(tmp_path / "missing" / "x.prom")}})
+    assert "Cannot write metrics" in capsys.readouterr().err
+
+
+def test_metrics_cli(tmp_path: Path):
+    state_dir = tmp_path / ".claude-remote-sessions"
+    LatencyStats(state_dir / "latency.json").record(
+        "ntfy", NotifyResult(True, "ntfy", "ok", timings={"total": 0.1})
+    )
+    env = dict(os.environ, HOME=str(tmp_path))
+    cli = [sys.executable, "-m", "collector.cli"]
+    subprocess.run(
+        cli + ["record", "--url", "https://claude.ai/code/session_m1", "--source", "startup"],
+        env=env, check=True,
+    )
+    out = subprocess.run(
+        cli + ["metrics", "--json"], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    current = json.loads(out)
+    assert current["sessions_recorded"] == {"startup": 1}
+    assert current["notifications"] == {"ntfy": {"sent": 1, "failed": 0}}
+    assert current["store"]["entries"] == 1
+
+    text = subprocess.run(cli + ["metrics"], env=env, capture_output=True, text=True, check=True)
+    assert "claude_remote_store_entries 1" in text.stdout
@@ -3,33 +3,44 @@
 from __future__ import annotations
 
 import json
+import time
+from collections.abc import Callable
 from unittest.mock import MagicMock, patch
 
-from collector.notifier import NotifyResult, get_notifier, notify
+import pytest
+
+from collector.notifier import (
+    NotifyResult,
+    backend_names,
+    get_notifier,
+    get_notifiers,
+    notify,
+)
 from collector.notifiers.ntfy import NtfyNotifier
 from collector.notifiers.telegram import TelegramNotifier
 from collector.notifiers.webhook import WebhookNotifier
 from collector.storage import SessionEntry
+from tests.stub_server import StubServer
 
-SAMPLE_ENTRY = SessionEntry(
-    timestamp="2026-02-25T12:00:00Z",
-    session_id="01XNYXVWynq7cb6rsR4inaM3",
-    url="https://claude.ai/code/session_01XNYXVWynq7cb6rsR4inaM3",
-    cwd="/home/user/project",
-    source="wrapper",
-)
+
+@pytest.fixture
+def sample_entry(make_entry) -> SessionEntry:
+    return make_entry("01XNYXVWynq7cb6rsR4inaM3")
 
 
 # --- Factory tests ---
 
 
-def test_get_notifier_telegram():
+def test_get_notifier_telegram(tmp_path):
     cfg = {
         "notify": {"backend": "telegram"},
         "notify.telegram": {"bot_token": "t", "chat_id": "c"},
     }
     n = get_notifier(cfg)
     assert isinstance(n, TelegramNotifier)
+    # Rate limit state goes with the store it is created for
+    [n] = get_notifiers(cfg, base_dir=tmp_path)
+    assert n.limiter.state_file == tmp_path / "ratelimit.json"
 
 
 def test_get_notifier_webhook():
@@ -53,22 +64,22 @@ def test_get_notifier_ntfy():
 # --- Telegram tests ---
 
 
-def test_telegram_not_configured():
+def test_telegram_not_configured(sample_entry):
     n = TelegramNotifier(bot_token="", chat_id="", message_template="{url}")
-    result = n.send(SAMPLE_ENTRY)
+    result = n.send(sample_entry)
     assert result.success is False
     assert "not configured" in result.message
 
 
-def test_telegram_send_success():
+def test_telegram_send_success(sample_entry):
     n = TelegramNotifier(bot_token="123:ABC", chat_id="999", message_template="{url}")
     mock_resp = MagicMock()
     mock_resp.status = 200
     mock_resp.__enter__ = MagicMock(return_value=mock_resp)
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_open:
-        result = n.send(SAMPLE_ENTRY)
+    with patch("collector.httppool.urlopen", return_value=mock_resp) as mock_open:
+        result = n.send(sample_entry)
 
     assert result.success is True
     assert result.method == "telegram"
@@ -77,10 +88,10 @@ def test_telegram_send_success():
     req = call_args[0][0]
     body = json.loads(req.data)
     assert body["chat_id"] == "999"
-    assert SAMPLE_ENTRY.url in body["text"]
+    assert sample_entry.url in body["text"]
 
 
-def test_telegram_message_template():
+def test_telegram_message_template(sample_entry):
     n = TelegramNotifier(
         bot_token="123:ABC",
         chat_id="999",
@@ -91,8 +102,8 @@ def test_telegram_message_template():
     mock_resp.__enter__ = MagicMock(return_value=mock_resp)
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_open:
-        n.send(SAMPLE_ENTRY)
+    with patch("collector.httppool.urlopen", return_value=mock_resp) as mock_open:
+        n.send(sample_entry)
 
     req = mock_open.call_args[0][0]
     body = json.loads(req.data)
@@ -103,49 +114,49 @@ def test_telegram_message_template():
 # --- Webhook tests ---
 
 
-def test_webhook_not_configured():
+def test_webhook_not_configured(sample_entry):
     n = WebhookNotifier(url="")
-    result = n.send(SAMPLE_ENTRY)
+    result = n.send(sample_entry)
     assert result.success is False
     assert "not configured" in result.message
 
 
-def test_webhook_send_success():
+def test_webhook_send_success(sample_entry):
     n = WebhookNotifier(url="http://example.com/hook")
     mock_resp = MagicMock()
     mock_resp.status = 200
     mock_resp.__enter__ = MagicMock(return_value=mock_resp)
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_open:
-        result = n.send(SAMPLE_ENTRY)
+    with patch("collector.httppool.urlopen", return_value=mock_resp) as mock_open:
+        result = n.send(sample_entry)
 
     assert result.success is True
     req = mock_open.call_args[0][0]
     body = json.loads(req.data)
-    assert body["url"] == SAMPLE_ENTRY.url
-    assert body["session_id"] == SAMPLE_ENTRY.session_id
+    assert body["url"] == sample_entry.url
+    assert body["session_id"] == sample_entry.session_id
 
 
 # --- ntfy tests ---
 
 
-def test_ntfy_not_configured():
+def test_ntfy_not_configured(sample_entry):
     n = NtfyNotifier(topic="")
-    result = n.send(SAMPLE_ENTRY)
+    result = n.send(sample_entry)
     assert result.success is False
     assert "not configured" in result.message
 
 
-def test_ntfy_send_success():
+def test_ntfy_send_success(sample_entry):
     n = NtfyNotifier(topic="claude-sessions")
     mock_resp = MagicMock()
     mock_resp.status = 200
     mock_resp.__enter__ = MagicMock(return_value=mock_resp)
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp) as mock_open:
-        result = n.send(SAMPLE_ENTRY)
+    with patch("collector.httppool.urlopen", return_value=mock_resp) as mock_open:
+        result = n.send(sample_entry)
 
     assert result.success is True
     req = mock_open.call_args[0][0]
@@ -156,7 +167,7 @@ def test_ntfy_send_success():
 # --- Convenience function test ---
 
 
-def test_notify_convenience():
+def test_notify_convenience(sample_entry):
     cfg = {
         "notify": {"backend": "telegram"},
         "notify.telegram": {"bot_token": "t", "chat_id": "c", "message_template": "{url}"},
@@ -166,8 +177,197 @@ def test_notify_convenience():
     mock_resp.__enter__ = MagicMock(return_value=mock_resp)
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp):
-        result = notify(SAMPLE_ENTRY, cfg)
+    with patch("collector.httppool.urlopen", return_value=mock_resp):
+        [result] = notify(sample_entry, cfg)
 
     assert result.success is True
     assert result.method == "telegram"
+
+
+# --- Multi-backend fan-out tests ---
+
+
+def test_backend_names_forms():
+    assert backend_names({"notify": {"backend": "telegram"}}) == ["telegram"]
+    assert backend_names({"notify": {"backend": "telegram, webhook,ntfy"}}) == [
+        "telegram", "webhook", "ntfy",
+    ]
+    assert backend_names({"notify": {"backend": ["ntfy", "webhook", "ntfy"]}}) == [
+        "ntfy", "webhook",
+    ]
+
+
+def test_get_notifiers_multiple():
+    cfg = {
+        "notify": {"backend": ["telegram", "webhook"]},
+        "notify.webhook": {"url": "http://example.com", "timeout": 2.5},
+    }
+    telegram, webhook = get_notifiers(cfg)
+    assert isinstance(telegram, TelegramNotifier)
+    assert isinstance(webhook, WebhookNotifier)
+    assert webhook.timeout == 2.5
+    assert isinstance(get_notifier(cfg), TelegramNotifier)
+
+
+def test_fan_out_runs_backends_in_parallel(sample_entry):
+    with StubServer(delay=0.5) as hook, StubServer(delay=0.5) as push:
+        cfg = {
+            "notify": {"backend": "webhook,ntfy"},
+            "notify.webhook": {"url": hook.url + "/hook"},
+            "notify.ntfy": {"topic": "t", "server": push.url},
+        }
+        start = time.perf_counter()
+        results = notify(sample_entry, cfg)
+        elapsed = time.perf_counter() - start
+
+    assert [r.method for r in results] == ["webhook", "ntfy"]
+    assert all(r.success for r in results)
+    # About the slowest backend, not the sum of both
+    assert elapsed < 0.9
+
+
+def test_fan_out_per_backend_timeout(sample_entry):
+    with StubServer(delay=2.0) as slow, StubServer() as fast:
+        cfg = {
+            "notify": {"backend": ["webhook", "ntfy"]},
+            "notify.webhook": {"url": slow.url, "timeout": 0.3},
+            "notify.ntfy": {"topic": "t", "server": fast.url},
+        }
+        start = time.perf_counter()
+        webhook, ntfy = notify(sample_entry, cfg)
+        elapsed = time.perf_counter() - start
+
+    assert webhook.success is False
+    assert ntfy.success is True
+    assert elapsed < 1.5
+
+
+# --- Telegram rate limiting ---
+
+
+class TelegramStub(StubServer):
+    """Answers sendMessage like Telegram, enforcing a per-chat send interval."""
+
+    def __init__(self, interval: float, retry_after: int = 1):
+        super().__init__()
+        self.interval = interval
+        self.retry_after = retry_after
+        self.last_sent: dict[str, float] = {}
+        self.rejected = 0
+
+    def respond(self, method: str, path: str, body: bytes) -> tuple[int, bytes]:
+        chat = str(json.loads(body)["chat_id"])
+        now = time.monotonic()
+        with self.lock:
+            # Allow some scheduling jitter before calling it a violation
+            if now - self.last_sent.get(chat, -1e9) < self.interval * 0.8:
+                self.rejected += 1
+                return 429, json.dumps({
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }).encode()
+            self.last_sent[chat] = now
+        return 200, b'{"ok": true, "result": {}}'
+
+
+def _telegram(srv: StubServer, state_file, rate: float, **kwargs) -> TelegramNotifier:
+    from collector.ratelimit import RateLimiter
+
+    return TelegramNotifier(
+        bot_token="123:ABC",
+        chat_id="999",
+        message_template="{url}",
+        api_base=srv.url,
+        limiter=RateLimiter(state_file, rate=rate),
+        **kwargs,
+    )
+
+
+def test_telegram_burst_is_spread_by_token_bucket(tmp_path, sample_entry):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with TelegramStub(interval=0.2) as srv:
+        # Separate notifier instances share limits only through the state file
+        notifiers = [_telegram(srv, tmp_path / "rl.json", rate=5) for _ in range(5)]
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            results = list(pool.map(lambda n: n.send(sample_entry), notifiers))
+
+    assert all(r.success for r in results)
+    assert srv.rejected == 0
+    assert len(srv.requests) == 5
+
+
+def test_telegram_429_waits_retry_after_and_resends(tmp_path, sample_entry):
+    with TelegramStub(interval=0.5, retry_after=1) as srv:
+        # Limiter far looser than the server, so the server has to push back
+        n = _telegram(srv, tmp_path / "rl.json", rate=100)
+        assert n.send(sample_entry).success
+        start = time.perf_counter()
+        result = n.send(sample_entry)
+        elapsed = time.perf_counter() - start
+
+    assert result.success
+    assert srv.rejected == 1
+    assert elapsed >= 1.0
+    assert "telegram:999" in json.loads((tmp_path / "rl.json").read_text())
+
+
+def test_telegram_long_retry_after_is_rescheduled(tmp_path, sample_entry):
+    with TelegramStub(interval=60, retry_after=45) as srv:
+        n = _telegram(srv, tmp_path / "rl.json", rate=100, max_wait=5)
+        assert n.send(sample_entry).success
+        result = n.send(sample_entry)
+        # Later sends do not even reach the server while the chat is blocked
+        again = n.send(sample_entry)
+
+    assert result.success is False
+    assert 44 < result.retry_after <= 45
+    assert again.retry_after is not None and again.retry_after > 40
+    assert len(srv.requests) == 2
+
+
+# --- Coalesced batches ---
+
+
+@pytest.fixture
+def make_batch(make_entry) -> Callable[[int], list[SessionEntry]]:
+    return lambda n: [make_entry(f"id_{i}", cwd=f"/work/{i}") for i in range(n)]
+
+
+def test_telegram_batch_is_one_digest(make_batch):
+    from collector.notifier import digest_text
+
+    with StubServer() as srv:
+        n = TelegramNotifier(
+            bot_token="123:ABC", chat_id="999", message_template="{url}", api_base=srv.url
+        )
+        assert n.send_batch(make_batch(3)).success
+    [(_, _, _, body)] = srv.requests
+    text = json.loads(body)["text"]
+    assert text.startswith("\U0001f517 3 new Claude sessions:")
+    assert "https://claude.ai/code/session_id_2  (/work/2)" in text
+    assert len(digest_text(make_batch(500), limit=4000)) <= 4000
+
+
+def test_ntfy_batch_is_one_push(make_batch):
+    with StubServer() as srv:
+        n = NtfyNotifier(topic="t", server=srv.url)
+        assert n.send_batch(make_batch(2)).success
+    [(_, _, headers, body)] = srv.requests
+    assert headers["Title"] == "2 Claude Sessions"
+    assert body.decode().splitlines() == [e.url for e in make_batch(2)]
+
+
+def test_incomplete_http_backend_fails_at_instantiation():
+    from collector.notifiers.base import HTTPNotifier
+
+    class NoHooks(HTTPNotifier):
+        name = "nohooks"
+
+        def build_request(self, entries):
+            return NotifyResult(success=False, method=self.name, message="unused")
+
+    with pytest.raises(TypeError, match="on_http_error"):
+        NoHooks()
@@ -0,0 +1,236 @@
+"""Tests for the durable notification outbox."""
+
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+
+from collector.outbox import BACKOFF_BASE, BACKOFF_MAX, Outbox, backoff_delay
+from tests.stub_server import StubServer
+
+
+def _webhook_config(url: str) -> dict:
+    return {"notify": {"backend": "webhook"}, "notify.webhook": {"url": url}}
+
+
+def test_enqueue_roundtrip(tmp_path: Path, make_entry):
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    outbox.enqueue(make_entry("id_2"))
+    items = outbox.items()
+    assert [i.entry.session_id for i in items] == ["id_1", "id_2"]
+    assert items[0].attempts == 0
+    assert len(outbox) == 2
+
+
+def test_backoff_delay_bounds():
+    for attempts in range(1, 20):
+        ceiling = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+        delay = backoff_delay(attempts)
+        assert ceiling / 2 <= delay <= ceiling
+
+
+def test_flush_success_removes_item(tmp_path: Path, make_entry):
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    with StubServer() as srv:
+        report = outbox.flush(_webhook_config(srv.url))
+    assert report.sent == 1
+    assert len(outbox) == 0
+    assert json.loads(srv.requests[0][3])["session_id"] == "id_1"
+
+
+def test_failure_is_rescheduled(tmp_path: Path, make_entry):
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    with StubServer(status=503) as srv:
+        report = outbox.flush(_webhook_config(srv.url))
+        assert report.sent == 0
+        assert len(report.failures) == 1
+        [item] = outbox.items()
+        assert item.attempts == 1
+        assert item.next_attempt > time.time()
+        assert "503" in item.last_error
+
+        # Not due yet: a second pass does not touch the backend
+        report = outbox.flush(_webhook_config(srv.url))
+        assert report.pending == 1
+        assert len(srv.requests) == 1
+
+
+def test_backlog_drains_in_one_pass_after_recovery(tmp_path: Path, make_entry):
+    outbox = Outbox(tmp_path)
+    with StubServer(status=500) as srv:
+        cfg = _webhook_config(srv.url)
+        for i in range(3):
+            outbox.enqueue(make_entry(f"id_{i}"))
+            outbox.flush(cfg)
+        assert len(outbox) == 3
+        # Only the first due item of each pass hit the dead backend
+        assert len(srv.requests) == 3
+
+        srv.status = 200
+        outbox.enqueue(make_entry("id_3"))
+        report = outbox.flush(cfg)
+
+    assert report.sent == 4
+    assert len(outbox) == 0
+    delivered = [json.loads(r[3])["session_id"] for r in srv.requests[3:]]
+    assert sorted(delivered) == ["id_0", "id_1", "id_2", "id_3"]
+
+
+def test_force_flush_ignores_schedule(tmp_path: Path, make_entry):
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    with StubServer(status=500) as srv:
+        outbox.flush(_webhook_config(srv.url))
+        srv.status = 200
+        assert outbox.flush(_webhook_config(srv.url)).sent == 0
+        assert outbox.flush(_webhook_config(srv.url), force=True).sent == 1
+
+
+def test_clear(tmp_path: Path, make_entry):
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    assert outbox.clear() == 1
+    assert outbox.items() == []
+
+
+def test_outbox_cli_lists_pending(tmp_path: Path, make_entry):
+    import os
+    import subprocess
+    import sys
+
+    env = dict(os.environ, HOME=str(tmp_path))
+    cmd = [sys.executable, "-m", "collector.cli", "outbox"]
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    assert "Outbox is empty." in out.stdout
+
+    Outbox(tmp_path / ".claude-remote-sessions").enqueue(make_entry("id_7"))
+    out = subprocess.run(cmd, env=env, capture_output=True, text=True, check=True)
+    assert "id_7 attempts=0 due now" in out.stdout
+
+
+def test_partial_failure_retries_only_failed_backend(tmp_path: Path, make_entry):
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    with StubServer() as hook, StubServer(status=502) as push:
+        cfg = {
+            "notify": {"backend": "webhook,ntfy"},
+            "notify.webhook": {"url": hook.url},
+            "notify.ntfy": {"topic": "t", "server": push.url},
+        }
+        report = outbox.flush(cfg)
+        assert [r.method for _, r in report.failures] == ["ntfy"]
+        [item] = outbox.items()
+        assert item.backends == ["ntfy"]
+
+        push.status = 200
+        assert outbox.flush(cfg, force=True).sent == 1
+    # The webhook was not sent a duplicate
+    assert len(hook.requests) == 1
+    assert len(push.requests) == 2
+    assert len(outbox) == 0
+
+
+def test_rate_limited_item_is_rescheduled_not_failed(tmp_path: Path, monkeypatch, make_entry):
+    from collector.notifier import NotifyResult
+
+    class Limited:
+        def send_batch(self, entries):
+            return NotifyResult(False, "telegram", "Rate limited", retry_after=42)
+
+    monkeypatch.setattr("collector.notifier.create_notifier", lambda name, cfg, base_dir: Limited())
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    outbox.flush({"notify": {"backend": "telegram"}})
+    [item] = outbox.items()
+    assert item.attempts == 0
+    assert 40 < item.next_attempt - time.time() <= 42
+
+
+def test_coalesced_lane_sends_one_batch(tmp_path: Path, make_entry):
+    outbox = Outbox(tmp_path)
+    for i in range(3):
+        outbox.enqueue(make_entry(f"id_{i}"))
+    with StubServer() as hook, StubServer() as push:
+        cfg = {
+            "notify": {"backend": "webhook,ntfy"},
+            "notify.webhook": {"url": hook.url, "coalesce_ms": 500},
+            "notify.ntfy": {"topic": "t", "server": push.url},
+        }
+        report = outbox.flush(cfg)
+    assert report.sent == 3
+    # Webhook gets a single JSON array; ntfy (no window) one push per entry
+    assert len(hook.requests) == 1
+    assert [e["session_id"] for e in json.loads(hook.requests[0][3])] == ["id_0", "id_1", "id_2"]
+    assert len(push.requests) == 3
+
+
+def test_sends_happen_outside_the_lock(tmp_path: Path, monkeypatch, make_entry):
+    import threading
+
+    from collector.notifier import NotifyResult
+
+    sending, release = threading.Event(), threading.Event()
+    sent = []
+
+    class Slow:
+        def send_batch(self, entries):
+            if entries[0].session_id == "id_1":
+                sending.set()
+                release.wait(5)
+            sent.append(entries[0].session_id)
+            return NotifyResult(True, "webhook", "ok")
+
+    monkeypatch.setattr("collector.notifier.create_notifier", lambda name, cfg, base_dir: Slow())
+    cfg = {"notify": {"backend": "webhook"}}
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    first = threading.Thread(target=outbox.flush, args=(cfg,))
+    first.start()
+    assert sending.wait(5)
+
+    # A second flush neither waits for the first nor sends its item again
+    new = outbox.enqueue(make_entry("id_2"))
+    report = outbox.flush(cfg, only=[new.path])
+    assert (report.sent, sent) == (1, ["id_2"])
+    assert outbox.flush(cfg).sent == 0
+    release.set()
+    first.join(5)
+    assert sent == ["id_2", "id_1"]
+    assert len(outbox) == 0
+
+
+def test_metrics_refreshed_only_after_a_send(tmp_path: Path, monkeypatch, make_entry):
+    refreshed = []
+    monkeypatch.setattr("collector.metrics.refresh", lambda store, cfg: refreshed.append(1))
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(make_entry("id_1"))
+    with StubServer(status=503) as srv:
+        outbox.flush(_webhook_config(srv.url))
+        assert len(refreshed) == 1
+        # Nothing due: a lingering worker's idle passes leave the textfile alone
+        outbox.flush(_webhook_config(srv.url))
+        assert len(refreshed) == 1
+
+
+def test_delivery_state_stays_with_the_outbox_store(
+    tmp_path: Path, isolated_state_dir: Path, make_entry
+):
+    from collector import metrics
+    from collector.storage import Storage
+
+    base = tmp_path / "store"
+    outbox = Outbox(base)
+    outbox.enqueue(make_entry("id_1"))
+    with StubServer(status=503) as srv:
+        cfg = _webhook_config(srv.url)
+        cfg["notify"]["breaker_threshold"] = 1
+        outbox.flush(cfg)
+    assert {p.name for p in base.iterdir()} >= {"latency.json", "breakers.json"}
+    assert not isolated_state_dir.exists()
+    assert metrics.refresh(Storage(base), {})["notifications"] == {
+        "webhook": {"sent": 0, "failed": 1}
+    }
@@ -0,0 +1,116 @@
+"""Tests for entry point discovery of notifier backends."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from collector import plugins
+from collector.notifier import create_notifier
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    plugins.clear_registry()
+    yield
+    plugins.clear_registry()
+
+
+@pytest.fixture
+def fake_site(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A site directory holding one installed third-party backend."""
+    site = tmp_path / "site"
+    dist_info = site / "fakeplug-0.1.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: fakeplug\nVersion: 0.1\n")
+    (dist_info / "entry_points.txt").write_text(
+        "[claude_remote_collector.notifiers]\nfake = fakeplug:FakeNotifier\n"
+    )
+    (site / "fakeplug.py").write_text(textwrap.dedent("""
+        from collector.notifier import Notifier, NotifyResult
+
+        class FakeNotifier(Notifier):
+            name = "fake"
+
+            def __init__(self, greeting):
+                self.greeting = greeting
+
+            def send(self, entry):
+                return NotifyResult(True, self.name, self.greeting)
+
+            @classmethod
+            def from_config(cls, config):
+                return cls(config.get("greeting", "hi"))
+    """))
+    # After sys.path[0], which the cache key deliberately ignores
+    monkeypatch.setattr(sys, "path", [sys.path[0], str(site), *sys.path[1:]])
+    monkeypatch.delitem(sys.modules, "fakeplug", raising=False)
+    return site
+
+
+def test_builtins_are_registered():
+    assert {"telegram", "webhook", "ntfy"} <= set(plugins.registry())
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="Unknown notification backend: nope"):
+        plugins.backend_class("nope")
+
+
+def test_third_party_backend_is_discovered_and_imported_lazily(fake_site: Path):
+    assert plugins.registry()["fake"] == "fakeplug:FakeNotifier"
+    assert "fakeplug" not in sys.modules
+
+    notifier = create_notifier("fake", {"notify.fake": {"greeting": "hello"}})
+    assert "fakeplug" in sys.modules
+    assert notifier.send(None).message == "hello"
+
+
+def test_registry_is_cached_until_site_changes(fake_site: Path, monkeypatch: pytest.MonkeyPatch):
+    plugins.registry()
+    assert plugins.default_cache_file().exists()
+
+    scans = []
+    real_scan = plugins.scan
+    monkeypatch.setattr(plugins, "scan", lambda: scans.append(1) or real_scan())
+
+    plugins.clear_registry()
+    assert "fake" in plugins.registry()
+    assert scans == []
+
+    # Installing or removing a distribution touches the site directory
+    stat = fake_site.stat()
+    os.utime(fake_site, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    plugins.clear_registry()
+    assert "fake" in plugins.registry()
+    assert scans == [1]
+
+
+def test_corrupt_cache_is_rebuilt():
+    cache = plugins.default_cache_file()
+    cache.parent.mkdir(parents=True, exist_ok=True)
+    cache.write_text("{not json")
+    assert "telegram" in plugins.registry()
+
+
+def test_cached_lookup_skips_metadata_and_other_backends(tmp_path: Path):
+    script = (
+        "import sys\n"
+        "from collector.notifier import create_notifier\n"
+        "create_notifier('ntfy', {})\n"
+        "print('importlib.metadata' in sys.modules, 'collector.notifiers.telegram' in sys.modules)\n"
+    )
+    env = dict(os.environ, HOME=str(tmp_path))
+    runs = [
+        subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+        ).stdout.split()
+        for _ in range(2)
+    ]
+    # First run scans the entry points; the second is served from the cache
+    assert runs == [["True", "False"], ["False", "False"]]
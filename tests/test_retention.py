@@ -0,0 +1,144 @@
+"""Tests for age- and size-based retention."""
+
+from __future__ import annotations
+
+import calendar
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from collector import retention, rollup, storage
+from collector.storage import Storage
+
+
+EPOCH = calendar.timegm((2026, 1, 1, 12, 0, 0))
+
+
+def _on_day(day: int, n: int = 0) -> dict:
+    """Fields for the nth entry recorded ``day`` days after EPOCH."""
+    return {
+        "session_id": f"01Ret{day:03d}x{n}",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(EPOCH + day * 86400 + n)),
+        "cwd": f"/home/u/p{day % 3}",
+    }
+
+
+@pytest.fixture
+def store(tmp_path: Path, make_entry) -> Storage:
+    store = Storage(tmp_path / "store")
+    store.append_many([make_entry(**_on_day(day)) for day in range(200)])
+    return store
+
+
+def _days(store: Storage) -> list[int]:
+    return [int(e.session_id[5:8]) for e in store.read_all()]
+
+
+def _assert_consistent(store: Storage) -> None:
+    entries = store.read_all()
+    assert store.read_txt() == "".join(e.to_text_line() + "\n" for e in entries)
+    assert rollup.query(store).total == len(entries)
+
+
+def test_older_than_bisects_instead_of_decoding(store: Storage, monkeypatch):
+    decoded = []
+    parse_line = storage._parse_line
+    monkeypatch.setattr(storage, "_parse_line", lambda line: decoded.append(line) or parse_line(line))
+    cut = _on_day(150)["timestamp"]
+
+    assert store.clean(keep_last=None, older_than=cut) == 150
+    assert _days(store) == list(range(150, 200))
+    # The dropped entries (for the rollup) plus one line per bisection step
+    assert len(decoded) <= 150 + 10
+    _assert_consistent(store)
+    assert store.clean(keep_last=None, older_than=cut) == 0
+
+
+def test_older_than_keeps_newer_entries_out_of_order(store: Storage, make_entry):
+    # A newer entry synced in before older ones is not swept out with them
+    store.append(make_entry(**_on_day(500)))
+    store.append_many([make_entry(**_on_day(day, 1)) for day in range(10)])
+    store.append(make_entry(**_on_day(600)))
+    removed = store.clean(keep_last=None, older_than=_on_day(300)["timestamp"])
+    assert _days(store) == [500, 600]
+    assert removed == 210
+    _assert_consistent(store)
+
+
+def test_max_bytes_and_combined_limits(store: Storage):
+    line = store.jsonl_file.stat().st_size // 200
+    store.clean(keep_last=None, max_bytes=line * 20 + 5)
+    assert store.jsonl_file.stat().st_size <= line * 20 + 5
+    assert _days(store) == list(range(180, 200))
+    _assert_consistent(store)
+
+    # Whichever limit removes the most wins
+    assert store.clean(keep_last=5, older_than=_on_day(190)["timestamp"]) == 15
+    assert _days(store) == list(range(195, 200))
+    assert store.clean(keep_last=None, max_bytes=0) == 5
+    assert store.read_all() == [] and store.read_txt() == ""
+    _assert_consistent(store)
+
+
+def test_parse_age_and_size():
+    assert retention.parse_age("30d") == 30 * 86400
+    assert retention.parse_age("12h") == 12 * 3600
+    assert retention.parse_age("2w") == 14 * 86400
+    assert retention.parse_size("500K") == 500 * 1024
+    assert retention.parse_size("50MiB") == 50 << 20
+    assert retention.parse_size(1000) == 1000
+    for bad in ("30", "d", "3.5d", "-1d"):
+        with pytest.raises(ValueError):
+            retention.parse_age(bad)
+    with pytest.raises(ValueError):
+        retention.parse_size("lots")
+    now = calendar.timegm((2026, 3, 31, 0, 0, 0))
+    assert retention.cutoff("30d", now) == "2026-03-01T00:00:00Z"
+
+
+def test_automatic_retention_is_amortized(store: Storage, make_entry):
+    config = {"retention": {"auto": True, "keep": 50, "every": 3, "interval": 60}}
+    now = time.time()
+    assert retention.maybe_apply(store, config, now) == 150  # never checked before
+    store.append_many([make_entry(**_on_day(300 + n)) for n in range(10)])
+    assert retention.maybe_apply(store, config, now + 1) is None
+    assert retention.maybe_apply(store, config, now + 2) is None
+    assert retention.maybe_apply(store, config, now + 3) == 10
+    assert retention.maybe_apply(store, config, now + 4) is None
+    # Or once the interval has passed, however few appends there were
+    store.append(make_entry(**_on_day(400)))
+    assert retention.maybe_apply(store, config, now + 3 + 3600) == 1
+    assert len(store.read_all()) == 50
+
+    config["retention"]["older_than"] = "soon"
+    assert retention.maybe_apply(store, config, now + 7200) is None
+
+
+def test_clean_and_record_cli(tmp_path: Path, make_entry):
+    env = dict(os.environ, HOME=str(tmp_path))
+    home_store = Storage(tmp_path / ".claude-remote-sessions")
+    home_store.append_many([make_entry(**_on_day(day)) for day in range(30)])
+
+    def cli(*args: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, "-m", "collector.cli", *args],
+            env=env, capture_output=True, text=True,
+        )
+
+    run = cli("clean", "--older-than", "soon")
+    assert run.returncode == 1 and "Invalid age" in run.stderr
+    run = cli("clean", "--older-than", "3650d")
+    assert "Nothing to clean (30 entries" in run.stdout
+    run = cli("clean", "--older-than", "1d", "--keep", "100")
+    assert "Removed 30 old entries (kept last 100, since " in run.stdout
+
+    home_store.append_many([make_entry(**_on_day(day)) for day in range(30)])
+    assert cli("config", "set-many", "retention.auto=true", "retention.keep=5").returncode == 0
+    run = cli("record", "--url", "https://claude.ai/code/session_01New")
+    assert run.returncode == 0, run.stderr
+    assert [e.session_id for e in home_store.read_all()][-1] == "01New"
+    assert len(home_store.read_all()) == 5
@@ -0,0 +1,116 @@
+"""Tests for the incrementally maintained session rollup."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from collector import rollup
+from collector.storage import Storage
+
+
+@pytest.fixture
+def store(tmp_path: Path, make_entry) -> Storage:
+    store = Storage(tmp_path)
+    entries = [
+        make_entry("s1", timestamp="2026-01-30T12:00:00Z", cwd="/home/u/work/foo"),
+        make_entry(
+            "s2", timestamp="2026-02-02T12:00:00Z", cwd="/home/u/work/foo", source="startup"
+        ),
+        make_entry("s3", timestamp="2026-02-02T12:00:00Z", cwd="/home/u/work/foo/sub"),
+        make_entry("s4", timestamp="2026-02-03T12:00:00Z", cwd="/home/u/work/foobar"),
+        make_entry("s5", timestamp="2026-02-04T12:00:00Z", cwd="/home/u/other", source="exit"),
+    ]
+    for e in entries:
+        store.append(e)
+    return store
+
+
+def test_append_updates_rollup_incrementally(store: Storage, monkeypatch):
+    monkeypatch.setattr(rollup, "rebuild", lambda s: pytest.fail("rollup was rebuilt"))
+    assert sorted(p.name for p in (store.base_dir / "rollups").iterdir()) == [
+        "2026-01.json", "2026-02.json", "state.json"
+    ]
+    counts = rollup.query(store)
+    assert counts.total == 5
+    assert counts.by_day == {"2026-01-30": 1, "2026-02-02": 2, "2026-02-03": 1, "2026-02-04": 1}
+    assert counts.by_source == {"wrapper": 3, "startup": 1, "exit": 1}
+
+
+def test_query_filters(store: Storage):
+    # A directory and what is below it, not siblings sharing the prefix
+    foo = rollup.query(store, cwd="/home/u/work/foo")
+    assert foo.total == 3
+    assert set(foo.by_cwd) == {"/home/u/work/foo", "/home/u/work/foo/sub"}
+
+    week = rollup.query(store, since="2026-02-02", until="2026-02-03", cwd="/home/u/work/foo/")
+    assert week.total == 2
+    assert rollup.query(store, source="exit").by_cwd == {"/home/u/other": 1}
+
+
+def test_rebuilt_when_lost_or_stale(store: Storage, make_entry):
+    expected = rollup.query(store).to_dict()
+
+    (store.base_dir / "rollups" / "2026-02.json").unlink()
+    (store.base_dir / "rollups" / "state.json").unlink()
+    store.append(make_entry("s6", timestamp="2026-02-05T12:00:00Z"))  # can't apply to a lost rollup
+    counts = rollup.query(store)
+    assert counts.total == 6
+    assert counts.by_day["2026-02-05"] == 1
+
+    # Written behind the rollup's back
+    with open(store.jsonl_file, "a") as f:
+        f.write(json.dumps(make_entry("s7", timestamp="2026-03-01T12:00:00Z").to_dict()) + "\n")
+    assert rollup.query(store).by_day["2026-03-01"] == 1
+    assert rollup.query(store, until="2026-02-04").by_day == expected["by_day"]
+
+
+def test_clean_keeps_rollup_in_step(store: Storage, monkeypatch, make_entry):
+    store.clean(keep_last=2)
+    monkeypatch.setattr(rollup, "rebuild", lambda s: pytest.fail("rollup was rebuilt"))
+    assert rollup.query(store).by_day == {"2026-02-03": 1, "2026-02-04": 1}
+    store.append(make_entry("s8", timestamp="2026-02-06T12:00:00Z"))
+    assert rollup.query(store).total == 3
+
+
+def test_parse_since():
+    today = "2026-10-15"  # a Thursday
+    assert rollup.parse_since("today", today) == today
+    assert rollup.parse_since("week", today) == "2026-10-12"
+    assert rollup.parse_since("month", today) == "2026-10-01"
+    assert rollup.parse_since("7d", today) == "2026-10-08"
+    assert rollup.parse_since("2026-01-02", today) == "2026-01-02"
+    with pytest.raises(ValueError):
+        rollup.parse_since("last tuesday", today)
+
+
+def test_stats_cli(tmp_path: Path):
+    env = dict(os.environ, HOME=str(tmp_path), PYTHONPATH=os.pathsep.join(sys.path))
+    work = tmp_path / "work" / "foo"
+    work.mkdir(parents=True)
+    for n in range(3):
+        subprocess.run(
+            [sys.executable, "-m", "collector.cli", "record",
+             "--url", f"https://claude.ai/code/session_cli{n}", "--source", "startup"],
+            cwd=work if n else tmp_path, env=env, check=True,
+        )
+    out = subprocess.run(
+        [sys.executable, "-m", "collector.cli", "stats", "--since", "week", "--dir", str(work),
+         "--json"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    counts = json.loads(out)
+    assert counts["total"] == 2
+    assert counts["by_cwd"] == {str(work): 2}
+
+    text = subprocess.run(
+        [sys.executable, "-m", "collector.cli", "stats"], env=env, capture_output=True, text=True,
+        check=True,
+    ).stdout
+    assert text.startswith("Sessions: 3\n")
+    assert "startup" in text
@@ -0,0 +1,159 @@
+"""Tests for the HTTP ingest server and the collector backend that feeds it."""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from collector.notifier import create_notifier
+from collector.notifiers.collector import CollectorNotifier
+from collector.server import IngestServer
+from collector.storage import Storage
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[IngestServer]:
+    server = IngestServer(Storage(tmp_path / "central"), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _post(conn: http.client.HTTPConnection, body: bytes, headers: dict | None = None):
+    conn.request("POST", "/sessions", body=body, headers=headers or {})
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read())
+
+
+def test_collector_backend_forwards_to_server(server: IngestServer, make_entry):
+    notifier = create_notifier("collector", {"notify.collector": {"url": server.url + "/"}})
+    assert isinstance(notifier, CollectorNotifier)
+
+    result = notifier.send(make_entry("01One", trace={"record_start": 1.0}))
+    assert result.success, result.message
+    assert result.message == f"Forwarded 1 to {server.url}"
+    result = notifier.send_batch([make_entry("01Two"), make_entry("01Three", host="build-7")])
+    assert result.success and "Forwarded 2" in result.message
+
+    stored = server.store.read_all()
+    assert [e.session_id for e in stored] == ["01One", "01Two", "01Three"]
+    assert stored[0].trace is None
+    assert stored[0].host and stored[2].host == "build-7"
+    assert stored[0].cwd == "/home/user/project"
+    # The rollup is kept current by the batched append too
+    from collector import rollup
+
+    assert rollup.query(server.store).total == 3
+
+
+def test_keepalive_and_request_formats(server: IngestServer, make_entry):
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    one = json.dumps(make_entry("01A").to_dict()).encode()
+    assert _post(conn, one) == (200, {"accepted": 1})
+    sock = conn.sock
+    array = json.dumps([make_entry("01B").to_dict(), make_entry("01C").to_dict()]).encode()
+    assert _post(conn, array) == (200, {"accepted": 2})
+    ndjson = b"\n".join(json.dumps(make_entry(s).to_dict()).encode() for s in ("01D", "01E"))
+    assert _post(conn, ndjson, {"Content-Type": "application/x-ndjson"}) == (200, {"accepted": 2})
+    # Minimal entries get the rest filled in
+    assert _post(conn, b'{"url": "https://claude.ai/code/session_01F"}')[0] == 200
+
+    assert _post(conn, b'{"url": "https://example.com/x"}')[0] == 400
+    assert _post(conn, b"[1, 2]")[0] == 400
+    assert _post(conn, b"{not json")[0] == 400
+    conn.request("GET", "/health")
+    resp = conn.getresponse()
+    assert (resp.status, json.loads(resp.read())) == (200, {"ok": True})
+    assert conn.sock is sock  # every request above went over one connection
+    conn.close()
+
+    entries = server.store.read_all()
+    assert [e.session_id for e in entries] == ["01A", "01B", "01C", "01D", "01E", "01F"]
+    assert entries[-1].timestamp
+
+
+def test_token_required(server: IngestServer, make_entry):
+    server.token = "s3cret"
+    body = json.dumps(make_entry("01A").to_dict()).encode()
+    conn = http.client.HTTPConnection(*server.server_address[:2], timeout=5)
+    assert _post(conn, body)[0] == 401
+    assert _post(conn, body, {"Authorization": "Bearer wrong"})[0] == 401
+    assert _post(conn, body, {"Authorization": "Bearer s3cret"})[0] == 200
+    conn.close()
+
+    notifier = CollectorNotifier(server.url)
+    assert not notifier.send(make_entry("01B")).success
+    assert CollectorNotifier(server.url, token="s3cret").send(make_entry("01B")).success
+    assert [e.session_id for e in server.store.read_all()] == ["01A", "01B"]
+
+
+def test_concurrent_requests_are_group_committed(server: IngestServer, monkeypatch, make_entry):
+    append_many = server.store.append_many
+
+    def slow_append_many(entries):
+        time.sleep(0.02)
+        append_many(entries)
+
+    monkeypatch.setattr(server.store, "append_many", slow_append_many)
+    barrier = threading.Barrier(16)
+
+    def client(n: int) -> None:
+        conn = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+        barrier.wait()
+        for i in range(5):
+            body = json.dumps(make_entry(f"01C{n:02d}x{i}").to_dict()).encode()
+            assert _post(conn, body) == (200, {"accepted": 1})
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    entries = server.store.read_all()
+    assert len(entries) == 80
+    assert len({e.session_id for e in entries}) == 80
+    assert server.commit.batches < 40
+    assert server.store.read_txt().count("\n") == 80
+
+
+def test_append_many_failure_is_reported(server: IngestServer, monkeypatch, make_entry):
+    def broken(entries):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(server.store, "append_many", broken)
+    result = CollectorNotifier(server.url).send(make_entry("01A"))
+    assert not result.success
+    assert result.message == "Collector error: 500 Internal Server Error"
+
+
+def test_serve_cli(tmp_path: Path, make_entry):
+    env = dict(os.environ, HOME=str(tmp_path))
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "collector.cli", "serve", "--port", "0"],
+        env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        line = proc.stdout.readline()
+        assert line.startswith("Accepting sessions at http://127.0.0.1:")
+        url = line.split()[3]
+        assert url.endswith("/sessions")
+        result = CollectorNotifier(url.removesuffix("/sessions")).send(make_entry("01Cli"))
+        assert result.success, result.message
+    finally:
+        proc.terminate()
+        proc.communicate(timeout=10)
+    stored = Storage(tmp_path / ".claude-remote-sessions").read_all()
+    assert [e.session_id for e in stored] == ["01Cli"]
@@ -19,7 +19,7 @@ def test_telegram_get_me_success():
     mock_resp.__enter__ = MagicMock(return_value=mock_resp)
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp):
+    with patch("collector.httppool.urlopen", return_value=mock_resp):
         result = setup._telegram_get_me("123:ABC")
     assert result is not None
     assert result["username"] == "testbot"
@@ -29,7 +29,7 @@ def test_telegram_get_me_invalid():
     """getMe returns None on invalid token."""
     import urllib.error
 
-    with patch("urllib.request.urlopen", side_effect=urllib.error.URLError("fail")):
+    with patch("collector.httppool.urlopen", side_effect=urllib.error.URLError("fail")):
         result = setup._telegram_get_me("invalid")
     assert result is None
 
@@ -46,7 +46,7 @@ def test_telegram_detect_chat_id_success():
     mock_resp.__enter__ = MagicMock(return_value=mock_resp)
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp):
+    with patch("collector.httppool.urlopen", return_value=mock_resp):
         chat_id = setup._telegram_detect_chat_id("123:ABC", retries=1, delay=0)
     assert chat_id == "12345"
 
@@ -61,7 +61,7 @@ def test_telegram_detect_chat_id_empty():
     mock_resp.__enter__ = MagicMock(return_value=mock_resp)
     mock_resp.__exit__ = MagicMock(return_value=False)
 
-    with patch("urllib.request.urlopen", return_value=mock_resp):
+    with patch("collector.httppool.urlopen", return_value=mock_resp):
         chat_id = setup._telegram_detect_chat_id("123:ABC", retries=1, delay=0)
     assert chat_id is None
 
@@ -114,7 +114,7 @@ def test_setup_telegram_full_flow(tmp_path: Path):
     with (
         patch.object(config, "CONFIG_FILE", fake_config),
         patch("builtins.input", lambda msg: next(inputs)),
-        patch("urllib.request.urlopen", side_effect=urlopen_side_effect),
+        patch("collector.httppool.urlopen", side_effect=urlopen_side_effect),
     ):
         setup.setup_telegram()
 
@@ -0,0 +1,154 @@
+"""Tests for spool mode: local appends merged into a shared store."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from collector import index, metrics, rollup
+from collector.storage import Storage
+
+
+@pytest.fixture
+def shared(tmp_path: Path) -> Path:
+    return tmp_path / "nfs" / "store"
+
+
+def test_spooled_append_leaves_the_store_alone(shared: Path, make_entry):
+    store = Storage(shared, spool=True)
+    store.append(make_entry("01Spool0", trace={"first_byte": 1.0}))
+    store.append_many([make_entry("01Spool1"), make_entry("01Spool2")])
+    assert store.spool
+    assert not shared.exists()
+    spooled = [json.loads(line) for line in store.spool_file.read_text().splitlines()]
+    assert [e["session_id"] for e in spooled] == ["01Spool0", "01Spool1", "01Spool2"]
+    assert "stored" in spooled[0]["trace"]
+    assert store.spool_file.parent.stat().st_mode & 0o777 == 0o700
+
+
+def test_reads_see_spooled_entries(shared: Path, make_entry):
+    Storage(shared).append(make_entry("01Spool0"))
+    Storage(shared, spool=True).append_many([make_entry("01Spool1"), make_entry("01Spool2")])
+
+    reader = Storage(shared)
+    assert [e.session_id for e in reader.read_all()] == ["01Spool0", "01Spool1", "01Spool2"]
+    assert not reader.spool_file.exists()
+    Storage(shared, spool=True).append(make_entry("01Spool3"))
+    assert rollup.query(reader).total == 4
+    Storage(shared, spool=True).append(make_entry("01Spool4"))
+    assert [e.session_id for e in index.find(reader, "01Spool4")] == ["01Spool4"]
+    Storage(shared, spool=True).append(make_entry("01Spool5"))
+    assert reader.read_txt().count("\n") == 6
+
+
+def test_merge_is_one_batch_and_counted(shared: Path, monkeypatch, make_entry):
+    spooled = Storage(shared, spool=True)
+    spooled.append_many([make_entry(f"01Spool{n}") for n in range(5)])
+    store = Storage(shared)
+    locks = []
+    locked = Storage._locked
+    monkeypatch.setattr(
+        Storage, "_locked", lambda self, op: locks.append(op) or locked(self, op)
+    )
+
+    assert len(store.merge_spool()) == 5
+    assert len(locks) == 1
+    assert store.merge_spool() == []
+    state = json.loads((shared / metrics.STATE_NAME).read_text())
+    assert state["sessions"] == {"wrapper": 5}
+    assert state["store"]["entries"] == 5
+    assert rollup.query(store).total == 5
+
+
+def test_interrupted_merge_is_finished_first(shared: Path, make_entry):
+    spooled = Storage(shared, spool=True)
+    spooled.append_many([make_entry("01Spool0"), make_entry("01Spool1")])
+    # A merge that died after moving the spool aside
+    os.replace(spooled.spool_file, spooled.spool_file.with_suffix(".merging"))
+    spooled.append(make_entry("01Spool2"))
+
+    assert [e.session_id for e in Storage(shared).merge_spool()] == [
+        "01Spool0", "01Spool1", "01Spool2",
+    ]
+    assert not spooled.spool_file.with_suffix(".merging").exists()
+
+
+def test_unsafe_spool_directory_falls_back_to_the_store(
+    shared: Path, tmp_path: Path, monkeypatch, make_entry
+):
+    elsewhere = tmp_path / "elsewhere"
+    elsewhere.mkdir()
+    (tmp_path / "link").symlink_to(elsewhere)
+    monkeypatch.setenv("CRC_SPOOL_DIR", str(tmp_path / "link"))
+    store = Storage(shared, spool=True)
+    store.append(make_entry("01Spool0"))
+    assert not store.spool
+    assert list(elsewhere.iterdir()) == []
+    assert [e.session_id for e in Storage(shared).read_all()] == ["01Spool0"]
+
+
+def test_spool_due(make_entry):
+    store = Storage(spool=True)
+    store.append(make_entry("01Spool0"))
+    assert store.spool_due(30)  # never merged
+    assert not store.spool_due(30)
+    marker = store.spool_file.with_suffix(".merged")
+    os.utime(marker, (time.time() - 60, time.time() - 60))
+    assert store.spool_due(30)
+    assert store.spool_due(30, max_bytes=1)
+
+
+def test_record_and_merge_spool_cli(tmp_path: Path):
+    env = dict(os.environ, HOME=str(tmp_path), CRC_SPOOL_DIR=str(tmp_path / "spool"))
+
+    def cli(*args: str) -> subprocess.CompletedProcess:
+        run = subprocess.run(
+            [sys.executable, "-m", "collector.cli", *args],
+            env=env, capture_output=True, text=True,
+        )
+        assert run.returncode == 0, run.stderr
+        return run
+
+    cli("config", "set-many", "storage.spool=true", "storage.spool_interval=3600")
+    shared = tmp_path / ".claude-remote-sessions"
+    store = Storage(shared)
+    # Mark the spool as just merged, so record doesn't start a merge itself
+    store.spool_file.parent.mkdir(mode=0o700)
+    store.spool_file.with_suffix(".merged").touch()
+    for n in range(3):
+        cli("record", "--url", f"https://claude.ai/code/session_01Cli{n}")
+    assert not store.jsonl_file.exists()
+    assert len(store.spool_file.read_text().splitlines()) == 3
+
+    assert cli("merge-spool").stdout == "Merged 3 spooled entries.\n"
+    assert store.jsonl_file.read_text().count("\n") == 3
+    assert "01Cli2" in cli("latest").stdout
+
+
+def test_lone_record_is_merged_without_more_activity(tmp_path: Path):
+    env = dict(os.environ, HOME=str(tmp_path), CRC_SPOOL_DIR=str(tmp_path / "spool"))
+    base = [sys.executable, "-m", "collector.cli"]
+    subprocess.run(
+        [*base, "config", "set-many", "storage.spool=true", "storage.spool_interval=1"],
+        env=env, check=True, capture_output=True,
+    )
+    store = Storage(tmp_path / ".claude-remote-sessions")
+    store.spool_file.parent.mkdir(mode=0o700)
+    store.spool_file.with_suffix(".merged").touch()
+    for n in range(2):
+        subprocess.run(
+            [*base, "record", "--url", f"https://claude.ai/code/session_01Lone{n}"],
+            env=env, check=True,
+        )
+    # One delayed merge-spool was started, and merges both once the interval is up
+    deadline = time.time() + 15
+    while not store.jsonl_file.exists() or store.jsonl_file.read_text().count("\n") < 2:
+        assert time.time() < deadline, "spool never merged"
+        time.sleep(0.2)
+    assert not store.spool_file.exists()
@@ -2,6 +2,8 @@
 
 from pathlib import Path
 
+import pytest
+
 from collector.storage import SessionEntry, Storage
 
 
@@ -113,3 +115,124 @@ def test_session_entry_from_text_line():
 def test_session_entry_from_text_line_empty():
     assert SessionEntry.from_text_line("") is None
     assert SessionEntry.from_text_line("   ") is None
+
+
+def test_clean_keep_zero(tmp_path: Path):
+    store = Storage(base_dir=tmp_path / "sessions")
+    store.append(SessionEntry("2026-02-25T00:00:00Z", "a", "https://claude.ai/code/session_a"))
+    assert store.clean(keep_last=0) == 1
+    assert store.read_all() == []
+    assert store.read_txt() == ""
+
+
+def test_lock_wait_is_measured(tmp_path: Path):
+    store = Storage(base_dir=tmp_path / "sessions")
+    store.append(SessionEntry("2026-02-25T00:00:00Z", "a", "https://claude.ai/code/session_a"))
+    store.read_all()
+    assert 0 <= store.last_lock_wait <= store.lock_wait < 1
+
+
+def test_concurrent_writers_cleaners_and_readers(tmp_path: Path):
+    from benchmarks.load import run_load
+
+    report = run_load(tmp_path, writers=4, appends=300, cleaners=2, readers=1, keep=50)
+    assert report["problems"] == []
+    assert report["cleans"] > 0 and report["reads"] > 0
+    assert report["lock_wait"]["max"] >= report["lock_wait"]["p50"]
+
+
+def test_concurrent_record_processes(tmp_path: Path):
+    from benchmarks.load import run_load
+
+    report = run_load(tmp_path, writers=3, appends=3, mode="record")
+    assert report["problems"] == []
+    assert report["entries"] == 9
+
+
+def _filled(tmp_path: Path, n: int) -> Storage:
+    store = Storage(base_dir=tmp_path / "sessions")
+    store.append_many(
+        [
+            SessionEntry(f"2026-02-25T00:00:{i % 60:02d}Z", f"id{i}", f"https://claude.ai/code/session_id{i}")
+            for i in range(n)
+        ]
+    )
+    return store
+
+
+def test_copy_jsonl_is_byte_exact(tmp_path: Path):
+    store = _filled(tmp_path, 2000)  # over several 64 KiB blocks
+    content = store.jsonl_file.read_bytes()
+    lines = content.splitlines(keepends=True)
+    out = tmp_path / "out"
+    for last in (0, 1, 7, 999, 2000, 5000):
+        with open(out, "wb") as f:
+            copied = store.copy_jsonl(f.fileno(), last=last)
+        expected = b"".join(lines[-last:] if last else lines)
+        assert out.read_bytes() == expected
+        assert copied == len(expected)
+
+    # Appending output (no sendfile there) and a missing final newline
+    with open(store.jsonl_file, "ab") as f:
+        f.write(lines[0].rstrip(b"\n"))
+    with open(out, "ab") as f:
+        store.copy_jsonl(f.fileno(), last=2)
+    assert out.read_bytes().endswith(lines[-1] + lines[0])
+
+
+def test_copy_jsonl_empty(tmp_path: Path):
+    store = Storage(base_dir=tmp_path / "sessions")
+    with open(tmp_path / "out", "wb") as f:
+        assert store.copy_jsonl(f.fileno()) == 0
+    assert (tmp_path / "out").read_bytes() == b""
+
+
+def test_list_cli_passthrough(tmp_path: Path):
+    import os
+    import subprocess
+    import sys
+
+    store = Storage(base_dir=tmp_path / ".claude-remote-sessions")
+    env = dict(os.environ, HOME=str(tmp_path))
+    cmd = [sys.executable, "-m", "collector.cli", "list", "--json"]
+    run = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    assert run.stdout == "No sessions collected yet.\n"
+
+    store.append_many(_filled(tmp_path, 3000).read_all())
+    run = subprocess.run([*cmd, "-n", "2"], env=env, capture_output=True)
+    assert run.stdout == b"".join(store.jsonl_file.read_bytes().splitlines(keepends=True)[-2:])
+    # A reader that stops early is not an error
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    proc.stdout.read(100)
+    proc.stdout.close()
+    assert proc.wait(timeout=30) == 0
+    assert proc.stderr.read() == b""
+
+    # Plain `list` copies sessions.txt, unless it is out of step with the entries
+    run = subprocess.run(cmd[:-1] + ["-n", "2"], env=env, capture_output=True)
+    assert run.stdout == b"".join(store.txt_file.read_bytes().splitlines(keepends=True)[-2:])
+    store.txt_file.write_text("stale\n")
+    run = subprocess.run(cmd[:-1] + ["-n", "1"], env=env, capture_output=True, text=True)
+    assert run.stdout == store.read_all()[-1].to_text_line() + "\n"
+
+
+def test_copy_txt_trusts_the_size_stamp(tmp_path: Path, monkeypatch):
+    from collector import storage
+
+    store = _filled(tmp_path, 50)
+    store.clean(keep_last=40)
+    store.append(
+        SessionEntry("2026-02-26T00:00:00Z", "late", "https://claude.ai/code/session_late")
+    )
+    monkeypatch.setattr(storage, "_count_lines", lambda *a: pytest.fail("counted lines"))
+    out = tmp_path / "out"
+    with open(out, "wb") as f:
+        store.copy_txt(f.fileno(), last=5)
+    assert out.read_bytes() == b"".join(store.txt_file.read_bytes().splitlines(True)[-5:])
+
+    # A hand edit is caught by the sizes, and decoding takes over
+    monkeypatch.undo()
+    with open(store.txt_file, "a") as f:
+        f.write("stray line\n")
+    with open(out, "wb") as f:
+        assert store.copy_txt(f.fileno()) is None
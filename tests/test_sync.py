@@ -0,0 +1,138 @@
+"""Tests for incremental replication of another store."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from collector import sync
+from collector.storage import Storage
+
+
+@pytest.fixture
+def source(tmp_path: Path, make_entry) -> Storage:
+    store = Storage(tmp_path / "remote")
+    for n in range(3):
+        store.append(
+            make_entry(f"01Sync{n}", cwd="/home/other/project", trace={"record_start": 1.0})
+        )
+    return store
+
+
+@pytest.fixture
+def local(tmp_path: Path) -> Storage:
+    return Storage(tmp_path / "local")
+
+
+def _ids(store: Storage) -> list[str]:
+    return [e.session_id for e in store.read_all()]
+
+
+def test_copies_only_new_entries(source: Storage, local: Storage, monkeypatch, make_entry):
+    result = sync.sync_once(local, source.base_dir, host="laptop")
+    assert (result.copied, result.rescanned) == (3, False)
+    copied = local.read_all()
+    assert [e.host for e in copied] == ["laptop"] * 3
+    assert copied[0].trace is None and copied[0].cwd == "/home/other/project"
+
+    # From here on only the appended bytes are read
+    monkeypatch.setattr(sync, "_resume_offset", lambda *a: pytest.fail("rescanned"))
+    monkeypatch.setattr(sync, "_copy_missing", lambda *a: pytest.fail("rescanned"))
+    source.append(make_entry("01Sync3"))
+    source.append(make_entry("01Sync4"))
+    assert sync.sync_once(local, source.jsonl_file).copied == 2
+    assert sync.sync_once(local, source.jsonl_file).copied == 0
+    assert _ids(local) == [f"01Sync{n}" for n in range(5)]
+
+    state = json.loads((local.base_dir / sync.STATE_NAME).read_text())
+    checkpoint = state[str(source.jsonl_file.resolve())]
+    assert checkpoint["offset"] == source.jsonl_file.stat().st_size
+    assert checkpoint["inode"] == source.jsonl_file.stat().st_ino
+
+
+def test_partial_line_waits_for_the_rest(source: Storage, local: Storage, make_entry):
+    line = json.dumps(make_entry("01Sync3").to_dict()) + "\n"
+    with open(source.jsonl_file, "a") as f:
+        f.write(line[:20])
+    assert sync.sync_once(local, source.base_dir).copied == 3
+    with open(source.jsonl_file, "a") as f:
+        f.write(line[20:])
+    result = sync.sync_once(local, source.base_dir)
+    assert (result.copied, result.skipped, result.rescanned) == (1, 0, False)
+    assert _ids(local)[-1] == "01Sync3"
+
+
+def test_clean_on_source_resumes_after_last_copied(source: Storage, local: Storage, make_entry):
+    sync.sync_once(local, source.base_dir)
+    source.clean(keep_last=2)
+    source.append(make_entry("01Sync3"))
+    result = sync.sync_once(local, source.base_dir)
+    assert (result.copied, result.rescanned) == (1, True)
+    assert _ids(local) == [f"01Sync{n}" for n in range(4)]
+    assert sync.sync_once(local, source.base_dir).rescanned is False
+
+
+def test_rewritten_source_copies_what_is_missing(source: Storage, local: Storage, make_entry):
+    sync.sync_once(local, source.base_dir)
+    source.clean(keep_last=0)
+    assert sync.sync_once(local, source.base_dir).copied == 0
+    # Keeps an older entry the local store already has, loses the last copied one
+    for n in (1, 5, 6):
+        source.append(make_entry(f"01Sync{n}"))
+    result = sync.sync_once(local, source.base_dir)
+    assert (result.copied, result.rescanned) == (2, True)
+    assert _ids(local) == ["01Sync0", "01Sync1", "01Sync2", "01Sync5", "01Sync6"]
+
+    source.clean(keep_last=1)
+    assert sync.sync_once(local, source.base_dir).copied == 0
+    assert len(_ids(local)) == 5
+
+
+def test_sync_cli(source: Storage, tmp_path: Path):
+    env = dict(os.environ, HOME=str(tmp_path))
+    run = subprocess.run(
+        [sys.executable, "-m", "collector.cli", "sync", str(source.base_dir)],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    assert "Copied 3 new entries" in run.stdout
+    assert len(Storage(tmp_path / ".claude-remote-sessions").read_all()) == 3
+
+    run = subprocess.run(
+        [sys.executable, "-m", "collector.cli", "sync", str(tmp_path / "missing.jsonl")],
+        env=env, capture_output=True, text=True,
+    )
+    assert run.returncode == 1
+    assert "Cannot read" in run.stderr
+
+
+def test_interrupted_sync_resumes_after_the_last_batch(
+    source: Storage, local: Storage, monkeypatch, make_entry
+):
+    for n in range(3, 20):
+        source.append(make_entry(f"01Sync{n}"))
+    line = source.jsonl_file.stat().st_size // 20
+    monkeypatch.setattr(sync, "CHUNK", line * 3)
+    append_many = local.append_many
+    calls = []
+
+    def failing(entries):
+        calls.append(len(entries))
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        append_many(entries)
+
+    monkeypatch.setattr(local, "append_many", failing)
+    with pytest.raises(KeyboardInterrupt):
+        sync.sync_once(local, source.base_dir)
+    copied = len(_ids(local))
+    assert 0 < copied < 20
+
+    monkeypatch.setattr(local, "append_many", append_many)
+    result = sync.sync_once(local, source.base_dir)
+    assert (result.copied, result.rescanned) == (20 - copied, False)
+    assert _ids(local) == [f"01Sync{n}" for n in range(20)]
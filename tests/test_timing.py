@@ -0,0 +1,78 @@
+"""Tests for CRC_TRACE phase timing and the --profile flag."""
+
+from __future__ import annotations
+
+import os
+import pstats
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from collector import timing
+from collector.storage import Storage
+
+RECORD = ["record", "--url", "https://claude.ai/code/session_timing1"]
+
+
+def _cli(tmp_path: Path, args: list[str], **env: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-m", "collector.cli", *args],
+        env=dict(os.environ, HOME=str(tmp_path), **env),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_phases_are_noops_when_disabled(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(timing, "_target", "")
+    monkeypatch.setattr(timing, "_phases", {})
+    with timing.phase("config"):
+        pass
+    timing.add("write", 1.0)
+    assert timing._phases == {}
+
+
+def test_phases_accumulate(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(timing, "_target", "1")
+    monkeypatch.setattr(timing, "_phases", {})
+    timing.add("write", 0.001)
+    timing.add("write", 0.002)
+    with timing.phase("notify"):
+        pass
+    line = timing.format_line("record", 0.5)
+    assert "crc record" in line
+    assert line.endswith("write 3.0ms, notify 0.0ms, total 500.0ms")
+
+
+def test_crc_trace_to_stderr(tmp_path: Path):
+    assert _cli(tmp_path, RECORD).stderr == ""
+    stderr = _cli(tmp_path, RECORD, CRC_TRACE="1").stderr
+    for phase in ("import", "lock_wait", "write", "config", "total"):
+        assert f"{phase} " in stderr
+    # Phase timing alone doesn't turn on the per-entry latency trace
+    store = Storage(tmp_path / ".claude-remote-sessions")
+    assert [e.trace for e in store.read_all()] == [None, None]
+
+
+def test_crc_trace_to_file(tmp_path: Path):
+    log = tmp_path / "timing.log"
+    for _ in range(2):
+        assert _cli(tmp_path, RECORD, CRC_TRACE=str(log)).stderr == ""
+    lines = log.read_text().splitlines()
+    assert len(lines) == 2
+    assert all("crc record" in line and "lock_wait" in line for line in lines)
+
+
+def test_profile_writes_pstats(tmp_path: Path):
+    out = tmp_path / "record.pstats"
+    result = _cli(tmp_path, ["--profile-output", str(out), *RECORD])
+    assert str(out) in result.stderr
+    stats = pstats.Stats(str(out))
+    assert any(func[2] == "cmd_record" for func in stats.stats)  # type: ignore[attr-defined]
+
+    _cli(tmp_path, ["--profile", "latest"])
+    [default] = (tmp_path / ".claude-remote-sessions" / "profiles").iterdir()
+    assert default.name.startswith("latest-") and default.suffix == ".pstats"
@@ -0,0 +1,132 @@
+"""Tests for capture-to-delivery latency tracing."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from collector.outbox import Outbox
+from collector.storage import Storage
+from collector.trace import breakdown, load_deliveries, parse_stages, record_delivery, report
+from tests.stub_server import StubServer
+
+
+def test_parse_stages_converts_wall_clock():
+    now = time.time()
+    stages = parse_stages([
+        f"first_byte={now - 2}",
+        f"url_detected={now - 0.5}",
+        "url_detected_typo=1",
+        "first_byte=1700000000.N",  # date(1) without %N support
+    ])
+    assert set(stages) == {"first_byte", "url_detected"}
+    assert abs(stages["url_detected"] - (time.monotonic() - 0.5)) < 0.05
+    assert abs(stages["url_detected"] - stages["first_byte"] - 1.5) < 0.01
+
+
+def test_trace_roundtrips_through_storage(tmp_path: Path, make_entry):
+    store = Storage(tmp_path)
+    store.append(make_entry("traced", trace={"record_start": time.monotonic()}))
+    store.append(make_entry("plain"))
+    traced, plain = store.read_all()
+    assert traced.trace["stored"] >= traced.trace["record_start"]
+    assert plain.trace is None
+    assert "trace" not in json.loads(store.jsonl_file.read_text().splitlines()[1])
+
+
+def test_breakdown_segments(make_entry):
+    entry = make_entry("x", trace={"first_byte": 10.0, "url_detected": 10.5, "record_start": 10.6, "stored": 10.62})
+    deliveries = {
+        "telegram": {"notified": 11.0, "network": 0.3},
+        "webhook": {"notified": 12.0},
+    }
+    spans = breakdown(entry, deliveries)
+    assert list(spans) == [
+        "capture → detect",
+        "detect → record",
+        "record → stored",
+        "stored → delivered [telegram]",
+        "network [telegram]",
+        "stored → delivered [webhook]",
+        "end to end",
+    ]
+    assert abs(spans["capture → detect"] - 0.5) < 1e-9
+    assert abs(spans["stored → delivered [telegram]"] - 0.38) < 1e-9
+    assert spans["end to end"] == 2.0
+
+
+def test_report_skips_untraced_and_orders_segments(tmp_path: Path, make_entry):
+    entries = [
+        make_entry("a", trace={"record_start": 1.0, "stored": 1.1}),
+        make_entry("b", trace={"first_byte": 0.0, "url_detected": 0.4, "record_start": 0.5, "stored": 0.7}),
+        make_entry("c"),
+    ]
+    record_delivery(tmp_path, entries[1], "ntfy", network=0.2)
+    record_delivery(tmp_path, entries[2], "ntfy")  # untraced: not written
+    assert list(load_deliveries(tmp_path)) == ["b"]
+
+    segments = report(entries, tmp_path)
+    assert list(segments)[:3] == ["capture → detect", "detect → record", "record → stored"]
+    assert segments["record → stored"]["count"] == 2
+    assert abs(segments["record → stored"]["max"] - 0.2) < 1e-9
+    assert segments["network [ntfy]"]["p50"] == 0.2
+
+
+def test_outbox_records_deliveries(tmp_path: Path, make_entry):
+    entry = make_entry("abc", trace={"record_start": time.monotonic()})
+    Storage(tmp_path).append(entry)
+    outbox = Outbox(tmp_path)
+    outbox.enqueue(entry)
+    with StubServer() as srv:
+        outbox.flush({"notify": {"backend": "webhook"}, "notify.webhook": {"url": srv.url}})
+    [delivery] = load_deliveries(tmp_path)["abc"].values()
+    assert delivery["backend"] == "webhook"
+    assert delivery["notified"] >= entry.trace["stored"]
+    assert 0 < delivery["network"] < 1
+
+
+def test_record_and_stats_trace_cli(tmp_path: Path):
+    env = dict(os.environ, HOME=str(tmp_path))
+    now = time.time()
+    subprocess.run(
+        [
+            sys.executable, "-m", "collector.cli", "record",
+            "--url", "https://claude.ai/code/session_cliTrace",
+            "--trace", f"first_byte={now - 1}", "--trace", f"url_detected={now - 0.2}",
+        ],
+        env=env,
+        check=True,
+    )
+    [entry] = Storage(tmp_path / ".claude-remote-sessions").read_all()
+    assert set(entry.trace) == {"first_byte", "url_detected", "record_start", "stored"}
+    assert entry.trace["first_byte"] < entry.trace["url_detected"] < entry.trace["stored"]
+
+    out = subprocess.run(
+        [sys.executable, "-m", "collector.cli", "stats", "trace"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    assert "last 1 traced sessions" in out
+    assert "capture → detect" in out
+
+
+def test_untraced_record_and_clean_trims_sidecar(tmp_path: Path, make_entry):
+    env = {k: v for k, v in os.environ.items() if k != "CRC_TRACE"}
+    subprocess.run(
+        [sys.executable, "-m", "collector.cli",
+         "record", "--url", "https://claude.ai/code/session_plain"],
+        env=dict(env, HOME=str(tmp_path)), check=True,
+    )
+    store = Storage(tmp_path / ".claude-remote-sessions")
+    [entry] = store.read_all()
+    assert entry.trace is None
+
+    entries = [make_entry(f"s{n}", trace={"record_start": time.monotonic()}) for n in range(4)]
+    store.append_many(entries)
+    for e in entries:
+        record_delivery(store.base_dir, e, "ntfy")
+    store.clean(keep_last=2)
+    assert set(load_deliveries(store.base_dir)) == {"s2", "s3"}